@@ -0,0 +1,388 @@
+"""Admission control for the analysis endpoints.
+
+Accepting every upload during a spike makes every request slow. The controller instead runs at
+most `max_concurrent` analyses at once and lets up to `max_queue` more wait up to
+`queue_timeout` seconds for a slot. Anything beyond that is refused straight away with 503 and
+a Retry-After estimated from recent service times, before the upload is read. An optional token
+bucket (`rate` requests/second, `burst`) refuses bursts with 429.
+
+Requests are queued per tenant (API key, user or client address; see doc_test.request_tenant)
+and free slots go to the queued tenants by smooth weighted round-robin, so one client's bulk
+import waits behind its own requests rather than in front of everyone else's. Each tenant may
+run at most `tenant_max_concurrent` analyses and queue `tenant_max_queue` more, and may upload
+`tenant_bytes_per_second` on average (`tenant_byte_burst` at once); going over any of these is
+the tenant's own overload and is answered with 429. When the shared queue is full, a newcomer
+takes the newest place of the tenant with the longest (weighted) queue instead of being refused.
+
+Admitted requests are marked degraded once running and waiting requests fill `degrade_at` of
+the slots (running + queue), or when `degrade_when()` says so (e.g. the recommendation executor
+is backed up). Degraded requests use the built-in recommendations instead of Gemini, trading
+recommendation quality for latency.
+"""
+import os
+import math
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "anonymous"
+GRANTED = "granted"
+EVICTED = "evicted"
+COUNTERS = ("admitted", "degraded", "rejected_busy", "rejected_rate", "rejected_quota", "rejected_bytes",
+            "evicted", "timed_out")
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of admitting a request; status is 429 or 503"""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TenantState:
+    """Queue, quota usage and counters of one tenant"""
+    __slots__ = ("name", "weight", "in_flight", "waiters", "credit", "byte_tokens", "byte_refilled_at",
+                 "counts", "bytes_admitted", "wait_seconds", "latencies")
+
+    def __init__(self, name: str, weight: float, byte_burst: float, now: float, latency_window: int):
+        self.name = name
+        self.weight = weight
+        self.in_flight = 0
+        self.waiters = deque()
+        # Smooth weighted round-robin credit while the tenant has queued requests
+        self.credit = 0.0
+        self.byte_tokens = byte_burst
+        self.byte_refilled_at = now
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.bytes_admitted = 0
+        self.wait_seconds = 0.0
+        # Recent time from arrival to release, for the tenant's latency percentiles
+        self.latencies = deque(maxlen=latency_window)
+
+    @property
+    def idle(self) -> bool:
+        return not self.in_flight and not self.waiters
+
+
+class _Waiter:
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = None
+
+
+class AdmissionTicket:
+    __slots__ = ("admitted_at", "degraded", "tenant", "arrived_at")
+
+    def __init__(self, admitted_at: float, degraded: bool, tenant: TenantState = None, arrived_at: float = None):
+        self.admitted_at = admitted_at
+        self.degraded = degraded
+        self.tenant = tenant
+        self.arrived_at = admitted_at if arrived_at is None else arrived_at
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float = 1.0, rate: float = None,
+                 burst: int = None, degrade_at: float = 0.75, degrade_when: Callable[[], bool] = None,
+                 max_retry_after: int = 30, tenant_max_concurrent: int = None, tenant_max_queue: int = None,
+                 tenant_bytes_per_second: float = None, tenant_byte_burst: int = None,
+                 weights: Dict[str, float] = None, max_tenants: int = 1000, latency_window: int = 200):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst or (max(1, int(math.ceil(rate))) if rate else None)
+        self.degrade_at = degrade_at
+        self.degrade_when = degrade_when
+        self.max_retry_after = max_retry_after
+        # By default a tenant may fill all but one slot, so another tenant's request can always start
+        self.tenant_max_concurrent = max(1, tenant_max_concurrent or self.max_concurrent - 1)
+        self.tenant_max_queue = self.max_queue if tenant_max_queue is None else max(0, tenant_max_queue)
+        self.tenant_bytes_per_second = tenant_bytes_per_second
+        self.tenant_byte_burst = tenant_byte_burst or (int(10 * tenant_bytes_per_second) if tenant_bytes_per_second else None)
+        self.weights = dict(weights or {})
+        self.max_tenants = max_tenants
+        self.latency_window = latency_window
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._tokens = float(self.burst or 0)
+        self._refilled_at = time.monotonic()
+        # Moving average of how long an admitted analysis takes, for Retry-After
+        self._avg_seconds = None
+        self._counts = dict.fromkeys(COUNTERS, 0)
+        self._wait_seconds = 0.0
+        # Every known tenant, least recently seen first; tenants with queued requests, in queue order
+        self._tenants = OrderedDict()
+        self._queued = OrderedDict()
+
+    @classmethod
+    def from_env(cls, default_concurrency: int, degrade_when: Callable[[], bool] = None) -> 'AdmissionController':
+        """Limits from ADMISSION_MAX_CONCURRENT, ADMISSION_QUEUE, ADMISSION_QUEUE_TIMEOUT, ADMISSION_RATE,
+        ADMISSION_BURST and ADMISSION_DEGRADE_AT; tenant quotas from TENANT_MAX_CONCURRENT, TENANT_MAX_QUEUE,
+        TENANT_BYTES_PER_SECOND, TENANT_BYTE_BURST and TENANT_WEIGHTS ("user:alice=2,ip:10.0.0.5=0.5")"""
+        max_concurrent = int(os.getenv('ADMISSION_MAX_CONCURRENT', str(default_concurrency)))
+        rate = os.getenv('ADMISSION_RATE')
+        burst = os.getenv('ADMISSION_BURST')
+        tenant_concurrent = os.getenv('TENANT_MAX_CONCURRENT')
+        tenant_queue = os.getenv('TENANT_MAX_QUEUE')
+        byte_rate = os.getenv('TENANT_BYTES_PER_SECOND')
+        byte_burst = os.getenv('TENANT_BYTE_BURST')
+        return cls(
+            max_concurrent,
+            int(os.getenv('ADMISSION_QUEUE', str(max_concurrent))),
+            float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1.0')),
+            rate=float(rate) if rate else None,
+            burst=int(burst) if burst else None,
+            degrade_at=float(os.getenv('ADMISSION_DEGRADE_AT', '0.75')),
+            degrade_when=degrade_when,
+            tenant_max_concurrent=int(tenant_concurrent) if tenant_concurrent else None,
+            tenant_max_queue=int(tenant_queue) if tenant_queue else None,
+            tenant_bytes_per_second=float(byte_rate) if byte_rate else None,
+            tenant_byte_burst=int(byte_burst) if byte_burst else None,
+            weights=parse_weights(os.getenv('TENANT_WEIGHTS', ''))
+        )
+
+    def acquire(self, tenant: str = DEFAULT_TENANT, size_bytes: int = 0) -> AdmissionTicket:
+        """Admit the calling request (waiting for a slot if the queues allow) or raise AdmissionRejected"""
+        started = time.monotonic()
+        with self._condition:
+            if self.rate and not self._take_token(started):
+                self._counts["rejected_rate"] += 1
+                retry_after = self._clamp((1 - self._tokens) / self.rate)
+                raise AdmissionRejected(429, "Too many analysis requests; slow down", retry_after)
+            state = self._tenant(tenant, started)
+            if self.tenant_bytes_per_second:
+                self._take_bytes(state, size_bytes, started)
+
+            waiter = _Waiter()
+            self._enqueue(state, waiter)
+            self._dispatch()
+            try:
+                if waiter.outcome is None:
+                    self._check_queue_limits(state, waiter)
+                    self._condition.wait_for(lambda: waiter.outcome is not None, timeout=self.queue_timeout)
+                if waiter.outcome is None:
+                    self._dequeue(state, waiter)
+                    self._count(state, "timed_out")
+                    if state.in_flight >= self.tenant_max_concurrent:
+                        raise AdmissionRejected(429, "Too many concurrent analyses for this client; slow down",
+                                                self._tenant_retry_after(state))
+                    raise AdmissionRejected(503, "Analysis capacity exceeded; try again shortly", self._retry_after())
+                if waiter.outcome == EVICTED:
+                    self._count(state, "evicted")
+                    raise AdmissionRejected(429, "Too many queued analyses for this client; slow down",
+                                            self._tenant_retry_after(state))
+            except AdmissionRejected:
+                self._refund_bytes(state, size_bytes)
+                raise
+            load = (self._in_flight + self._waiting) / (self.max_concurrent + self.max_queue)
+            self._count(state, "admitted")
+            state.bytes_admitted += size_bytes
+            now = time.monotonic()
+            self._wait_seconds += now - started
+            state.wait_seconds += now - started
+        degraded = load >= self.degrade_at or bool(self.degrade_when and self.degrade_when())
+        if degraded:
+            with self._condition:
+                self._count(state, "degraded")
+        return AdmissionTicket(now, degraded, state, started)
+
+    def charge_bytes(self, ticket: AdmissionTicket, size_bytes: int):
+        """Charge an admitted request for bytes only known once it is validated (a file it names on
+        the server); AdmissionRejected (429) when the tenant's byte quota does not cover them"""
+        if ticket.tenant is None:
+            return
+        with self._condition:
+            if self.tenant_bytes_per_second:
+                self._take_bytes(ticket.tenant, size_bytes, time.monotonic())
+            ticket.tenant.bytes_admitted += size_bytes
+
+    def release(self, ticket: AdmissionTicket):
+        now = time.monotonic()
+        elapsed = now - ticket.admitted_at
+        with self._condition:
+            self._in_flight -= 1
+            self._avg_seconds = elapsed if self._avg_seconds is None else 0.8 * self._avg_seconds + 0.2 * elapsed
+            if ticket.tenant is not None:
+                ticket.tenant.in_flight -= 1
+                ticket.tenant.latencies.append(now - ticket.arrived_at)
+            self._dispatch()
+
+    def metrics(self, include_tenants: bool = False) -> Dict[str, Any]:
+        with self._condition:
+            admitted = self._counts["admitted"]
+            metrics = {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "rate": self.rate,
+                "burst": self.burst,
+                "degrade_at": self.degrade_at,
+                "tenant_max_concurrent": self.tenant_max_concurrent,
+                "tenant_max_queue": self.tenant_max_queue,
+                "tenant_bytes_per_second": self.tenant_bytes_per_second,
+                "tenant_byte_burst": self.tenant_byte_burst,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "tenants_tracked": len(self._tenants),
+                "queued_tenants": len(self._queued),
+                **self._counts,
+                "avg_wait_seconds": round(self._wait_seconds / admitted, 4) if admitted else 0.0,
+                "avg_service_seconds": round(self._avg_seconds, 3) if self._avg_seconds is not None else None
+            }
+            if include_tenants:
+                metrics["tenants"] = {name: self._tenant_metrics(state) for name, state in self._tenants.items()}
+            return metrics
+
+    def _tenant_metrics(self, state: TenantState) -> Dict[str, Any]:
+        admitted = state.counts["admitted"]
+        latencies = sorted(state.latencies)
+        return {
+            "weight": state.weight,
+            "in_flight": state.in_flight,
+            "waiting": len(state.waiters),
+            **state.counts,
+            "bytes_admitted": state.bytes_admitted,
+            "byte_tokens": round(state.byte_tokens) if self.tenant_bytes_per_second else None,
+            "avg_wait_seconds": round(state.wait_seconds / admitted, 4) if admitted else 0.0,
+            "p50_seconds": round(_percentile(latencies, 0.50), 3) if latencies else None,
+            "p99_seconds": round(_percentile(latencies, 0.99), 3) if latencies else None
+        }
+
+    def _tenant(self, name: str, now: float) -> TenantState:
+        state = self._tenants.get(name)
+        if state is None:
+            state = TenantState(name, self.weights.get(name, 1.0), float(self.tenant_byte_burst or 0), now,
+                                self.latency_window)
+            self._tenants[name] = state
+            if len(self._tenants) > self.max_tenants:
+                # Forget the least recently seen idle tenants; active ones stay whatever the count
+                for stale in [s.name for s in self._tenants.values() if s.idle and s is not state][:len(self._tenants) - self.max_tenants]:
+                    del self._tenants[stale]
+        else:
+            self._tenants.move_to_end(name)
+        return state
+
+    def _enqueue(self, state: TenantState, waiter: _Waiter):
+        state.waiters.append(waiter)
+        self._queued.setdefault(state.name, state)
+        self._waiting += 1
+
+    def _dequeue(self, state: TenantState, waiter: _Waiter):
+        state.waiters.remove(waiter)
+        self._waiting -= 1
+        if not state.waiters:
+            self._queued.pop(state.name, None)
+            state.credit = 0.0
+
+    def _dispatch(self):
+        """Hand free slots to queued requests, picking tenants by smooth weighted round-robin"""
+        granted = False
+        while self._in_flight < self.max_concurrent and self._queued:
+            eligible = [state for state in self._queued.values() if state.in_flight < self.tenant_max_concurrent]
+            if not eligible:
+                break
+            total = 0.0
+            chosen = None
+            for state in eligible:
+                state.credit += state.weight
+                total += state.weight
+                if chosen is None or state.credit > chosen.credit:
+                    chosen = state
+            chosen.credit -= total
+            waiter = chosen.waiters[0]
+            self._dequeue(chosen, waiter)
+            waiter.outcome = GRANTED
+            self._in_flight += 1
+            chosen.in_flight += 1
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def _check_queue_limits(self, state: TenantState, waiter: _Waiter):
+        if len(state.waiters) > self.tenant_max_queue:
+            self._dequeue(state, waiter)
+            self._count(state, "rejected_quota")
+            raise AdmissionRejected(429, "Too many queued analyses for this client; slow down",
+                                    self._tenant_retry_after(state))
+        if self._waiting <= self.max_queue:
+            return
+        # Full: the newcomer displaces the newest queued request of the tenant holding the most slots
+        # (running + queued, by weight), if that is more than the newcomer's tenant held before it arrived
+        longest = max(self._queued.values(), key=lambda queued: (queued.in_flight + len(queued.waiters)) / queued.weight)
+        if longest is not state and \
+                (longest.in_flight + len(longest.waiters)) / longest.weight > (state.in_flight + len(state.waiters) - 1) / state.weight:
+            evicted = longest.waiters[-1]
+            self._dequeue(longest, evicted)
+            evicted.outcome = EVICTED
+            self._condition.notify_all()
+            return
+        self._dequeue(state, waiter)
+        self._count(state, "rejected_busy")
+        raise AdmissionRejected(503, "Analysis capacity exceeded; try again shortly", self._retry_after())
+
+    def _count(self, state: TenantState, key: str):
+        self._counts[key] += 1
+        state.counts[key] += 1
+
+    def _take_token(self, now: float) -> bool:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _take_bytes(self, state: TenantState, size_bytes: int, now: float):
+        state.byte_tokens = min(float(self.tenant_byte_burst),
+                                state.byte_tokens + (now - state.byte_refilled_at) * self.tenant_bytes_per_second)
+        state.byte_refilled_at = now
+        # A document larger than the burst is let through on a full bucket and paid off afterwards
+        needed = min(size_bytes, self.tenant_byte_burst)
+        if state.byte_tokens < needed:
+            self._count(state, "rejected_bytes")
+            retry_after = self._clamp((needed - state.byte_tokens) / self.tenant_bytes_per_second)
+            raise AdmissionRejected(429, "Upload volume quota exceeded for this client; slow down", retry_after)
+        state.byte_tokens -= size_bytes
+
+    def _refund_bytes(self, state: TenantState, size_bytes: int):
+        if self.tenant_bytes_per_second:
+            state.byte_tokens = min(float(self.tenant_byte_burst), state.byte_tokens + size_bytes)
+
+    def _retry_after(self) -> int:
+        # Time for the requests ahead (running and queued) to drain through the slots
+        average = self._avg_seconds if self._avg_seconds is not None else 1.0
+        return self._clamp(average * (self._waiting + 1) / self.max_concurrent)
+
+    def _tenant_retry_after(self, state: TenantState) -> int:
+        # Time for the tenant's own running and queued requests to drain through its share
+        average = self._avg_seconds if self._avg_seconds is not None else 1.0
+        return self._clamp(average * (len(state.waiters) + 1) / self.tenant_max_concurrent)
+
+    def _clamp(self, seconds: float) -> int:
+        return max(1, min(self.max_retry_after, int(math.ceil(seconds))))
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """'user:alice=2,key:1a2b3c=0.5' -> {'user:alice': 2.0, 'key:1a2b3c': 0.5}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.rpartition('=')
+        try:
+            if not name.strip():
+                raise ValueError(item)
+            weights[name.strip()] = max(0.01, float(weight))
+        except ValueError:
+            logger.warning(f"Ignoring tenant weight {item!r}; expected tenant=weight")
+    return weights
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
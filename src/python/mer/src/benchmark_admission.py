@@ -0,0 +1,138 @@
+"""Benchmark admission control: latency of admitted requests as offered load grows.
+
+Usage: python benchmark_admission.py [document.pdf] [--levels 1,2,4,8,16] [--duration 5] [--bulk 8]
+
+Closed-loop clients post the document to /document/analyze_from_path in-process for
+`duration` seconds per concurrency level; a refused client backs off for the Retry-After it
+was given (capped at 0.5 s so the level keeps offering load). Reports admitted p50/p95, the share
+refused with 429/503 and the share served degraded, first with admission control as configured
+(ADMISSION_* environment variables) and then with it effectively off.
+
+Then, for fair queuing, `--bulk` clients of one tenant post the document while a second tenant
+posts a one-page PDF; reports the light tenant's p50/p99 with the two told apart by client
+address and with both sent from the same address (one shared queue).
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+
+
+def synthetic_pdf(pages=40, name="admission.pdf"):
+    import fitz
+    random.seed(3)
+    words = "Python Java SQL Docker experience project team delivered Kubernetes React AWS Excel".split()
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 560, 800), " ".join(random.choice(words) for _ in range(500)), fontsize=8)
+    path = os.path.join(tempfile.mkdtemp(), name)
+    document.save(path)
+    return path
+
+
+def closed_loop(app, path, deadline, record, remote_addr='127.0.0.1'):
+    test_client = app.test_client()
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = test_client.post('/document/analyze_from_path', json={'file_path': path},
+                                    environ_base={'REMOTE_ADDR': remote_addr})
+        record(response, (time.perf_counter() - started) * 1000)
+        if response.status_code in (429, 503):
+            time.sleep(min(0.5, float(response.headers.get('Retry-After', '1'))))
+
+
+def run_clients(loops):
+    threads = [threading.Thread(target=closed_loop, args=loop) for loop in loops]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_level(app, path, clients, duration):
+    latencies, statuses, degraded = [], {}, [0]
+    lock = threading.Lock()
+
+    def record(response, elapsed):
+        with lock:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                degraded[0] += 1 if response.get_json().get("degraded") else 0
+
+    deadline = time.monotonic() + duration
+    run_clients([(app, path, deadline, record)] * clients)
+    total = sum(statuses.values())
+    latencies.sort()
+    p50 = statistics.median(latencies) if latencies else 0.0
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0.0
+    refused = statuses.get(429, 0) + statuses.get(503, 0)
+    print(f"{clients:>8d} {total:>9d} {p50:>9.0f} {p95:>9.0f} {100 * refused / total if total else 0:>8.1f}% "
+          f"{100 * degraded[0] / len(latencies) if latencies else 0:>8.1f}%")
+
+
+def run_tenants(app, bulk_path, light_path, bulk_clients, duration, shared):
+    results = {"bulk": ([], [0]), "light": ([], [0])}
+    lock = threading.Lock()
+
+    def recorder(tenant):
+        def record(response, elapsed):
+            with lock:
+                if response.status_code == 200:
+                    results[tenant][0].append(elapsed)
+                else:
+                    results[tenant][1][0] += 1
+        return record
+
+    deadline = time.monotonic() + duration
+    address = {"bulk": "10.0.0.1", "light": "10.0.0.1" if shared else "10.0.0.2"}
+    loops = [(app, bulk_path, deadline, recorder("bulk"), address["bulk"])] * bulk_clients
+    loops.append((app, light_path, deadline, recorder("light"), address["light"]))
+    run_clients(loops)
+    for tenant, (latencies, refused) in results.items():
+        latencies.sort()
+        p50 = statistics.median(latencies) if latencies else 0.0
+        p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+        print(f"{'one queue' if shared else 'per tenant':>11s} {tenant:>6s} {len(latencies):>9d} {p50:>9.0f} {p99:>9.0f} {refused[0]:>8d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('document', nargs='?')
+    parser.add_argument('--levels', default='1,2,4,8,16')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--bulk', type=int, default=8, help='clients of the bulk tenant (0 to skip)')
+    args = parser.parse_args()
+
+    import doc_test
+    from admission import AdmissionController
+    path = args.document or synthetic_pdf()
+    doc_test.document_processor.executors.start()
+    levels = [int(level) for level in args.levels.split(',')]
+
+    configured = doc_test.admission
+    unlimited = AdmissionController(10 ** 6, 0, degrade_at=float('inf'))
+    for label, controller in (("admission control", configured), ("no admission control", unlimited)):
+        doc_test.admission = controller
+        print(f"\n{label}: {controller.metrics()['max_concurrent']} concurrent, {controller.metrics()['max_queue']} queued")
+        print(f"{'clients':>8s} {'requests':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'refused':>9s} {'degraded':>9s}")
+        for clients in levels:
+            run_level(doc_test.app, path, clients, args.duration)
+    doc_test.admission = configured
+
+    if args.bulk:
+        light_path = synthetic_pdf(pages=1, name="light.pdf")
+        print(f"\nfair queuing: {args.bulk} bulk clients and 1 light client")
+        print(f"{'queueing':>11s} {'tenant':>6s} {'admitted':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'refused':>8s}")
+        for shared in (True, False):
+            run_tenants(doc_test.app, path, light_path, args.bulk, args.duration, shared)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Benchmark the built-in recommendation paths that answer without Gemini.
+
+Usage: python benchmark_fallback.py [--duration 2]
+
+Single-threaded requests per second (one core, logging off) for the keyword fallback
+(_create_keyword_fallback) with the precomputed job tables, and with them disabled so every
+request recomputes sector, time, difficulty and learning path and rescans the keyword mappings
+(the cost before the tables existed), then for skill lists ranked by the local model
+(local_recommendations).
+"""
+import sys
+import time
+import logging
+import argparse
+
+KEYWORDS = ["Python", "React", "Machine Learning", "AWS", "Figma", "SQL", "Project Management", "Basket Weaving"]
+SKILL_LISTS = [
+    ["Python", "SQL", "Machine Learning", "Pandas"],
+    ["React", "JavaScript", "Node.js", "MongoDB"],
+    ["Docker", "Kubernetes", "AWS", "Linux"],
+    ["Figma", "Photoshop", "Sketch"],
+    ["Python", "SQL", "Docker", "React", "Excel", "Machine Learning", "AWS", "Git", "Java", "Communication", "Tableau", "Kubernetes"],
+]
+
+
+def requests_per_second(call, inputs, duration):
+    count = 0
+    started = time.perf_counter()
+    deadline = started + duration
+    while time.perf_counter() < deadline:
+        for item in inputs:
+            call(item)
+        count += len(inputs)
+    return count / (time.perf_counter() - started)
+
+
+def without_tables(recommender):
+    """Drop the precomputed and memoized tables and keep them from refilling"""
+    recommender.fallback_cache_limit = 0
+    recommender._job_profiles.clear()
+    recommender._keyword_jobs_cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    from gemini_job_recommender import GeminiJobRecommender
+    recommender = GeminiJobRecommender(api_key=None)
+    recommender.local_recommendations(SKILL_LISTS[0])
+
+    def keyword_fallback(keyword):
+        return recommender._create_keyword_fallback(keyword, ["Git", "Docker"], top_k=5)
+
+    def local(skills):
+        return recommender.local_recommendations(skills, top_k=10)
+
+    print(f"{'path':40s} {'requests/s':>12s}")
+    print(f"{'keyword fallback, precomputed tables':40s} {requests_per_second(keyword_fallback, KEYWORDS, args.duration):>12,.0f}")
+    print(f"{'skill list, local ranking model':40s} {requests_per_second(local, SKILL_LISTS, args.duration):>12,.0f}")
+    without_tables(recommender)
+    print(f"{'keyword fallback, recomputed per request':40s} {requests_per_second(keyword_fallback, KEYWORDS, args.duration):>12,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
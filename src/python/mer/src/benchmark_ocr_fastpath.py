@@ -0,0 +1,80 @@
+"""Benchmark the OCR fast path on a sample of real uploads.
+
+Usage: python benchmark_ocr_fastpath.py <uploads_dir> [--lang eng]
+
+Every image is processed twice: through the full pipeline (preprocess, layout OCR with
+confidence) and through ImageTriage followed by whatever its decision calls for. CPU time
+includes the tesseract child processes, so the saving reflects real core usage.
+"""
+import os
+import sys
+import argparse
+from collections import defaultdict
+
+from image_triage import ImageTriage, ACTION_SKIP, ACTION_EMBEDDED, ACTION_DOWNGRADE
+from ocr_router import OCRLanguageRouter
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'}
+CONFIG = r'--oem 3 --psm 6'
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('uploads_dir')
+    parser.add_argument('--lang', default='eng', help="OCR language; 'auto' includes detection in both passes")
+    args = parser.parse_args()
+
+    # Imported here so --help works without loading the service
+    from doc_test import document_processor as processor
+    triage = ImageTriage()
+    router = OCRLanguageRouter()
+
+    paths = [os.path.join(root, name) for root, _, files in os.walk(args.uploads_dir) for name in sorted(files)
+             if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+    if not paths:
+        print(f"No images found in {args.uploads_dir}")
+        return 1
+
+    full_cpu = defaultdict(float)
+    fast_cpu = defaultdict(float)
+    counts = defaultdict(int)
+    for path in paths:
+        started = cpu_seconds()
+        image = processor.preprocess_image(path)
+        if image is not None:
+            router.run(image, lang=args.lang, config=CONFIG, layout=True)
+        full = cpu_seconds() - started
+
+        started = cpu_seconds()
+        decision = triage.classify(path)
+        if decision["action"] not in (ACTION_SKIP, ACTION_EMBEDDED):
+            image = processor.preprocess_image(path)
+            if image is not None:
+                downgraded = decision["action"] == ACTION_DOWNGRADE
+                router.run(image, lang=args.lang, config=CONFIG, layout=not downgraded, with_confidence=not downgraded)
+        fast = cpu_seconds() - started
+
+        reason = decision["reason"]
+        counts[reason] += 1
+        full_cpu[reason] += full
+        fast_cpu[reason] += fast
+        print(f"{os.path.basename(path):40s} {decision['action']:9s} {reason:15s} full={full:6.2f}s fast={fast:6.2f}s")
+
+    print(f"\n{'reason':15s} {'images':>6s} {'full cpu s':>11s} {'fast cpu s':>11s} {'saved':>7s}")
+    for reason in sorted(counts):
+        saved = 1 - fast_cpu[reason] / full_cpu[reason] if full_cpu[reason] else 0.0
+        print(f"{reason:15s} {counts[reason]:6d} {full_cpu[reason]:11.2f} {fast_cpu[reason]:11.2f} {saved:7.1%}")
+    total_full, total_fast = sum(full_cpu.values()), sum(fast_cpu.values())
+    print(f"{'total':15s} {sum(counts.values()):6d} {total_full:11.2f} {total_fast:11.2f} {1 - total_fast / total_full if total_full else 0.0:7.1%}")
+    print(f"Triage: {triage.metrics()}")
+    router.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Benchmark language-routed OCR against a single all-languages OCR pass.
+
+Usage: python benchmark_ocr_routing.py <corpus_dir> [--languages eng+hin+mal]
+
+The corpus directory holds CV images, optionally in per-language subfolders (eng/, hin/,
+mal/) so detection accuracy can be reported. Each image is OCR'd twice: once with the
+combined language string (the cost of not routing) and once through OCRLanguageRouter.
+"""
+import os
+import sys
+import time
+import argparse
+from collections import defaultdict
+
+import cv2
+
+from ocr_router import OCRLanguageRouter
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'}
+CONFIG = r'--oem 3 --psm 6'
+
+
+def load_corpus(corpus_dir):
+    corpus = []
+    for root, _, files in os.walk(corpus_dir):
+        label = os.path.relpath(root, corpus_dir).split(os.sep)[0]
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                image = cv2.imread(os.path.join(root, name), cv2.IMREAD_GRAYSCALE)
+                if image is not None:
+                    corpus.append((label if label != '.' else None, name, image))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus_dir')
+    parser.add_argument('--languages', default='eng+hin+mal', help='combined language string for the baseline pass')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus_dir)
+    if not corpus:
+        print(f"No images found in {args.corpus_dir}")
+        return 1
+
+    router = OCRLanguageRouter()
+    baseline = defaultdict(float)
+    routed = defaultdict(float)
+    counts = defaultdict(int)
+    correct = 0
+    labelled = 0
+    for label, name, image in corpus:
+        started = time.perf_counter()
+        router._recognize(image, args.languages, CONFIG, with_confidence=False)
+        baseline[label] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        detection = router.detect(image)
+        lang = router.language_for_script(detection["script"])
+        router._recognize(image, lang, CONFIG, with_confidence=False)
+        routed[label] += time.perf_counter() - started
+
+        counts[label] += 1
+        if label:
+            labelled += 1
+            correct += lang.split('+')[0] == label
+        print(f"{name:40s} label={label or '-':5s} routed={lang:8s} via={detection['method']}")
+
+    print(f"\n{'group':8s} {'images':>6s} {'combined s/img':>15s} {'routed s/img':>13s} {'speedup':>8s}")
+    for label in sorted(counts, key=str):
+        n = counts[label]
+        print(f"{str(label or 'all'):8s} {n:6d} {baseline[label] / n:15.3f} {routed[label] / n:13.3f} {baseline[label] / routed[label]:7.2f}x")
+    total = sum(counts.values())
+    print(f"{'total':8s} {total:6d} {sum(baseline.values()) / total:15.3f} {sum(routed.values()) / total:13.3f} {sum(baseline.values()) / sum(routed.values()):7.2f}x")
+    if labelled:
+        print(f"\nRouting accuracy: {correct}/{labelled}")
+    print(f"Detection: {router.metrics()['detection']}")
+    router.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
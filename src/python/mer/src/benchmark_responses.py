@@ -0,0 +1,78 @@
+"""Benchmark analysis response size and serialization CPU.
+
+Usage: python benchmark_responses.py [saved_response.json ...] [--repeat 50]
+
+Each input is a JSON response captured from /document/analyze (full mode). Without inputs a
+synthetic large-document response is generated. Reports bytes and per-response CPU for the
+old encoding (stdlib json, sorted keys, as Flask's default provider), the fast encoder, the
+compact representation, and gzip/brotli on top.
+"""
+import sys
+import json
+import gzip
+import time
+import random
+import argparse
+
+from response_format import (dumps_bytes, compact_result, ORJSON_AVAILABLE, BROTLI_AVAILABLE,
+                             GZIP_LEVEL, BROTLI_QUALITY, brotli)
+
+
+def synthetic_response(pages=60):
+    random.seed(7)
+    skills = ["Python", "Java", "Docker", "AWS", "React", "SQL", "Kubernetes", "Git", "TensorFlow", "Scrum"]
+    filler = "experience project built lorem ipsum dolor sit amet team delivered".split()
+    text = "\n".join(" ".join(random.choice(skills + filler * 3) for _ in range(350)) for _ in range(pages))
+    by_category = {}
+    for position, word in enumerate(text.split()):
+        if word in skills:
+            by_category.setdefault("technical_skills", []).append({
+                "keyword": word, "category": "technical_skills", "position": position * 6,
+                "context": " ".join(random.choice(filler) for _ in range(16)), "confidence": 0.9
+            })
+    jobs = [{
+        "title": f"{skill} Engineer", "sector": random.choice(["Technology", "Data Science", "Cloud & DevOps"]),
+        "description": f"Build and run {skill} systems. " * 4, "relevance_score": 0.9,
+        "required_skills": skills[:6], "skill_gaps": skills[6:], "learning_path": {"steps": [{"step": i, "topic": f"{skill} {i}"} for i in range(6)]}
+    } for skill in skills]
+    jobs_by_sector = {}
+    for job in jobs:
+        jobs_by_sector.setdefault(job["sector"], []).append(job)
+    return {
+        "success": True, "text": text, "word_count": len(text.split()), "char_count": len(text),
+        "keywords": {"success": True, "keywords_by_category": by_category, "top_keywords": [], "unique_keywords": len(skills)},
+        "job_recommendations": {"success": True, "job_recommendations": jobs, "jobs_by_sector": jobs_by_sector}
+    }
+
+
+def measure(label, encode, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        body = encode()
+    cpu_ms = (time.process_time() - started) * 1000 / repeat
+    print(f"{label:34s} {len(body):>10,d} bytes {cpu_ms:9.2f} ms")
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('responses', nargs='*')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    inputs = [(path, json.load(open(path, encoding='utf-8'))) for path in args.responses] or [("synthetic", synthetic_response())]
+    print(f"orjson: {ORJSON_AVAILABLE}, brotli: {BROTLI_AVAILABLE}")
+    for name, response in inputs:
+        print(f"\n{name}")
+        measure("json (sorted, Flask default)", lambda: json.dumps(response, sort_keys=True).encode('utf-8'), args.repeat)
+        full = measure("fast encoder", lambda: dumps_bytes(response), args.repeat)
+        compact = measure("compact + fast encoder", lambda: dumps_bytes(compact_result(response)), args.repeat)
+        measure("full + gzip", lambda: gzip.compress(full, compresslevel=GZIP_LEVEL), args.repeat)
+        measure("compact + gzip", lambda: gzip.compress(compact, compresslevel=GZIP_LEVEL), args.repeat)
+        if BROTLI_AVAILABLE:
+            measure("compact + brotli", lambda: brotli.compress(compact, quality=BROTLI_QUALITY), args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
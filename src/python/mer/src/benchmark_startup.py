@@ -0,0 +1,64 @@
+"""Benchmark service startup: import time of doc_test with lazy and eager backend imports.
+
+Usage: python benchmark_startup.py [--module doc_test] [--repeat 5] [--top 15]
+
+Each run imports the module in a fresh interpreter under `python -X importtime` and reports
+the wall time, the module's cumulative import time and the slowest imports. The eager run
+sets LAZY_IMPORTS=0, which is what startup cost before backends were loaded on first use.
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import statistics
+
+
+def import_once(module, lazy):
+    env = dict(os.environ, LAZY_IMPORTS='1' if lazy else '0')
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"import {module} failed")
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, timings
+
+
+def run(module, lazy, repeat, top):
+    label = "lazy" if lazy else "eager (LAZY_IMPORTS=0)"
+    walls, totals, timings = [], [], {}
+    for _ in range(repeat):
+        wall, timings = import_once(module, lazy)
+        walls.append(wall)
+        totals.append(timings.get(module, (0, 0))[1] / 1000)
+    print(f"\n{label}: wall {statistics.median(walls) * 1000:.0f} ms, "
+          f"import {module} {statistics.median(totals):.0f} ms (median of {repeat})")
+    slowest = sorted(((cumulative, name) for name, (_, cumulative) in timings.items()
+                      if '.' not in name and name != module), reverse=True)[:top]
+    for cumulative, name in slowest:
+        print(f"  {name:32s} {cumulative / 1000:8.1f} ms")
+    return statistics.median(walls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='doc_test')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    eager = run(args.module, False, args.repeat, args.top)
+    lazy = run(args.module, True, args.repeat, args.top)
+    print(f"\nstartup: {eager * 1000:.0f} ms -> {lazy * 1000:.0f} ms ({eager / lazy:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
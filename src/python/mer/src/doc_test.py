@@ -1,43 +1,71 @@
-import pytesseract
-import cv2
-import numpy as np
-from PIL import Image
 import os
 import sys
 import json
-from flask import Flask, request, jsonify
+import base64
+import hashlib
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 import tempfile
 import logging
 from werkzeug.utils import secure_filename
-import docx
-from docx.shared import Inches
-import PyPDF2
-import pdfplumber
-import fitz  # PyMuPDF for better PDF handling
-from docx2txt import docx2txt
-import mammoth
 import re
 from datetime import datetime
 import mimetypes
 from pathlib import Path
-from collections import Counter
+from collections import OrderedDict
+from bisect import bisect_left
+import heapq
+import zipfile
+import threading
+import functools
 from typing import List, Dict, Any, Optional
 # ADD THIS: Load environment variables from .env file
 from dotenv import load_dotenv
 load_dotenv()  # This loads the .env file
 # NEW IMPORT
 from gemini_job_recommender import GeminiJobRecommender
+from skill_vocabulary import SkillVocabulary
+from ocr_router import OCRLanguageRouter
+from image_triage import ImageTriage, ACTION_EMBEDDED, ACTION_SKIP, ACTION_DOWNGRADE
+from response_format import FastJSONProvider, compact_result, compress_response, parse_fields
+from records import KeywordMatch, TopKeyword, CategorizedSkill, JobRecommendation
+from stage_executors import StageExecutors, ExecutorSaturatedError
+from admission import AdmissionController, AdmissionRejected
+from lazy_imports import lazy_module, module_available
+import legacy_doc
+from mapped_document import (MappedDocument, IMAGE_FORMATS, mapped, source_path, open_binary, open_pdf, read_image,
+                             with_mapped_source)
+
+# Configure Tesseract path (adjust based on your installation)
+TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+def _configure_tesseract(module):
+    module.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+# OCR and document backends are imported on first use rather than at startup
+pytesseract = lazy_module('pytesseract', on_load=_configure_tesseract)
+cv2 = lazy_module('cv2')
+np = lazy_module('numpy')
+Image = lazy_module('PIL.Image')
+docx = lazy_module('docx')
+PyPDF2 = lazy_module('PyPDF2')
+pdfplumber = lazy_module('pdfplumber')
+fitz = lazy_module('fitz')  # PyMuPDF for better PDF handling
+docx2txt = lazy_module('docx2txt.docx2txt')
+mammoth = lazy_module('mammoth')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# orjson-backed jsonify (stdlib fallback); large JSON responses are gzip/brotli compressed
+app.json = FastJSONProvider(app)
 CORS(app, origins=['http://localhost:5173', 'http://127.0.0.1:5173', 'http://localhost:5000'])
 
-# Configure Tesseract path (adjust based on your installation)
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+@app.after_request
+def compress_json_response(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
 
 # Enhanced Job Recommender using Gemini only
 class EnhancedJobRecommender:
@@ -45,9 +73,11 @@ class EnhancedJobRecommender:
     def __init__(self):
         # Initialize Gemini recommender with better error handling
         try:
-            self.gemini_recommender = GeminiJobRecommender()
-            self.gemini_available = self.gemini_recommender.gemini_available
-            if self.gemini_available:
+            # Under gunicorn the shared recommender connects in each worker after fork
+            self.gemini_recommender = GeminiJobRecommender(defer_connect=os.getenv('GEMINI_CONNECT_AFTER_FORK', '0') == '1')
+            if self.gemini_recommender.initializing:
+                logger.info("⏳ Gemini job recommender connecting in the background, using fallback until ready")
+            elif self.gemini_available:
                 logger.info("✓ Gemini job recommender initialized successfully")
             else:
                 logger.info("⚠ Gemini not available, using fallback recommendations")
@@ -56,18 +86,21 @@ class EnhancedJobRecommender:
             logger.error(f"✗ Failed to import GeminiJobRecommender: {e}")
             logger.error("Make sure gemini_job_recommender.py is in the same directory")
             self.gemini_recommender = None
-            self.gemini_available = False
         except Exception as e:
             logger.error(f"✗ Failed to initialize Gemini: {e}")
             self.gemini_recommender = None
-            self.gemini_available = False
 
         # Placeholder for learning paths (to be populated by Gemini or fallback)
         self.learning_paths = {}
 
+    @property
+    def gemini_available(self) -> bool:
+        # Read through: the recommender connects in the background after startup
+        return bool(self.gemini_recommender and self.gemini_recommender.gemini_available)
+
     def recommend_jobs(self, skills: List[str], sectors: List[str] = None, top_k: int = 10) -> Dict[str, Any]:
         """
-        Get job recommendations using Gemini API with fallback support
+        Get job recommendations: ranked locally, re-ranked by Gemini when it is available and needed
         """
         if not skills:
             return {
@@ -75,25 +108,23 @@ class EnhancedJobRecommender:
                 "error": "No skills provided",
                 "source": "Enhanced Recommender"
             }
-        # Primary: Try Gemini API
+        # Primary: local ranking, re-ranked by Gemini when the recommender decides it is needed
         if self.gemini_available and self.gemini_recommender:
             try:
-                logger.info(f"Using Gemini API for job recommendations ({len(skills)} skills)")
                 gemini_result = self.gemini_recommender.get_job_recommendations(skills, top_k=top_k)
                 if gemini_result.get("success"):
-                    enhanced_result = self._enhance_with_sectors(gemini_result, sectors)
-                    enhanced_result["primary_source"] = "Google Gemini"
-                    return enhanced_result
+                    return self._enhance_with_sectors(gemini_result, sectors)
                 else:
                     logger.warning("Gemini API failed, falling back to built-in recommendations")
             except Exception as e:
                 logger.error(f"Gemini API error: {e}")
         # Fallback
-        logger.info("Using built-in fallback recommendations")
+        return self.fallback_recommendations(skills, top_k)
+
+    def fallback_recommendations(self, skills: List[str], top_k: int = 10) -> Dict[str, Any]:
+        """Recommendations from the local ranking model, without calling Gemini"""
         if self.gemini_recommender:
-            fallback_result = self.gemini_recommender._create_comprehensive_fallback(skills, top_k)
-            fallback_result["primary_source"] = "Built-in Fallback"
-            return fallback_result
+            return self.gemini_recommender.local_recommendations(skills, top_k)
         else:
             return self._create_basic_fallback(skills, top_k)
 
@@ -106,6 +137,21 @@ class EnhancedJobRecommender:
             all_skills.extend(context_skills)
         return self.recommend_jobs(all_skills, top_k=top_k)
 
+    def get_multi_keyword_recommendations(self, keywords: List[str], context_skills: List[str] = None, top_k: int = 5, batched: bool = False, batch_size: int = None) -> Dict[str, Any]:
+        """Get keyword-specific recommendations for several keywords, fanned out concurrently by Gemini"""
+        if self.gemini_recommender:
+            if batched:
+                return self.gemini_recommender.get_batched_keyword_recommendations(keywords, context_skills, top_k, batch_size)
+            return self.gemini_recommender.get_multi_keyword_recommendations(keywords, context_skills, top_k)
+        unique_keywords = list(dict.fromkeys(kw.strip() for kw in keywords if isinstance(kw, str) and kw.strip()))
+        return {
+            "success": bool(unique_keywords),
+            "results": {kw: self.get_keyword_specific_recommendations(kw, context_skills, top_k) for kw in unique_keywords},
+            "keywords_processed": len(unique_keywords),
+            "gemini_available": False,
+            "analysis_type": "multi_keyword"
+        }
+
     def _generate_learning_path(self, job_title: str, current_skills: str = "") -> Dict[str, Any]:
         """Generate a basic learning path (to be enhanced by Gemini if available)"""
         return {
@@ -124,14 +170,14 @@ class EnhancedJobRecommender:
         jobs_by_sector = {}
         enhanced_jobs = []
         for job in gemini_result.get("job_recommendations", []):
-            sector = job.get("sector", "Other")
+            sector = job.sector or "Other"
             if sector not in jobs_by_sector:
                 jobs_by_sector[sector] = []
             jobs_by_sector[sector].append(job)
             enhanced_jobs.append(job)
 
         if target_sectors:
-            filtered_jobs = [job for job in enhanced_jobs if job.get("sector") in target_sectors]
+            filtered_jobs = [job for job in enhanced_jobs if job.sector in target_sectors]
             enhanced_jobs = filtered_jobs
 
         gemini_result.update({
@@ -145,15 +191,14 @@ class EnhancedJobRecommender:
     def _create_basic_fallback(self, skills: List[str], top_k: int) -> Dict[str, Any]:
         basic_jobs = []
         for i, skill in enumerate(skills[:5]):
-            basic_jobs.append({
-                "title": f"{skill} Specialist",
-                "description": f"Position requiring expertise in {skill}",
-                "relevance_score": 0.8 - (i * 0.05),
-                "required_skills": [skill],
-                "skill_gaps": [],
-                "sector": "Other",
-                "source": "Basic Fallback"
-            })
+            basic_jobs.append(JobRecommendation(
+                title=f"{skill} Specialist",
+                description=f"Position requiring expertise in {skill}",
+                relevance_score=0.8 - (i * 0.05),
+                required_skills=[skill],
+                sector="Other",
+                source="Basic Fallback"
+            ))
         return {
             "success": True,
             "job_recommendations": basic_jobs[:top_k],
@@ -233,165 +278,295 @@ class LocalSkillCategorizer:
             'Communications': 'Social Sciences'
         }
 
-    def categorize_skills(self, skills: List[str]) -> Dict[str, Any]:
+        # Sector keyword lists in priority order: the first sector with a keyword
+        # occurring anywhere in the skill text wins
+        self.sector_keywords = [
+            ('Technology', [
+                'computer', 'software', 'programming', 'web', 'data', 'technology',
+                'digital', 'cyber', 'cloud', 'artificial intelligence', 'machine learning',
+                'react', 'javascript', 'python', 'java', 'html', 'css', 'sql', 'aws',
+                'docker', 'kubernetes', 'git', 'nodejs', 'angular', 'vue'
+            ]),
+            ('Life Sciences', ['biology', 'medical', 'health', 'pharma', 'biotech', 'genetic', 'clinical']),
+            ('Physical Sciences', ['physics', 'chemistry', 'mathematics', 'research', 'scientific', 'laboratory']),
+            ('Business & Management', ['business', 'management', 'finance', 'marketing', 'sales', 'accounting']),
+            ('Education & Training', ['education', 'teaching', 'training', 'academic']),
+            ('Creative & Design', ['design', 'creative', 'art', 'media', 'graphic', 'ux', 'ui']),
+            ('Industrial & Manufacturing', ['manufacturing', 'production', 'industrial', 'engineering']),
+            ('Social Sciences', ['social', 'psychology', 'human resources', 'communication'])
+        ]
+        self.classifier = SectorClassifier(self.sector_mapping, self.sector_keywords)
+
+    def categorize_skills(self, skills: List[str], columnar: bool = False) -> Dict[str, Any]:
+        """Categorize skills, classifying each distinct skill once.
+
+        With columnar=True the result carries parallel skill/sector/category/confidence arrays
+        instead of one dict per skill, which keeps bulk-import payloads small.
+        """
         logger.info("Using local skill categorization")
-        categorized_skills = []
-        sectors_found = set()
-        for skill in skills:
-            categorized_skill = self._categorize_single_skill(skill)
-            categorized_skills.append(categorized_skill)
-            sectors_found.add(categorized_skill['sector'])
-        return {
+        # Items that aren't strings (a stray object in a JSON array) are skipped; spellings that
+        # normalize alike ("Python", " python") are one skill, named by the first
+        skills = [skill for skill in skills if isinstance(skill, str)]
+        keys = [self.classifier.normalize(skill) for skill in skills]
+        first_spelling = {}
+        for key, skill in zip(keys, skills):
+            first_spelling.setdefault(key, skill.strip())
+        unique_skills = list(first_spelling.values())
+        unique_sectors = self.classifier.classify_batch(unique_skills)
+        # Both formats come from the same records; duplicates share one
+        categorized_by_key = {key: self._build_categorized_skill(first_spelling[key], sector) for key, sector in zip(first_spelling, unique_sectors)}
+        categorized = [categorized_by_key[key] for key in keys]
+        result = {
             'success': True,
-            'categorized_skills': categorized_skills,
             'total_skills_processed': len(skills),
-            'skills_categorized': len(categorized_skills),
+            'unique_skills': len(unique_skills),
             'source': 'Local',
-            'sectors_found': list(sectors_found)
+            'sectors_found': list(set(unique_sectors)),
+            'skills_categorized': len(skills)
         }
+        if columnar:
+            result.update({
+                'format': 'columnar',
+                'skills': [record.skill_name for record in categorized],
+                'sectors': [record.sector for record in categorized],
+                'categories': [record.category for record in categorized],
+                'confidence': [record.confidence for record in categorized]
+            })
+        else:
+            result['categorized_skills'] = categorized
+        return result
 
-    def _categorize_single_skill(self, skill: str) -> Dict:
-        sector = self._determine_sector(skill, skill)
-        return {
-            'skill_name': skill,
-            'skill_id': '',
-            'normalized_name': skill,
-            'category': 'General',
-            'subcategory': '',
-            'sector': sector,
-            'skill_type': '',
-            'confidence': 0.8,
-            'source': 'Local',
-            'related_jobs': []
-        }
+    def _categorize_single_skill(self, skill: str) -> CategorizedSkill:
+        return self._build_categorized_skill(skill, self.classifier.classify(skill))
 
-    def _determine_sector(self, category: str, subcategory: str = '') -> str:
-        combined_text = f"{category} {subcategory}".lower()
-        if any(keyword in combined_text for keyword in [
-            'computer', 'software', 'programming', 'web', 'data', 'technology', 
-            'digital', 'cyber', 'cloud', 'artificial intelligence', 'machine learning',
-            'react', 'javascript', 'python', 'java', 'html', 'css', 'sql', 'aws',
-            'docker', 'kubernetes', 'git', 'nodejs', 'angular', 'vue'
-        ]):
-            return 'Technology'
-        elif any(keyword in combined_text for keyword in [
-            'biology', 'medical', 'health', 'pharma', 'biotech', 'genetic', 'clinical'
-        ]):
-            return 'Life Sciences'
-        elif any(keyword in combined_text for keyword in [
-            'physics', 'chemistry', 'mathematics', 'research', 'scientific', 'laboratory'
-        ]):
-            return 'Physical Sciences'
-        elif any(keyword in combined_text for keyword in [
-            'business', 'management', 'finance', 'marketing', 'sales', 'accounting'
-        ]):
-            return 'Business & Management'
-        elif any(keyword in combined_text for keyword in [
-            'education', 'teaching', 'training', 'academic'
-        ]):
-            return 'Education & Training'
-        elif any(keyword in combined_text for keyword in [
-            'design', 'creative', 'art', 'media', 'graphic', 'ux', 'ui'
-        ]):
-            return 'Creative & Design'
-        elif any(keyword in combined_text for keyword in [
-            'manufacturing', 'production', 'industrial', 'engineering'
-        ]):
-            return 'Industrial & Manufacturing'
-        elif any(keyword in combined_text for keyword in [
-            'social', 'psychology', 'human resources', 'communication'
-        ]):
-            return 'Social Sciences'
-        else:
-            return 'Other'
+    def _build_categorized_skill(self, skill: str, sector: str) -> CategorizedSkill:
+        return CategorizedSkill(skill_name=skill, normalized_name=skill, sector=sector)
 
-# KeywordExtractor (unchanged from original)
+    def _determine_sector(self, category: str, subcategory: str = '') -> str:
+        return self.classifier.classify(f"{category} {subcategory}")
+
+class SectorClassifier:
+    """Aho-Corasick automaton over the sector keywords, compiled once.
+
+    Exact sector_mapping names (e.g. 'Statistics', 'Human Resources') resolve directly;
+    otherwise every keyword is matched as a substring in a single pass over the text and
+    the match from the highest-priority sector wins. Results are kept in an LRU cache keyed by normalized skill.
+    """
+    def __init__(self, sector_mapping: Dict[str, str], sector_keywords: List[tuple], default_sector: str = 'Other', cache_limit: int = 50000):
+        self.default_sector = default_sector
+        self.cache_limit = cache_limit
+        self.exact_sectors = {name.lower(): sector for name, sector in sector_mapping.items()}
+        self.sectors = [sector for sector, _ in sector_keywords]
+        self._no_match = len(self.sectors)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._build_automaton(sector_keywords)
+
+    def _build_automaton(self, sector_keywords: List[tuple]):
+        # goto[state] maps a character to the next state; best[state] is the best (lowest)
+        # sector priority of any keyword ending at this state, including via fail links
+        self._goto = [{}]
+        self._fail = [0]
+        self._best = [self._no_match]
+        for priority, (_, keywords) in enumerate(sector_keywords):
+            for keyword in keywords:
+                state = 0
+                for char in keyword.lower():
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._best.append(self._no_match)
+                        self._goto[state][char] = next_state
+                    state = next_state
+                self._best[state] = min(self._best[state], priority)
+
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                fallback = self._goto[fail_state].get(char, 0)
+                self._fail[next_state] = fallback if fallback != next_state else 0
+                self._best[next_state] = min(self._best[next_state], self._best[self._fail[next_state]])
+                queue.append(next_state)
+
+    def normalize(self, skill) -> str:
+        return ' '.join(str(skill).lower().split())
+
+    def classify(self, skill) -> str:
+        return self.classify_batch([skill])[0]
+
+    def classify_batch(self, skills: List[str]) -> List[str]:
+        """Classify many skills: cached ones by lookup, the rest in one automaton pass"""
+        normalized = [self.normalize(skill) for skill in skills]
+        found = {}
+        pending = []
+        with self._cache_lock:
+            for text in dict.fromkeys(normalized):
+                sector = self.exact_sectors.get(text) or self._cache.get(text)
+                if sector is None:
+                    pending.append(text)
+                else:
+                    found[text] = sector
+                    if text in self._cache:
+                        self._cache.move_to_end(text)
+        if pending:
+            scanned = self._scan(pending)
+            found.update(zip(pending, scanned))
+            with self._cache_lock:
+                for text, sector in zip(pending, scanned):
+                    self._cache[text] = sector
+                while len(self._cache) > self.cache_limit:
+                    self._cache.popitem(last=False)
+        return [found[text] for text in normalized]
+
+    def _scan(self, texts: List[str]) -> List[str]:
+        # '\n' never occurs in a normalized skill or keyword, so it resets the automaton
+        # between skills and lets the whole batch go through one loop
+        goto, fail, best = self._goto, self._fail, self._best
+        results = []
+        state = 0
+        current = self._no_match
+        for char in '\n'.join(texts) + '\n':
+            if char == '\n':
+                results.append(self.sectors[current] if current < self._no_match else self.default_sector)
+                state = 0
+                current = self._no_match
+                continue
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best[state] < current:
+                current = best[state]
+        return results
+
+# KeywordExtractor
 class KeywordExtractor:
-    def __init__(self):
-        self.programming_languages = [
-            r'\b(?:JavaScript|TypeScript|Python|Java|C\+\+|C#|PHP|Ruby|Go|Rust|Swift|Kotlin|Scala|R|MATLAB|Perl|Dart|Elixir|Haskell)\b',
-            r'\b(?:HTML|CSS|SQL|NoSQL|GraphQL|XML|JSON|YAML)\b',
-            r'\b(?:React(?:\.js)?|Angular(?:\.js)?|Vue(?:\.js)?|Svelte|Next\.js|Nuxt\.js|Gatsby)\b',
-            r'\b(?:Node\.js|Express\.js|Django|Flask|Laravel|Spring|ASP\.NET|Rails)\b'
-        ]
-        self.frameworks_libraries = [
-            r'\b(?:TensorFlow|PyTorch|Scikit-learn|Pandas|NumPy|OpenCV|Keras|NLTK|SpaCy)\b',
-            r'\b(?:Bootstrap|Tailwind|Material-UI|Ant Design|Chakra UI|Bulma)\b',
-            r'\b(?:jQuery|Lodash|Axios|D3\.js|Three\.js|Chart\.js|Moment\.js)\b',
-            r'\b(?:Redux|MobX|Vuex|Pinia|Context API|Zustand)\b'
-        ]
-        self.databases_tools = [
-            r'\b(?:MongoDB|MySQL|PostgreSQL|SQLite|Redis|Elasticsearch|DynamoDB|Firebase|Supabase)\b',
-            r'\b(?:Docker|Kubernetes|Jenkins|GitHub Actions|GitLab CI|Travis CI|CircleCI)\b',
-            r'\b(?:AWS|Azure|Google Cloud|GCP|Heroku|Vercel|Netlify|DigitalOcean)\b',
-            r'\b(?:Git|SVN|Mercurial|Bitbucket|GitHub|GitLab)\b'
-        ]
-        self.certifications = [
-            r'\b(?:AWS|Amazon Web Services)\s+(?:Certified\s+)?(?:Solutions Architect|Developer|SysOps|Cloud Practitioner|DevOps Engineer|Security|Machine Learning|Data Analytics)\b',
-            r'\b(?:Microsoft|Azure)\s+(?:Certified\s+)?(?:Azure Administrator|Azure Developer|Azure Architect|Azure DevOps|Azure Security|Azure Data|Azure AI)\b',
-            r'\b(?:Google Cloud|GCP)\s+(?:Certified\s+)?(?:Associate Cloud Engineer|Professional Cloud Architect|Professional Data Engineer|Professional Machine Learning)\b',
-            r'\b(?:Cisco)\s+(?:Certified\s+)?(?:CCNA|CCNP|CCIE|CCDA|CCDP|CCSP)\b',
-            r'\b(?:Oracle)\s+(?:Certified\s+)?(?:Associate|Professional|Master|Expert)\b',
-            r'\b(?:CompTIA)\s+(?:A\+|Network\+|Security\+|Cloud\+|Linux\+|Project\+|Server\+)\b',
-            r'\b(?:Scrum Master|Product Owner|CSM|CSPO|PSM|PSPO|SAFe|Agile)\s+(?:Certified|Certification)?\b',
-            r'\b(?:PMP|Project Management Professional|CAPM|Prince2|Six Sigma|Lean)\b'
-        ]
-        self.education_patterns = [
-            r'\b(?:Bachelor|Master|PhD|Doctorate|Associate)\s+(?:of\s+)?(?:Science|Arts|Engineering|Technology|Computer Science|Information Technology|Business|Management)\b',
-            r'\b(?:B\.Tech|M\.Tech|B\.E\.|M\.E\.|B\.S\.|M\.S\.|B\.A\.|M\.A\.|MBA|MCA|BCA)\b',
-            r'\b(?:Computer Science|Information Technology|Software Engineering|Data Science|Machine Learning|Artificial Intelligence)\b'
+    def __init__(self, vocabulary: SkillVocabulary = None):
+        # Skill terms and patterns live in skill_vocabulary.json; edits are picked up without a restart
+        self.vocabulary = vocabulary or SkillVocabulary()
+        # Characters carried from one chunk to the next when streaming: 50 of left
+        # context, room for the longest pattern match, and 50 of right context
+        self.context_window = 50
+        self.stream_overlap = 200
+        # Confidence cue words and their bonus; matched as substrings, like calculate_confidence
+        self.confidence_cues = [
+            (0.15, ['certified', 'certification', 'certificate', 'diploma', 'degree']),
+            (0.1, ['experience', 'skilled', 'proficient', 'expert', 'years']),
+            (0.05, ['project', 'developed', 'built', 'created', 'implemented'])
         ]
-        self.methodologies = [
-            r'\b(?:Agile|Scrum|Kanban|DevOps|CI/CD|TDD|BDD|Microservices|RESTful|GraphQL)\b',
-            r'\b(?:Machine Learning|Deep Learning|Data Science|Big Data|Analytics|Statistics|NLP|Computer Vision)\b',
-            r'\b(?:UI/UX|User Experience|User Interface|Design Thinking|Figma|Sketch|Adobe|Photoshop)\b'
-        ]
-        self.all_patterns = {
-            'programming_languages': self.programming_languages,
-            'frameworks_libraries': self.frameworks_libraries,
-            'databases_tools': self.databases_tools,
-            'certifications': self.certifications,
-            'education': self.education_patterns,
-            'methodologies': self.methodologies
-        }
 
-    def extract_keywords(self, text, min_confidence=0.7):
+    def extract_keywords(self, text, min_confidence=0.7, limit=10):
         if not text or not isinstance(text, str):
             return {"success": False, "error": "Invalid or empty text provided"}
-        cleaned_text = self.clean_text_for_extraction(text)
+        return self.extract_keywords_stream([text], min_confidence, limit)
+
+    def extract_keywords_stream(self, chunks, min_confidence=0.7, limit=10, stop_when=None, carry=None):
+        """Extract keywords from an iterable of text chunks (e.g. PDF pages) without joining them.
+
+        Only a short tail of each chunk is carried into the next one, so matches and their
+        context windows work across page boundaries while memory stays bounded by page size.
+        `stop_when(keyword_stats)` is called after each chunk; a truthy return stops reading
+        further chunks and the result is marked "stopped_early".
+        `carry` ({"stats", "offset"}) continues the aggregate of an earlier extraction of the same
+        stream and is updated in place; keywords_by_category only lists this call's matches.
+        """
+        # One vocabulary snapshot per extraction, so a concurrent reload never mixes versions
+        compiled_patterns = self.vocabulary.get().patterns
         found_keywords = {}
-        all_matches = []
-        for category, patterns in self.all_patterns.items():
-            category_matches = []
-            for pattern in patterns:
-                matches = re.finditer(pattern, cleaned_text, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    keyword = match.group().strip()
-                    start = max(0, match.start() - 50)
-                    end = min(len(cleaned_text), match.end() + 50)
-                    context = cleaned_text[start:end].strip()
-                    match_info = {
-                        'keyword': keyword,
-                        'category': category,
-                        'context': context,
-                        'position': match.start(),
-                        'confidence': self.calculate_confidence(keyword, context, category)
-                    }
-                    if match_info['confidence'] >= min_confidence:
-                        category_matches.append(match_info)
-                        all_matches.append(match_info)
-            if category_matches:
-                found_keywords[category] = category_matches
-        keyword_counts = Counter([m['keyword'].lower() for m in all_matches])
-        top_keywords = self.get_top_keywords(all_matches, keyword_counts)
-        return {
+        # keyword (lowercased) -> [keyword, category, frequency, confidence, first_position]
+        keyword_stats = carry["stats"] if carry is not None else {}
+        buffer = ""
+        buffer_offset = carry["offset"] if carry is not None else 0
+        scan_from = 0
+        stopped_early = False
+        for chunk in chunks:
+            cleaned_chunk = self.clean_text_for_extraction(chunk) if chunk else ""
+            if cleaned_chunk:
+                buffer = f"{buffer} {cleaned_chunk}" if buffer else cleaned_chunk
+                scan_to = len(buffer) - self.stream_overlap
+                if scan_to > scan_from:
+                    self._scan_buffer(compiled_patterns, buffer, scan_from, scan_to, buffer_offset, min_confidence, found_keywords, keyword_stats)
+                    keep_from = max(0, scan_to - self.context_window)
+                    buffer = buffer[keep_from:]
+                    buffer_offset += keep_from
+                    scan_from = scan_to - keep_from
+            if stop_when is not None and stop_when(keyword_stats):
+                stopped_early = True
+                break
+        if buffer:
+            self._scan_buffer(compiled_patterns, buffer, scan_from, len(buffer), buffer_offset, min_confidence, found_keywords, keyword_stats)
+        if carry is not None:
+            # Positions in a continuation start past everything scanned so far
+            carry["offset"] = buffer_offset + len(buffer) + 1
+
+        result = {
             "success": True,
             "keywords_by_category": found_keywords,
-            "top_keywords": top_keywords,
-            "total_keywords_found": len(all_matches),
-            "unique_keywords": len(set([m['keyword'].lower() for m in all_matches])),
+            "top_keywords": self._select_top_keywords(keyword_stats, limit),
+            "total_keywords_found": sum(stats[2] for stats in keyword_stats.values()),
+            "unique_keywords": len(keyword_stats),
             "categories_found": list(found_keywords.keys())
         }
+        if stop_when is not None:
+            result["stopped_early"] = stopped_early
+        return result
+
+    def _scan_buffer(self, compiled_patterns, buffer, scan_from, scan_to, buffer_offset, min_confidence, found_keywords, keyword_stats):
+        """Record matches starting in buffer[scan_from:scan_to]; the rest of the buffer is context"""
+        cue_index = self._build_cue_index(buffer)
+        for category, patterns in compiled_patterns.items():
+            category_matches = found_keywords.get(category, [])
+            for pattern in patterns:
+                # finditer's pos keeps \b aware of the character before scan_from
+                for match in pattern.finditer(buffer, scan_from):
+                    if match.start() >= scan_to:
+                        break
+                    start = max(0, match.start() - self.context_window)
+                    end = min(len(buffer), match.end() + self.context_window)
+                    confidence = self._confidence_from_cues(cue_index, start, end)
+                    if confidence < min_confidence:
+                        continue
+                    # Context is only sliced for matches that are kept
+                    keyword = match.group().strip()
+                    position = buffer_offset + match.start()
+                    category_matches.append(KeywordMatch(keyword, category, buffer[start:end].strip(), position, confidence))
+                    self._record_keyword(keyword_stats, keyword, category, confidence, position)
+            if category_matches:
+                found_keywords[category] = category_matches
+
+    def _build_cue_index(self, text):
+        """Start and end offsets of every confidence cue in text, one sorted list per cue group"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few characters lowercase to several; keep offsets aligned with text
+            lowered = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        cue_index = []
+        for bonus, words in self.confidence_cues:
+            cues = []
+            for word in words:
+                position = lowered.find(word)
+                while position != -1:
+                    cues.append((position, position + len(word)))
+                    position = lowered.find(word, position + 1)
+            cues.sort()
+            cue_index.append((bonus, cues))
+        return cue_index
+
+    def _confidence_from_cues(self, cue_index, start, end):
+        """Same score as calculate_confidence for the context text[start:end], from the cue index"""
+        confidence = 0.8
+        for bonus, cues in cue_index:
+            i = bisect_left(cues, (start,))
+            while i < len(cues) and cues[i][0] < end:
+                if cues[i][1] <= end:
+                    confidence += bonus
+                    break
+                i += 1
+        return min(confidence, 1.0)
 
     def clean_text_for_extraction(self, text):
         text = re.sub(r'\s+', ' ', text)
@@ -409,23 +584,98 @@ class KeywordExtractor:
             confidence += 0.05
         return min(confidence, 1.0)
 
-    def get_top_keywords(self, all_matches, keyword_counts, limit=10):
-        keyword_scores = {}
+    def get_top_keywords(self, all_matches, keyword_counts=None, limit=10):
+        keyword_stats = {}
         for match in all_matches:
-            keyword_lower = match['keyword'].lower()
-            frequency = keyword_counts[keyword_lower]
-            confidence = match['confidence']
-            score = frequency * 0.6 + confidence * 0.4
-            if keyword_lower not in keyword_scores or score > keyword_scores[keyword_lower]['score']:
-                keyword_scores[keyword_lower] = {
-                    'keyword': match['keyword'],
-                    'category': match['category'],
-                    'frequency': frequency,
-                    'confidence': confidence,
-                    'score': score
-                }
-        sorted_keywords = sorted(keyword_scores.values(), key=lambda x: x['score'], reverse=True)
-        return sorted_keywords[:limit]
+            self._record_keyword(keyword_stats, match.keyword, match.category, match.confidence, match.position)
+        return self._select_top_keywords(keyword_stats, limit)
+
+    def _record_keyword(self, keyword_stats, keyword, category, confidence, position):
+        """Fold one match into the per-keyword aggregate; the first highest-confidence match names it
+        and the earliest match gives its position"""
+        keyword_lower = keyword.lower()
+        stats = keyword_stats.get(keyword_lower)
+        if stats is None:
+            keyword_stats[keyword_lower] = [keyword, category, 1, confidence, position]
+            return
+        stats[2] += 1
+        if confidence > stats[3]:
+            stats[0] = keyword
+            stats[1] = category
+            stats[3] = confidence
+        # Matches arrive in category order, not text order
+        stats[4] = min(stats[4], position)
+
+    def _select_top_keywords(self, keyword_stats, limit=10):
+        """Heap-select the `limit` best keywords by frequency * 0.6 + confidence * 0.4"""
+        top = heapq.nlargest(limit, keyword_stats.values(), key=lambda stats: stats[2] * 0.6 + stats[3] * 0.4)
+        return [
+            TopKeyword(keyword, category, frequency, confidence, frequency * 0.6 + confidence * 0.4, first_position)
+            for keyword, category, frequency, confidence, first_position in top
+        ]
+
+class AnalysisBudget:
+    """Early-exit policy for budgeted analysis of long documents.
+
+    Stops after `max_pages` pages, or once at least `min_unique_skills` distinct keywords
+    have been seen and the top-`top_k` keyword set has not changed for `stable_pages`
+    consecutive pages. One instance per request: it tracks pages read and the last top-k.
+    """
+
+    def __init__(self, max_pages=None, top_k=10, stable_pages=2, min_unique_skills=None):
+        self.max_pages = max_pages
+        self.top_k = top_k
+        self.stable_pages = stable_pages
+        self.min_unique_skills = min_unique_skills if min_unique_skills is not None else top_k
+        self.pages_read = 0
+        self.stop_reason = None
+        self._last_top = None
+        self._unchanged_pages = 0
+
+    @classmethod
+    def from_request(cls, budget):
+        """Build from a request's 'budget' object (or JSON string); None when no budget was asked for"""
+        if budget in (None, '', False):
+            return None
+        if isinstance(budget, str):
+            budget = json.loads(budget)
+        if budget is True:
+            budget = {}
+        if not isinstance(budget, dict):
+            raise ValueError("budget must be an object")
+        options = {}
+        for key in ('max_pages', 'top_k', 'stable_pages', 'min_unique_skills'):
+            if budget.get(key) is not None:
+                value = budget[key]
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    raise ValueError(f"budget.{key} must be a positive integer")
+                options[key] = value
+        return cls(**options)
+
+    def __call__(self, keyword_stats):
+        self.pages_read += 1
+        if self.max_pages is not None and self.pages_read >= self.max_pages:
+            self.stop_reason = "max_pages"
+            return True
+        if len(keyword_stats) < self.min_unique_skills:
+            return False
+        top = frozenset(heapq.nlargest(self.top_k, keyword_stats, key=lambda k: keyword_stats[k][2] * 0.6 + keyword_stats[k][3] * 0.4))
+        self._unchanged_pages = self._unchanged_pages + 1 if top == self._last_top else 0
+        self._last_top = top
+        if self._unchanged_pages >= self.stable_pages:
+            self.stop_reason = "stable_top_keywords"
+            return True
+        return False
+
+    def describe(self):
+        return {
+            "pages_read": self.pages_read,
+            "stop_reason": self.stop_reason,
+            "max_pages": self.max_pages,
+            "top_k": self.top_k,
+            "stable_pages": self.stable_pages
+        }
+
 
 # Updated DocumentProcessor
 class DocumentProcessor:
@@ -436,13 +686,22 @@ class DocumentProcessor:
         self.keyword_extractor = KeywordExtractor()
         self.skill_categorizer = LocalSkillCategorizer()
         self.job_recommender = EnhancedJobRecommender()
+        self.ocr_router = OCRLanguageRouter()
+        self.image_triage = ImageTriage()
+        # CPU-bound extraction and I/O-bound recommendation run on separate bounded executors
+        self.executors = StageExecutors.from_env(extraction_initializer=_init_extraction_process)
 
     def validate_file(self, file_path, file_type=None):
+        # Mapped documents with recognized content were dispatched on it, whatever their name says
+        content_format = file_path.format if isinstance(file_path, MappedDocument) else None
+        file_path = source_path(file_path)
         if not os.path.exists(file_path):
             return {"success": False, "error": "File not found"}
         file_size = os.path.getsize(file_path)
         if file_size > self.max_file_size:
             return {"success": False, "error": "File size exceeds 10MB limit"}
+        if content_format is not None:
+            return {"success": True}
         file_ext = Path(file_path).suffix.lower()
         if file_type == 'image' and file_ext not in self.supported_image_formats:
             return {"success": False, "error": f"Unsupported image format: {file_ext}"}
@@ -452,9 +711,11 @@ class DocumentProcessor:
 
     def preprocess_image(self, image_path):
         try:
-            image = cv2.imread(image_path)
+            image = read_image(image_path, cv2.IMREAD_COLOR)
             if image is None:
-                pil_image = Image.open(image_path)
+                with open_binary(image_path) as stream:
+                    pil_image = Image.open(stream)
+                    pil_image.load()
                 image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -466,46 +727,81 @@ class DocumentProcessor:
         except Exception as e:
             logger.error(f"Error preprocessing image: {str(e)}")
             try:
-                return cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                return read_image(image_path, cv2.IMREAD_GRAYSCALE)
             except Exception:
                 return None
 
-    def extract_text_from_image(self, image_path, lang='eng', preprocessing=True, custom_config=None, extract_keywords=True, categorize_skills=True, recommend_jobs=True):
+    @with_mapped_source
+    def extract_text_from_image(self, image_path, lang='auto', preprocessing=True, custom_config=None, extract_keywords=True, categorize_skills=True, recommend_jobs=True, layout=True, fast_path=True):
         try:
             validation = self.validate_file(image_path, 'image')
             if not validation["success"]:
                 return validation
+
+            # Cheap thumbnail/metadata check first: blank pages, photos and logos skip OCR,
+            # images with a little text get a single plain pass
+            triage = self.image_triage.classify(image_path) if fast_path else None
+            fast_path_info = {key: triage[key] for key in ("action", "reason", "seconds", "stats")} if triage else None
+            if triage and triage["action"] == ACTION_EMBEDDED:
+                text = self.clean_extracted_text(triage["text"])
+                result = {
+                    "success": True,
+                    "text": text,
+                    "confidence": None,
+                    "word_count": len(text.split()) if text else 0,
+                    "char_count": len(text),
+                    "language": None,
+                    "extraction_type": "embedded_metadata",
+                    "fast_path": fast_path_info
+                }
+                if text and extract_keywords:
+                    result = self._add_analysis_results(result, text, categorize_skills, recommend_jobs)
+                return result
+            if triage and triage["action"] == ACTION_SKIP:
+                return {
+                    "success": True,
+                    "text": "",
+                    "confidence": 0,
+                    "word_count": 0,
+                    "char_count": 0,
+                    "language": None,
+                    "extraction_type": "ocr_skipped",
+                    "fast_path": fast_path_info
+                }
+            downgraded = bool(triage and triage["action"] == ACTION_DOWNGRADE)
+
             if preprocessing:
                 processed_image = self.preprocess_image(image_path)
                 if processed_image is None:
                     return {"success": False, "error": "Failed to preprocess image"}
             else:
-                processed_image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+                processed_image = read_image(image_path, cv2.IMREAD_GRAYSCALE)
                 if processed_image is None:
                     return {"success": False, "error": "Failed to load image"}
 
             if custom_config is None:
                 custom_config = r'--oem 3 --psm 6'
 
-            extracted_text = pytesseract.image_to_string(processed_image, lang=lang, config=custom_config)
-            try:
-                data = pytesseract.image_to_data(processed_image, lang=lang, config=custom_config, output_type=pytesseract.Output.DICT)
-                confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-            except Exception as e:
-                logger.warning(f"Could not get confidence scores: {str(e)}")
-                avg_confidence = 0
+            # 'auto' detects the script first and OCRs with only the languages the page needs;
+            # layout splits multi-column pages into blocks OCR'd in parallel, in reading order
+            ocr_result = self.ocr_router.run(processed_image, lang=lang, config=custom_config, layout=layout and not downgraded, with_confidence=not downgraded)
 
-            text = extracted_text.strip()
+            text = ocr_result["text"].strip()
             result = {
                 "success": True,
                 "text": text,
-                "confidence": round(avg_confidence, 2),
+                "confidence": round(ocr_result["confidence"], 2),
                 "word_count": len(text.split()) if text else 0,
                 "char_count": len(text),
-                "language": lang,
+                "language": ocr_result["language"],
                 "extraction_type": "ocr"
             }
+            if "language_detection" in ocr_result:
+                result["language_detection"] = ocr_result["language_detection"]
+            if "layout" in ocr_result:
+                result["layout"] = ocr_result["layout"]
+            if fast_path_info:
+                result["fast_path"] = fast_path_info
 
             if text and extract_keywords:
                 result = self._add_analysis_results(result, text, categorize_skills, recommend_jobs)
@@ -514,6 +810,7 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from image: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    @with_mapped_source
     def extract_text_from_pdf(self, pdf_path, extract_keywords=True, categorize_skills=True, recommend_jobs=True):
         try:
             validation = self.validate_file(pdf_path, 'document')
@@ -525,7 +822,7 @@ class DocumentProcessor:
             method_used = "unknown"
 
             try:
-                doc = fitz.open(pdf_path)
+                doc = open_pdf(pdf_path)
                 page_count = len(doc)
                 text_parts = []
                 for page_num in range(page_count):
@@ -539,7 +836,7 @@ class DocumentProcessor:
             except Exception as e:
                 logger.warning(f"PyMuPDF failed, trying pdfplumber: {str(e)}")
                 try:
-                    with pdfplumber.open(pdf_path) as pdf:
+                    with open_binary(pdf_path) as stream, pdfplumber.open(stream) as pdf:
                         page_count = len(pdf.pages)
                         text_parts = []
                         for i, page in enumerate(pdf.pages):
@@ -551,7 +848,7 @@ class DocumentProcessor:
                 except Exception as e2:
                     logger.warning(f"pdfplumber failed, trying PyPDF2: {str(e2)}")
                     try:
-                        with open(pdf_path, 'rb') as file:
+                        with open_binary(pdf_path) as file:
                             pdf_reader = PyPDF2.PdfReader(file)
                             page_count = len(pdf_reader.pages)
                             text_parts = []
@@ -582,6 +879,7 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    @with_mapped_source
     def extract_text_from_docx(self, docx_path, extract_keywords=True, categorize_skills=True, recommend_jobs=True):
         try:
             validation = self.validate_file(docx_path, 'document')
@@ -592,19 +890,21 @@ class DocumentProcessor:
             method_used = "unknown"
 
             try:
-                with open(docx_path, "rb") as docx_file:
+                with open_binary(docx_path) as docx_file:
                     result = mammoth.extract_raw_text(docx_file)
                     text_content = result.value
                     method_used = "mammoth"
             except Exception as e:
                 logger.warning(f"Mammoth failed, trying docx2txt: {str(e)}")
                 try:
-                    text_content = docx2txt.process(docx_path)
+                    with open_binary(docx_path) as docx_file:
+                        text_content = docx2txt.process(docx_file)
                     method_used = "docx2txt"
                 except Exception as e2:
                     logger.warning(f"docx2txt failed, trying python-docx: {str(e2)}")
                     try:
-                        doc = docx.Document(docx_path)
+                        with open_binary(docx_path) as docx_file:
+                            doc = docx.Document(docx_file)
                         paragraphs = []
                         for paragraph in doc.paragraphs:
                             if paragraph.text.strip():
@@ -631,6 +931,7 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from DOCX: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    @with_mapped_source
     def extract_text_from_doc(self, doc_path, extract_keywords=True, categorize_skills=True, recommend_jobs=True):
         try:
             validation = self.validate_file(doc_path, 'document')
@@ -638,14 +939,21 @@ class DocumentProcessor:
                 return validation
 
             try:
-                text_content = docx2txt.process(doc_path)
+                if isinstance(doc_path, MappedDocument) and doc_path.format == "ole":
+                    # Binary Word 97-2003: read the text from the compound file directly
+                    text_content = legacy_doc.extract_text(doc_path.buffer)
+                    method_used = "binary-doc"
+                else:
+                    with open_binary(doc_path) as doc_file:
+                        text_content = docx2txt.process(doc_file)
+                    method_used = "docx2txt"
                 text_content = self.clean_extracted_text(text_content)
                 result = {
                     "success": True,
                     "text": text_content,
                     "word_count": len(text_content.split()) if text_content else 0,
                     "char_count": len(text_content),
-                    "extraction_method": "docx2txt",
+                    "extraction_method": method_used,
                     "extraction_type": "doc"
                 }
                 if text_content and extract_keywords:
@@ -660,22 +968,187 @@ class DocumentProcessor:
             logger.error(f"Error extracting text from DOC: {str(e)}")
             return {"success": False, "error": str(e)}
 
-    def _add_analysis_results(self, result, text, categorize_skills, recommend_jobs):
+    def iter_pdf_pages(self, pdf_path, stats=None, start_page=0):
+        """Yield the text of each PDF page in turn (PyMuPDF, then pdfplumber, then PyPDF2).
+
+        The extractor is chosen when the file is opened; `stats` receives the method used
+        and the page count. Pages before `start_page` are skipped without being extracted.
+        """
+        stats = stats if stats is not None else {}
+        try:
+            doc = open_pdf(pdf_path)
+        except Exception as e:
+            logger.warning(f"PyMuPDF failed, trying pdfplumber: {str(e)}")
+            doc = None
+        if doc is not None:
+            stats.update(extraction_method="PyMuPDF", page_count=len(doc))
+            try:
+                for page_num in range(start_page, len(doc)):
+                    yield doc.load_page(page_num).get_text()
+            finally:
+                doc.close()
+            return
+
+        stream = open_binary(pdf_path)
+        try:
+            pdf = pdfplumber.open(stream)
+        except Exception as e:
+            logger.warning(f"pdfplumber failed, trying PyPDF2: {str(e)}")
+            stream.close()
+            pdf = None
+        if pdf is not None:
+            stats.update(extraction_method="pdfplumber", page_count=len(pdf.pages))
+            try:
+                for page in pdf.pages[start_page:]:
+                    yield page.extract_text() or ""
+            finally:
+                pdf.close()
+                stream.close()
+            return
+
+        with open_binary(pdf_path) as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            stats.update(extraction_method="PyPDF2", page_count=len(pdf_reader.pages))
+            for page in pdf_reader.pages[start_page:]:
+                yield page.extract_text() or ""
+
+    @with_mapped_source
+    def extract_keywords_from_pdf_stream(self, pdf_path, categorize_skills=True, recommend_jobs=True, budget=None, start_page=0, carry=None):
+        """Analyze a PDF page by page; the full text is never built, so it is not returned.
+
+        With an AnalysisBudget, reading stops as soon as the budget says so and the result is
+        marked is_partial, with a continuation_token for the remaining pages when there are any.
+        The token carries the keyword aggregate, so a resumed result (started with the `carry`
+        parsed from it) ranks keywords and counts words over every page read so far;
+        keywords_by_category only lists the matches on the pages in its page_range.
+        """
+        try:
+            validation = self.validate_file(pdf_path, 'document')
+            if not validation["success"]:
+                return validation
+
+            stats = {"extraction_method": "unknown", "page_count": 0}
+            carry = carry or {"stats": {}, "offset": 0, "word_count": 0, "char_count": 0}
+            totals = {"word_count": carry["word_count"], "char_count": carry["char_count"], "pages_read": 0}
+
+            def cleaned_pages():
+                for text in self.iter_pdf_pages(pdf_path, stats, start_page=start_page):
+                    totals["pages_read"] += 1
+                    text = self.clean_extracted_text(text)
+                    if text:
+                        totals["word_count"] += len(text.split())
+                        totals["char_count"] += len(text)
+                    # Empty pages are still yielded so a budget counts every page
+                    yield text
+
+            try:
+                keyword_result = self.keyword_extractor.extract_keywords_stream(cleaned_pages(), stop_when=budget, carry=carry)
+            except Exception as e:
+                return {"success": False, "error": f"All PDF extraction methods failed: {str(e)}"}
+
+            result = {
+                "success": True,
+                "word_count": totals["word_count"],
+                "char_count": totals["char_count"],
+                "page_count": stats["page_count"],
+                "extraction_method": stats["extraction_method"],
+                "extraction_type": "pdf",
+                "streamed": True
+            }
+            if budget is not None:
+                next_page = start_page + totals["pages_read"]
+                result["is_partial"] = start_page > 0 or next_page < stats["page_count"]
+                result["page_range"] = [start_page, next_page]
+                result["budget"] = budget.describe()
+                if next_page < stats["page_count"]:
+                    carry.update(word_count=totals["word_count"], char_count=totals["char_count"])
+                    result["continuation_token"] = self.make_continuation_token(pdf_path, next_page, carry)
+                keyword_result.pop("stopped_early", None)
+            if totals["char_count"]:
+                result = self._add_keyword_analysis(result, keyword_result, categorize_skills, recommend_jobs)
+            return result
+        except Exception as e:
+            logger.error(f"Error streaming text from PDF: {str(e)}")
+            return {"success": False, "error": str(e)}
+
+    def make_continuation_token(self, file_path, next_page, carry):
+        """Opaque token to resume budgeted analysis of the same document at next_page, carrying
+        the keyword aggregate and word counts of the pages read so far"""
+        payload = json.dumps({
+            "v": 2,
+            "page": next_page,
+            "doc": self._document_fingerprint(file_path),
+            "kw": list(carry["stats"].values()),
+            "offset": carry["offset"],
+            "words": carry["word_count"],
+            "chars": carry["char_count"]
+        }, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def parse_continuation_token(self, file_path, token):
+        """(start page, carried aggregate) from a continuation token; ValueError if it is malformed
+        or for another document"""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8'))
+            page = payload["page"]
+            fingerprint = payload["doc"]
+            counts = [payload["offset"], payload["words"], payload["chars"]]
+            keyword_stats = {}
+            for keyword, category, frequency, confidence, position in payload["kw"]:
+                if not (isinstance(keyword, str) and isinstance(category, str) and isinstance(confidence, (int, float))):
+                    raise ValueError
+                counts += [frequency, position]
+                keyword_stats[keyword.lower()] = [keyword, category, frequency, confidence, position]
+        except Exception:
+            raise ValueError("Invalid continuation_token")
+        if fingerprint != self._document_fingerprint(file_path):
+            raise ValueError("continuation_token does not match this document")
+        if not all(isinstance(value, int) and not isinstance(value, bool) and value >= 0 for value in [page] + counts):
+            raise ValueError("Invalid continuation_token")
+        carry = {"stats": keyword_stats, "offset": payload["offset"], "word_count": payload["words"], "char_count": payload["chars"]}
+        return page, carry
+
+    def _document_fingerprint(self, file_path):
+        # Size plus a hash of the first 64KB: cheap, and stable across re-uploads of the same file
+        digest = hashlib.sha256()
+        with mapped(file_path) as document:
+            digest.update(document.buffer[:64 * 1024])
+            return f"{document.size}-{digest.hexdigest()[:16]}"
+
+    def _add_analysis_results(self, result, text, categorize_skills, recommend_jobs, degraded=False):
         keyword_result = self.keyword_extractor.extract_keywords(text)
+        return self._add_keyword_analysis(result, keyword_result, categorize_skills, recommend_jobs, degraded)
+
+    def _add_keyword_analysis(self, result, keyword_result, categorize_skills, recommend_jobs, degraded=False):
         if keyword_result["success"]:
             result["keywords"] = keyword_result
-            skills = [kw['keyword'] for kw in keyword_result.get('top_keywords', [])]
+            skills = [kw.keyword for kw in keyword_result.get('top_keywords', [])]
             if categorize_skills and skills:
-                skill_categorization = self.skill_categorizer.categorize_skills(skills)
-                result["skill_categorization"] = skill_categorization
-                sectors = skill_categorization.get('sectors_found', [])
-            else:
-                sectors = []
-            if recommend_jobs and skills:
-                job_recommendations = self.job_recommender.recommend_jobs(skills, sectors)
-                result["job_recommendations"] = job_recommendations
+                result["skill_categorization"] = self.skill_categorizer.categorize_skills(skills)
+            if recommend_jobs:
+                result = self._add_job_recommendations(result, degraded)
+        return result
+
+    def _add_job_recommendations(self, result, degraded=False):
+        skills = [kw.keyword for kw in result.get("keywords", {}).get('top_keywords', [])]
+        if skills:
+            sectors = result.get("skill_categorization", {}).get('sectors_found', [])
+            result["job_recommendations"] = self.recommend_jobs_for(skills, sectors, degraded=degraded)
+            if degraded:
+                result["degraded"] = True
         return result
 
+    def recommend_jobs_for(self, skills, sectors=None, degraded=False):
+        """Job recommendations on the recommendation executor; the local ranking alone when it is
+        saturated, or straight away when the service is degraded under load"""
+        if degraded:
+            return self.job_recommender.fallback_recommendations(skills)
+        try:
+            return self.executors.recommendation.run(self.job_recommender.recommend_jobs, skills, sectors)
+        except ExecutorSaturatedError as e:
+            logger.warning(f"{str(e)}; using local ranking only")
+            return self.job_recommender.fallback_recommendations(skills)
+
     def clean_extracted_text(self, text):
         if not text:
             return ""
@@ -683,7 +1156,35 @@ class DocumentProcessor:
         text = re.sub(r' +', ' ', text)
         return text.strip()
 
-    def analyze_document(self, file_path, extract_keywords=True, categorize_skills=True, recommend_jobs=True):
+    def analyze_document(self, file_path, extract_keywords=True, categorize_skills=True, recommend_jobs=True, stream=False, lang='auto', layout=True, fast_path=True, budget=None, continuation_token=None, degraded=False):
+        """Extraction (text, keywords, skill categories) on the extraction executor, then job
+        recommendations on the recommendation executor (built-in ones when degraded)"""
+        options = dict(extract_keywords=extract_keywords, categorize_skills=categorize_skills, stream=stream, lang=lang,
+                       layout=layout, fast_path=fast_path, budget=budget, continuation_token=continuation_token)
+        try:
+            if self.executors.extraction.in_process:
+                result, metrics = self.executors.extraction.run(_extract_in_process, file_path, options)
+                self.ocr_router.merge_metrics(metrics["ocr"])
+                self.image_triage.merge_metrics(metrics["fast_path"])
+            else:
+                result = self.executors.extraction.run(self.extract_document, file_path, **options)
+        except ExecutorSaturatedError as e:
+            logger.warning(str(e))
+            return {"success": False, "error": str(e), "overloaded": True}
+        except Exception as e:
+            logger.error(f"Error analyzing document: {str(e)}")
+            return {"success": False, "error": str(e)}
+        if recommend_jobs and result["success"]:
+            result = self._add_job_recommendations(result, degraded=degraded)
+        return result
+
+    def extract_document(self, file_path, extract_keywords=True, categorize_skills=True, stream=False, lang='auto', layout=True, fast_path=True, budget=None, continuation_token=None):
+        """The CPU-bound stage of analyze_document: everything except job recommendations.
+
+        The file is mapped once and every extractor (and fallback) reads that mapping. The
+        extractor is chosen by what the content is, sniffed from its first bytes; the extension
+        only decides for content that isn't recognized.
+        """
         try:
             if not os.path.exists(file_path):
                 return {"success": False, "error": "File not found"}
@@ -691,20 +1192,42 @@ class DocumentProcessor:
             file_ext = Path(file_path).suffix.lower()
             file_size = os.path.getsize(file_path)
 
-            if file_ext in self.supported_image_formats:
-                result = self.extract_text_from_image(file_path, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=recommend_jobs)
-            elif file_ext == '.pdf':
-                result = self.extract_text_from_pdf(file_path, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=recommend_jobs)
-            elif file_ext == '.docx':
-                result = self.extract_text_from_docx(file_path, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=recommend_jobs)
-            elif file_ext == '.doc':
-                result = self.extract_text_from_doc(file_path, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=recommend_jobs)
-            else:
-                return {"success": False, "error": f"Unsupported file format: {file_ext}"}
+            with MappedDocument(file_path) as document:
+                kind = self.detect_format(document, file_ext)
+                if continuation_token and not (kind == "pdf" and extract_keywords):
+                    return {"success": False, "error": "continuation_token does not match this document", "invalid_request": True}
+                if kind == "image":
+                    result = self.extract_text_from_image(document, lang=lang, layout=layout, fast_path=fast_path, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=False)
+                elif kind == "pdf" and (stream or budget is not None or continuation_token) and extract_keywords:
+                    # Page-by-page keyword extraction: memory bounded by page size, no full text in the result;
+                    # a budget stops reading early once the top keywords are settled
+                    start_page, carry = 0, None
+                    if continuation_token:
+                        try:
+                            start_page, carry = self.parse_continuation_token(document, continuation_token)
+                        except ValueError as e:
+                            return {"success": False, "error": str(e), "invalid_request": True}
+                        if budget is None:
+                            budget = AnalysisBudget()
+                    result = self.extract_keywords_from_pdf_stream(document, categorize_skills=categorize_skills, recommend_jobs=False, budget=budget, start_page=start_page, carry=carry)
+                elif kind == "pdf":
+                    result = self.extract_text_from_pdf(document, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=False)
+                elif kind == "docx":
+                    result = self.extract_text_from_docx(document, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=False)
+                elif kind == "doc":
+                    result = self.extract_text_from_doc(document, extract_keywords=extract_keywords, categorize_skills=categorize_skills, recommend_jobs=False)
+                elif document.format is not None:
+                    return {"success": False, "error": f"Unsupported file content: {document.format.upper()} that is not a Word document"}
+                else:
+                    return {"success": False, "error": f"Unsupported file format: {file_ext}"}
 
             if result["success"]:
+                if budget is not None:
+                    # Only paged documents stop early; everything else is analyzed in full
+                    result.setdefault("is_partial", False)
                 result.update({
                     "file_extension": file_ext,
+                    "detected_format": kind,
                     "file_size_bytes": file_size,
                     "file_size_formatted": self.format_file_size(file_size),
                     "processed_at": datetime.now().isoformat()
@@ -714,6 +1237,27 @@ class DocumentProcessor:
             logger.error(f"Error analyzing document: {str(e)}")
             return {"success": False, "error": str(e)}
 
+    def detect_format(self, document, file_ext):
+        """'image', 'pdf', 'docx' or 'doc' from the sniffed content, else from the extension when
+        the content isn't recognized; None for content or extensions we can't analyze"""
+        content_format = document.format
+        if content_format in IMAGE_FORMATS:
+            return "image"
+        if content_format == "pdf":
+            return "pdf"
+        if content_format == "zip":
+            # Only the central directory is read, from the mapping
+            try:
+                with zipfile.ZipFile(document.open()) as archive:
+                    return "docx" if "word/document.xml" in archive.namelist() else None
+            except zipfile.BadZipFile:
+                return None
+        if content_format == "ole":
+            return "doc" if legacy_doc.is_word_document(document.buffer) else None
+        if file_ext in self.supported_image_formats:
+            return "image"
+        return {'.pdf': "pdf", '.docx': "docx", '.doc': "doc"}.get(file_ext)
+
     def format_file_size(self, size_bytes):
         if size_bytes == 0:
             return "0 Bytes"
@@ -724,8 +1268,29 @@ class DocumentProcessor:
             i += 1
         return f"{size_bytes:.2f} {size_names[i]}"
 
+def _init_extraction_process():
+    """Runs in each forked extraction process: drop the parent's OCR pools, locks and counters,
+    and split the OCR thread budget between the extraction processes"""
+    router = document_processor.ocr_router
+    router.reset_after_fork()
+    router.reset_metrics()
+    router.set_thread_budget(router.ocr_threads // document_processor.executors.extraction.workers)
+    document_processor.image_triage.reset_after_fork()
+    document_processor.image_triage.reset_metrics()
+
+def _extract_in_process(file_path, options):
+    """Extraction in an extraction process; the OCR counters it added go back to the parent's metrics"""
+    result = document_processor.extract_document(file_path, **options)
+    return result, {"ocr": document_processor.ocr_router.take_metrics(), "fast_path": document_processor.image_triage.take_metrics()}
+
 # Initialize processors
 document_processor = DocumentProcessor()
+# Sheds analysis requests beyond what the extraction processes can serve promptly, and skips
+# Gemini for admitted ones once the recommendation threads are all busy
+admission = AdmissionController.from_env(
+    document_processor.executors.extraction.workers,
+    degrade_when=lambda: document_processor.executors.recommendation.load() >= 1.0
+)
 
 # Existing endpoints (unchanged)
 @app.route('/gemini/test', methods=['POST'])
@@ -738,8 +1303,9 @@ def test_gemini_recommendations():
         context = data.get('context', None)
         if not isinstance(skills, list):
             return jsonify({"success": False, "error": "skills must be an array"}), 400
+        gemini_recommender = None
         try:
-            gemini_recommender = GeminiJobRecommender()
+            gemini_recommender = GeminiJobRecommender(background_init=False)
             result = gemini_recommender.get_job_recommendations(skills, context)
             return jsonify(result)
         except Exception as e:
@@ -748,11 +1314,86 @@ def test_gemini_recommendations():
                 "error": f"Gemini test failed: {str(e)}",
                 "gemini_available": False
             }), 500
+        finally:
+            # A throwaway recommender: stop its event loop thread
+            if gemini_recommender is not None:
+                gemini_recommender.close()
     except Exception as e:
         logger.error(f"Error in test_gemini_recommendations: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+# Tenants are only taken from headers we can trust: an API key from TENANT_API_KEYS (comma-separated),
+# or X-User-Id when the request comes from one of TRUSTED_PROXIES (comma-separated addresses)
+TENANT_API_KEYS = {_sha256(key.strip()) for key in os.getenv('TENANT_API_KEYS', '').split(',') if key.strip()}
+TRUSTED_PROXIES = {address.strip() for address in os.getenv('TRUSTED_PROXIES', '').split(',') if address.strip()}
+
+def request_tenant():
+    """Who the request counts against for fair queuing and quotas: a configured API key (hashed, so
+    keys never show up in metrics), else X-User-Id set by a trusted proxy, else the client address.
+    Unrecognized keys and user ids are ignored, so a client can't mint tenants or borrow another's quota"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        digest = _sha256(api_key)
+        if digest in TENANT_API_KEYS:
+            return "key:" + digest[:16]
+    user = request.headers.get('X-User-Id', '').strip()
+    if user and request.remote_addr in TRUSTED_PROXIES:
+        return "user:" + user[:64]
+    return "ip:" + (request.remote_addr or "unknown")
+
+def admission_rejected_response(e):
+    response = jsonify({"success": False, "error": str(e), "retry_after": e.retry_after})
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def admission_controlled(view):
+    """Admit the request before the view reads the upload, or answer 429/503 with Retry-After.
+    The request body counts against the tenant's byte quota; a view analyzing a file named on the
+    server charges its size with admission.charge_bytes once the path has been validated."""
+    @functools.wraps(view)
+    def admitted_view(*args, **kwargs):
+        try:
+            ticket = admission.acquire(request_tenant(), request.content_length or 0)
+        except AdmissionRejected as e:
+            return admission_rejected_response(e)
+        g.degraded = ticket.degraded
+        g.admission_ticket = ticket
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release(ticket)
+    return admitted_view
+
+def analysis_status(result):
+    # A saturated extraction stage is a temporary refusal, and a bad continuation_token the
+    # client's error, not failed analyses
+    if result.get("overloaded"):
+        return 503
+    return 400 if result.get("invalid_request") else 200
+
+def shape_analysis_response(result, params):
+    """Apply the compact response options ('compact', 'fields', 'include_text') from form or JSON params.
+    The endpoints check 'fields' with parse_fields before analysing, so a bad value is a 400."""
+    def flag(name):
+        value = params.get(name, False)
+        return value.lower() == 'true' if isinstance(value, str) else bool(value)
+    fields = parse_fields(params.get('fields'))
+    if not (flag('compact') or fields is not None) or not result.get("success"):
+        return result
+    return compact_result(result, fields=fields, include_text=flag('include_text'))
+
+def parse_language(lang):
+    """The requested OCR language; ValueError unless it has an installed pack or a script route"""
+    if not document_processor.ocr_router.is_supported_language(lang):
+        raise ValueError(f"Unsupported OCR language: {lang}")
+    return lang or 'auto'
+
 @app.route('/document/analyze', methods=['POST'])
+@admission_controlled
 def analyze_uploaded_document():
     try:
         if 'file' not in request.files:
@@ -764,6 +1405,19 @@ def analyze_uploaded_document():
         extract_keywords = request.form.get('extract_keywords', 'true').lower() == 'true'
         categorize_skills = request.form.get('categorize_skills', 'true').lower() == 'true'
         recommend_jobs = request.form.get('recommend_jobs', 'true').lower() == 'true'
+        stream = request.form.get('stream', 'false').lower() == 'true'
+        try:
+            lang = parse_language(request.form.get('lang', 'auto'))
+            parse_fields(request.form.get('fields'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        layout = request.form.get('layout', 'true').lower() == 'true'
+        fast_path = request.form.get('fast_path', 'true').lower() == 'true'
+        continuation_token = request.form.get('continuation_token') or None
+        try:
+            budget = AnalysisBudget.from_request(request.form.get('budget'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"Invalid budget: {str(e)}"}), 400
 
         filename = secure_filename(file.filename)
         file_ext = os.path.splitext(filename)[1] if filename else '.tmp'
@@ -775,11 +1429,18 @@ def analyze_uploaded_document():
                     temp_file.name, 
                     extract_keywords=extract_keywords,
                     categorize_skills=categorize_skills,
-                    recommend_jobs=recommend_jobs
+                    recommend_jobs=recommend_jobs,
+                    stream=stream,
+                    lang=lang,
+                    layout=layout,
+                    fast_path=fast_path,
+                    budget=budget,
+                    continuation_token=continuation_token,
+                    degraded=g.degraded
                 )
                 if result["success"]:
                     result["filename"] = filename
-                return jsonify(result)
+                return jsonify(shape_analysis_response(result, request.form)), analysis_status(result)
             finally:
                 try:
                     os.unlink(temp_file.name)
@@ -790,25 +1451,55 @@ def analyze_uploaded_document():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/document/analyze_from_path', methods=['POST'])
+@admission_controlled
 def analyze_document_from_path():
     try:
         data = request.get_json()
         if not data or 'file_path' not in data:
             return jsonify({"success": False, "error": "file_path is required"}), 400
         file_path = data['file_path']
+        if not isinstance(file_path, str):
+            return jsonify({"success": False, "error": "file_path must be a string"}), 400
         extract_keywords = data.get('extract_keywords', True)
         categorize_skills = data.get('categorize_skills', True)
         recommend_jobs = data.get('recommend_jobs', True)
+        stream = bool(data.get('stream', False))
+        try:
+            lang = parse_language(data.get('lang', 'auto'))
+            parse_fields(data.get('fields'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        layout = bool(data.get('layout', True))
+        fast_path = bool(data.get('fast_path', True))
+        continuation_token = data.get('continuation_token') or None
+        try:
+            budget = AnalysisBudget.from_request(data.get('budget'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": f"Invalid budget: {str(e)}"}), 400
+        validation = document_processor.validate_file(file_path)
+        if not validation["success"]:
+            return jsonify(validation)
+        try:
+            admission.charge_bytes(g.admission_ticket, os.path.getsize(file_path))
+        except AdmissionRejected as e:
+            return admission_rejected_response(e)
 
         result = document_processor.analyze_document(
             file_path, 
             extract_keywords=extract_keywords,
             categorize_skills=categorize_skills,
-            recommend_jobs=recommend_jobs
+            recommend_jobs=recommend_jobs,
+            stream=stream,
+            lang=lang,
+            layout=layout,
+            fast_path=fast_path,
+            budget=budget,
+            continuation_token=continuation_token,
+            degraded=g.degraded
         )
         if result["success"]:
             result["filename"] = os.path.basename(file_path)
-        return jsonify(result)
+        return jsonify(shape_analysis_response(result, data)), analysis_status(result)
     except Exception as e:
         logger.error(f"Error in analyze_document_from_path: {str(e)}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -822,7 +1513,8 @@ def categorize_skills():
         skills = data['skills']
         if not isinstance(skills, list):
             return jsonify({"success": False, "error": "skills must be an array"}), 400
-        result = document_processor.skill_categorizer.categorize_skills(skills)
+        columnar = data.get('format') == 'columnar'
+        result = document_processor.skill_categorizer.categorize_skills(skills, columnar=columnar)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in categorize_skills: {str(e)}")
@@ -846,12 +1538,18 @@ def recommend_jobs():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/analyze_and_recommend', methods=['POST'])
+@admission_controlled
 def analyze_and_recommend():
     try:
         if 'file' in request.files:
             file = request.files['file']
             if file.filename == '':
                 return jsonify({"success": False, "error": "No file selected"}), 400
+            try:
+                lang = parse_language(request.form.get('lang', 'auto'))
+                parse_fields(request.form.get('fields'))
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
             filename = secure_filename(file.filename)
             file_ext = os.path.splitext(filename)[1] if filename else '.tmp'
             with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
@@ -861,11 +1559,15 @@ def analyze_and_recommend():
                         temp_file.name, 
                         extract_keywords=True,
                         categorize_skills=True,
-                        recommend_jobs=True
+                        recommend_jobs=True,
+                        lang=lang,
+                        layout=request.form.get('layout', 'true').lower() == 'true',
+                        fast_path=request.form.get('fast_path', 'true').lower() == 'true',
+                        degraded=g.degraded
                     )
                     if result["success"]:
                         result["filename"] = filename
-                    return jsonify(result)
+                    return jsonify(shape_analysis_response(result, request.form)), analysis_status(result)
                 finally:
                     try:
                         os.unlink(temp_file.name)
@@ -877,6 +1579,10 @@ def analyze_and_recommend():
                 return jsonify({"success": False, "error": "No data provided"}), 400
             if 'text' in data:
                 text = data['text']
+                try:
+                    parse_fields(data.get('fields'))
+                except ValueError as e:
+                    return jsonify({"success": False, "error": str(e)}), 400
                 result = {
                     "success": True,
                     "text": text,
@@ -884,15 +1590,16 @@ def analyze_and_recommend():
                     "char_count": len(text),
                     "extraction_type": "direct_input"
                 }
-                result = document_processor._add_analysis_results(result, text, True, True)
-                return jsonify(result)
+                result = document_processor._add_analysis_results(result, text, True, True, degraded=g.degraded)
+                return jsonify(shape_analysis_response(result, data))
             elif 'skills' in data:
                 skills = data['skills']
                 if not isinstance(skills, list):
                     return jsonify({"success": False, "error": "skills must be an array"}), 400
-                skill_categorization = document_processor.skill_categorizer.categorize_skills(skills)
-                sectors = list(set([skill.get('sector', 'Other') for skill in skill_categorization['categorized_skills']]))
-                job_recommendations = document_processor.job_recommender.recommend_jobs(skills, sectors)
+                columnar = data.get('format') == 'columnar'
+                skill_categorization = document_processor.skill_categorizer.categorize_skills(skills, columnar=columnar)
+                sectors = skill_categorization['sectors_found']
+                job_recommendations = document_processor.recommend_jobs_for(skills, sectors, degraded=g.degraded)
                 return jsonify({
                     "success": True,
                     "skills_input": skills,
@@ -978,7 +1685,10 @@ def extract_keywords_only():
             return jsonify({"success": False, "error": "text is required"}), 400
         text = data['text']
         min_confidence = data.get('min_confidence', 0.7)
-        result = document_processor.keyword_extractor.extract_keywords(text, min_confidence)
+        limit = data.get('limit', 10)
+        if not isinstance(limit, int) or limit < 1:
+            return jsonify({"success": False, "error": "limit must be a positive integer"}), 400
+        result = document_processor.keyword_extractor.extract_keywords(text, min_confidence, limit)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error in extract_keywords_only: {str(e)}")
@@ -986,11 +1696,32 @@ def extract_keywords_only():
 
 @app.route('/keywords/categories', methods=['GET'])
 def get_keyword_categories():
+    vocabulary = document_processor.keyword_extractor.vocabulary.get()
     return jsonify({
         "success": True,
-        "categories": list(document_processor.keyword_extractor.all_patterns.keys())
+        "categories": list(vocabulary.patterns.keys()),
+        "vocabulary": vocabulary.describe()
     })
 
+@app.route('/keywords/vocabulary/reload', methods=['POST'])
+def reload_keyword_vocabulary():
+    """Recompile skill_vocabulary.json now instead of waiting for the change check. This reloads
+    the serving process; forked extraction processes hold their own copy and pick the change up
+    at their next check, as the response says"""
+    try:
+        vocabulary = document_processor.keyword_extractor.vocabulary
+        result = vocabulary.reload()
+        if result["success"] and document_processor.executors.extraction.in_process:
+            result["extraction_processes"] = {
+                "reloaded": False,
+                "refresh_within_seconds": vocabulary.check_interval,
+                "note": "Extraction processes reload the vocabulary when their next file check sees the change"
+            }
+        return jsonify(result), (200 if result["success"] else 400)
+    except Exception as e:
+        logger.error(f"Error in reload_keyword_vocabulary: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/document/supported_formats', methods=['GET'])
 def get_supported_formats():
     return jsonify({
@@ -1002,6 +1733,18 @@ def get_supported_formats():
         }
     })
 
+@app.route('/ocr/metrics', methods=['GET'])
+def get_ocr_metrics():
+    """Per-language OCR throughput, language-detection cost and fast-path decisions"""
+    metrics = document_processor.ocr_router.metrics()
+    metrics["fast_path"] = document_processor.image_triage.metrics()
+    return jsonify({"success": True, "metrics": metrics})
+
+@app.route('/admission/metrics', methods=['GET'])
+def get_admission_metrics():
+    """Admission limits and counters, with queue, quota usage and latency per tenant"""
+    return jsonify({"success": True, "metrics": admission.metrics(include_tenants=True)})
+
 # ✅ NEW ENDPOINTS ADDED HERE (after existing ones)
 
 @app.route('/keywords/recommend', methods=['POST'])
@@ -1009,6 +1752,24 @@ def recommend_jobs_for_keyword():
     """Get job recommendations for a specific keyword with learning paths"""
     try:
         data = request.get_json()
+        if data and 'keywords' in data:
+            keywords = data['keywords']
+            if not isinstance(keywords, list):
+                return jsonify({"success": False, "error": "keywords must be an array"}), 400
+            batch_size = data.get('batch_size')
+            if batch_size is not None and (not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1):
+                return jsonify({"success": False, "error": "batch_size must be a positive integer"}), 400
+            # Several selected keywords: one concurrent fan-out instead of serialized calls,
+            # or several keywords per Gemini call when 'batched' is set (bulk jobs)
+            result = document_processor.job_recommender.get_multi_keyword_recommendations(
+                keywords=keywords,
+                context_skills=[],
+                top_k=data.get('top_k', 5),
+                batched=bool(data.get('batched', False)),
+                batch_size=batch_size
+            )
+            return jsonify(result)
+
         if not data or 'keyword' not in data:
             return jsonify({"success": False, "error": "keyword is required"}), 400
 
@@ -1099,14 +1860,18 @@ def health_check():
         except Exception:
             ocr_available = False
 
-        gemini_available = False
-        gemini_status = "Not configured"
-        try:
-            test_recommender = GeminiJobRecommender()
-            gemini_available = test_recommender.gemini_available
+        # Status of the long-lived recommender that serves requests, rather than a new
+        # recommender (and a Gemini test call) per health check
+        shared_recommender = document_processor.job_recommender.gemini_recommender
+        gemini_available = bool(shared_recommender and shared_recommender.gemini_available)
+        if shared_recommender is None:
+            gemini_status = "Error: recommender failed to initialize"
+        elif shared_recommender.initializing:
+            gemini_status = "Initializing"
+        else:
             gemini_status = "Available" if gemini_available else "API key missing or invalid"
-        except Exception as e:
-            gemini_status = f"Error: {str(e)}"
+
+        gemini_circuit = shared_recommender.circuit_breaker.snapshot() if shared_recommender else None
 
         return jsonify({
             "status": "healthy",
@@ -1129,6 +1894,9 @@ def health_check():
             },
             "tesseract_version": tesseract_version,
             "gemini_status": gemini_status,
+            "gemini_circuit_breaker": gemini_circuit,
+            "executors": document_processor.executors.metrics(),
+            "admission": admission.metrics(),
             "supported_formats": {
                 "images": document_processor.supported_image_formats,
                 "documents": document_processor.supported_doc_formats
@@ -1196,38 +1964,33 @@ if __name__ == '__main__':
     import os
     missing_deps = []
     try:
-        import pytesseract
         pytesseract.get_tesseract_version()
         logger.info("✓ Tesseract OCR is available")
     except Exception as e:
         missing_deps.append("Tesseract OCR")
         logger.warning(f"✗ Tesseract OCR not available: {str(e)}")
 
-    try:
-        import docx
-        import docx2txt
-        import mammoth
+    # Checked without importing, so startup does not pay for backends not yet used
+    missing_doc_libs = [name for name in ('docx', 'docx2txt', 'mammoth') if not module_available(name)]
+    if not missing_doc_libs:
         logger.info("✓ Document processing libraries are available")
-    except ImportError as e:
+    else:
         missing_deps.append("Document processing libraries")
-        logger.warning(f"✗ Document libraries not available: {str(e)}")
+        logger.warning(f"✗ Document libraries not available: {', '.join(missing_doc_libs)}")
 
-    try:
-        import fitz
+    if module_available('fitz'):
         logger.info("✓ PyMuPDF is available")
-    except ImportError:
+    else:
         logger.warning("⚠ PyMuPDF not available, falling back to other PDF methods")
 
-    try:
-        import pdfplumber
+    if module_available('pdfplumber'):
         logger.info("✓ pdfplumber is available")
-    except ImportError:
+    else:
         logger.warning("⚠ pdfplumber not available, falling back to PyPDF2")
 
-    try:
-        import google.generativeai as genai
+    if module_available('google.generativeai'):
         logger.info("✓ Google Gemini AI library is available")
-    except ImportError:
+    else:
         logger.warning("✗ Google Gemini library not available")
         missing_deps.append("Google Generative AI")
 
@@ -1253,6 +2016,8 @@ if __name__ == '__main__':
     # ✅ Start Flask using Render's port
     import os
     port = int(os.environ.get("PORT", 8000))
+    # Fork the extraction processes before the server starts its threads
+    document_processor.executors.start()
     logger.info(f"Starting Flask server on 0.0.0.0:{port}")
     app.run(host="0.0.0.0", port=port)
 
@@ -1273,10 +2038,12 @@ if __name__ == '__main__':
     logger.info("")
     logger.info("⚙️  Environment Variables:")
     logger.info("  • GEMINI_API_KEY - Your Google Gemini API Key")
+    logger.info("  • GEMINI_RERANK - never | uncertain | always: when Gemini re-ranks skill-based results")
+    logger.info("  • TENANT_API_KEYS, TRUSTED_PROXIES - API keys and proxies (for X-User-Id) trusted to name a tenant")
     logger.info("")
     logger.info("🎯 Job Recommendation Priority:")
-    logger.info("  1. Google Gemini API (Primary - AI-powered)")
-    logger.info("  2. Built-in Fallback (Secondary - Local mappings)")
+    logger.info("  1. Local Ranking Model (TF-IDF over the skill mappings and learning paths)")
+    logger.info("  2. Google Gemini API (re-ranks and explains the top candidates when the ranking is unsure)")
     logger.info("")
     logger.info("🤖 Google Gemini Integration:")
     logger.info("  • Skill -> Job mapping with ranked recommendations")
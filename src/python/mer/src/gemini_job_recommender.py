@@ -1,67 +1,321 @@
 import os
 import json
-import re
 import logging
 from typing import List, Dict, Any, Optional
 import time
-from collections import Counter
+from collections import Counter, OrderedDict, deque
 import threading
+import asyncio
+import weakref
 
-# Try to import Google Generative AI, handle gracefully if not available
-try:
-    import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except ImportError as e:
-    GENAI_AVAILABLE = False
-    genai = None
+from records import JobRecommendation, RankedJobRecommendation, KeywordJobRecommendation
+from job_ranker import JobRanker
+from lazy_imports import lazy_module, module_available
+
+# Google Generative AI is optional and slow to import (gRPC, protobuf); it is only loaded
+# when a recommender with an API key connects
+GENAI_AVAILABLE = module_available('google.generativeai')
+genai = lazy_module('google.generativeai') if GENAI_AVAILABLE else None
 
 logger = logging.getLogger(__name__)
 
+# Learning path templates for job titles without a curated path; the keyword
+# being analysed is prepended to 'foundations' when the path is filled in
+LEARNING_PATH_TEMPLATES = {
+    'technical': {
+        'foundations': ['Version Control (Git)', 'Problem Solving'],
+        'intermediate': ['Framework/Library', 'Database Basics', 'Testing'],
+        'advanced': ['System Design', 'Performance Optimization', 'Deployment']
+    },
+    'analyst': {
+        'foundations': ['Data Analysis', 'Excel/Spreadsheets'],
+        'intermediate': ['SQL', 'Data Visualization', 'Statistics'],
+        'advanced': ['Advanced Analytics', 'Reporting', 'Domain Expertise']
+    },
+    'designer': {
+        'foundations': ['Design Principles', 'Color Theory'],
+        'intermediate': ['Prototyping', 'User Research', 'Design Tools'],
+        'advanced': ['Design Systems', 'Accessibility', 'Collaboration']
+    },
+    'general': {
+        'foundations': ['Industry Knowledge', 'Communication'],
+        'intermediate': ['Specialized Tools', 'Process Understanding', 'Collaboration'],
+        'advanced': ['Leadership', 'Strategic Thinking', 'Innovation']
+    }
+}
+
+# Response schemas for Gemini's JSON mode (response_mime_type="application/json")
+LEARNING_PATH_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "immediate": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "intermediate": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "advanced": {"type": "ARRAY", "items": {"type": "STRING"}}
+    }
+}
+
+KEYWORD_JOBS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "keyword_jobs": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "job": {"type": "STRING"},
+                    "score": {"type": "INTEGER"},
+                    "reason": {"type": "STRING"},
+                    "required_skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    "learning_path": LEARNING_PATH_SCHEMA,
+                    "time_to_proficiency": {"type": "STRING"},
+                    "difficulty": {"type": "STRING"}
+                },
+                "required": ["job", "score", "reason"]
+            }
+        }
+    },
+    "required": ["keyword_jobs"]
+}
+
+OVERALL_JOBS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "overall_top_jobs": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "job": {"type": "STRING"},
+                    "skills": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    "score": {"type": "INTEGER"},
+                    "reason": {"type": "STRING"}
+                },
+                "required": ["job", "score", "reason"]
+            }
+        }
+    },
+    "required": ["overall_top_jobs"]
+}
+
+
+# When skill-based requests go to Gemini: never, only when the local ranking is unsure, or always
+RERANK_POLICIES = ("never", "uncertain", "always")
+
+
+class GeminiCircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+
+class GeminiCircuitBreaker:
+    """Rolling-window circuit breaker over Gemini call outcomes and latency.
+
+    closed: calls flow; once the failure rate over the last `window_size` calls (slow
+    calls count as failures) reaches `failure_rate_threshold`, the breaker opens.
+    open: calls are refused until `cooldown_seconds` have passed.
+    half_open: up to `half_open_probes` trial calls are let through; a success closes
+    the breaker, a failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, window_size: int = 20, min_calls: int = 5, failure_rate_threshold: float = 0.5,
+                 slow_call_seconds: float = 15.0, cooldown_seconds: float = 30.0, half_open_probes: int = 1):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = half_open_probes
+        self.state = "closed"
+        self._outcomes = deque(maxlen=window_size)
+        self._latencies = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def is_open(self) -> bool:
+        """True while calls would be refused (open and still cooling down); does not take a probe slot"""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._opened_at < self.cooldown_seconds
+
+    def allow_request(self) -> bool:
+        """Decide whether a call may go to Gemini, taking a half-open probe slot if needed"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self.state = "half_open"
+                self._probes_in_flight = 0
+                logger.info("Gemini circuit breaker half-open: sending probe request")
+            if self.state == "half_open":
+                if self._probes_in_flight >= self.half_open_probes:
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def release_probe(self):
+        """Give back a probe slot taken by allow_request for a call that ended without an outcome
+        (cancelled, or failed before reaching Gemini), so the breaker can probe again"""
+        with self._lock:
+            if self.state == "half_open" and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_success(self, latency: float):
+        """Record a completed call; calls slower than slow_call_seconds count as failures"""
+        if latency > self.slow_call_seconds:
+            self.record_failure(latency)
+            return
+        with self._lock:
+            self._latencies.append(latency)
+            if self.state == "half_open":
+                logger.info("Gemini circuit breaker closed: probe succeeded")
+                self.state = "closed"
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self, latency: float):
+        """Record a failed or slow call, opening the breaker when the window is unhealthy"""
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(False)
+            if self.state == "half_open":
+                self._open()
+                return
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate_threshold:
+                self._open()
+
+    def _open(self):
+        logger.warning(f"Gemini circuit breaker open for {self.cooldown_seconds}s: using local fallback")
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state for health/metrics output"""
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": calls,
+                "failure_rate": round(self._outcomes.count(False) / calls, 3) if calls else 0.0,
+                "avg_latency_seconds": round(sum(self._latencies) / len(self._latencies), 3) if self._latencies else 0.0
+            }
+
 
 class GeminiJobRecommender:
-    """Google Gemini-only job recommendation system with comprehensive fallback and keyword selection"""
+    """Job recommendations ranked locally and re-ranked by Google Gemini, with keyword selection"""
 
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, background_init: bool = True, defer_connect: bool = False):
         # Initialize skill mappings FIRST - this is critical
         self._initialize_skill_mappings()
         self._initialize_learning_paths()
+        self._initialize_fallback_tables()
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
         self.gemini_available = False
         self.model = None
+        # Set once the Gemini connection attempt has finished, whatever its outcome
+        self._ready = threading.Event()
 
         # Rate limiting with thread safety
         self.last_request_time = 0
         self.min_request_interval = 1.2
         self._rate_limit_lock = threading.Lock()
 
+        # Async client: one long-lived event loop per recommender so the SDK's
+        # async transport (and its HTTP connections) is reused across requests
+        self.max_concurrent_requests = 4
+        # Keywords packed into a single prompt by the batched recommendation API
+        self.keyword_batch_size = 5
+        # Ask Gemini for schema-constrained JSON instead of free text
+        self.use_structured_output = True
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+        # Concurrency cap per event loop: the background loop, or any loop awaiting the async API
+        self._request_semaphores = weakref.WeakKeyDictionary()
+
+        # Circuit breaker: skip Gemini entirely while it is failing or slow
+        self.circuit_breaker = GeminiCircuitBreaker()
+        # Hedging: when set, return the local fallback after this many seconds and
+        # let the late Gemini answer fill the response cache for the next request
+        self.hedge_after_seconds = None
+        self._pending_hedges = set()
+
+        # Cache of successful Gemini responses, keyed by request parameters
+        self.cache_ttl_seconds = 3600
+        self.cache_max_entries = 512
+        self._response_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Skill lists are ranked locally (JobRanker); Gemini only re-ranks and explains the top
+        # `rerank_candidates` when the local ranking is unsure: its best score is below
+        # `rerank_below`, or fewer than `rerank_min_coverage` of the skills are in its vocabulary
+        self.rerank_policy = os.getenv('GEMINI_RERANK', 'uncertain').lower()
+        if self.rerank_policy not in RERANK_POLICIES:
+            logger.warning(f"Unknown GEMINI_RERANK={self.rerank_policy!r}; using 'uncertain'")
+            self.rerank_policy = "uncertain"
+        self.rerank_candidates = 8
+        self.rerank_below = 0.3
+        self.rerank_min_coverage = 0.5
+        self._job_ranker = None
+        self._ranker_lock = threading.Lock()
+
         if not GENAI_AVAILABLE:
             logger.warning("Google Generative AI package not installed. Using fallback only.")
+            self._ready.set()
             return
 
         if not self.api_key:
-            logger.warning("Gemini API key not found. Will use comprehensive fallback recommendations.")
+            logger.warning("Gemini API key not found. Recommending from the local ranking model only.")
+            self._ready.set()
             return
 
-try:
-    # Configure Gemini API
-    genai.configure(api_key=self.api_key)
+        if defer_connect:
+            # Preforking server: the master must not hold gRPC channels or threads, so each
+            # worker calls connect() after fork (see gunicorn.conf.py)
+            logger.info("Gemini connection deferred until after fork")
+            return
+        self.connect(background=background_init)
+
+    def connect(self, background: bool = True):
+        """Connect to Gemini, by default in a background thread"""
+        if background:
+            # Importing the SDK and the test call take seconds; serve fallback
+            # recommendations until the connection is up instead of blocking startup
+            threading.Thread(target=self._connect, name="gemini-init", daemon=True).start()
+        else:
+            self._connect()
+
+    def _connect(self):
+        """Configure the Gemini client and check it with a test call"""
+        try:
+            # Configure Gemini API
+            genai.configure(api_key=self.api_key)
+
+            # ✅ Correct free-tier model
+            self.model = genai.GenerativeModel("gemini-1.5-flash")
 
-    # ✅ Correct free-tier model
-    self.model = genai.GenerativeModel("gemini-1.5-flash")
+            # ✅ Test response
+            test_response = self.model.generate_content("Hello!")
 
-    # ✅ Test response
-    test_response = self.model.generate_content("Hello!")
+            if test_response and hasattr(test_response, "text"):
+                self.gemini_available = True
+                logger.info("✅ Gemini model initialized successfully: gemini-1.5-flash")
+            else:
+                raise Exception("Empty response received from model")
 
-    if test_response and hasattr(test_response, "text"):
-        self.gemini_available = True
-        logger.info("✅ Gemini model initialized successfully: gemini-1.5-flash")
-    else:
-        raise Exception("Empty response received from model")
+        except Exception as e:
+            logger.error(f"❌ Gemini initialization failed: {e}")
+            self.gemini_available = False
+        finally:
+            self._ready.set()
 
-except Exception as e:
-    logger.error(f"❌ Gemini initialization failed: {e}")
-    self.gemini_available = False
+    @property
+    def initializing(self) -> bool:
+        return not self._ready.is_set()
 
+    def wait_until_ready(self, timeout: float = None) -> bool:
+        """Block until the Gemini connection attempt has finished; False on timeout"""
+        return self._ready.wait(timeout)
 
     def _initialize_skill_mappings(self):
         """Initialize comprehensive skill-to-job mappings - ALWAYS CALLED"""
@@ -275,57 +529,263 @@ except Exception as e:
             }
         }
 
-    def get_keyword_specific_recommendations(self, keyword: str, context_skills: List[str] = None, top_k: int = 5) -> Dict[str, Any]:
-        """Get job recommendations for a specific keyword with learning paths"""
-        if not keyword:
-            return {
-                "success": False,
-                "error": "No keyword provided",
-                "source": "Keyword Specific Recommender"
-            }
+    def _initialize_fallback_tables(self):
+        """Materialize the derived fields of every known job title once, so the fallback path is lookups"""
+        # Unknown titles (generic or Gemini-supplied) are memoized up to this many entries
+        self.fallback_cache_limit = 4096
+        self._job_profiles = {}
+        self._keyword_jobs_cache = {}
+        for job_list in self.skill_job_mappings.values():
+            for job_data in job_list:
+                self._job_profile(job_data['job'])
+        for job_title in self.learning_paths:
+            self._job_profile(job_title)
+
+    def _job_profile(self, job_title: str) -> Dict[str, Any]:
+        """Sector, time, difficulty and learning path for a job title (precomputed or memoized)"""
+        profile = self._job_profiles.get(job_title)
+        if profile is not None:
+            return profile
+        learning_path = self.learning_paths.get(job_title)
+        profile = {
+            "sector": self._determine_job_sector(job_title),
+            "time_to_proficiency": self._estimate_learning_time(job_title, ""),
+            "difficulty": self._assess_difficulty(job_title, ""),
+            "learning_path": learning_path,
+            "required_skills": [skill for category in learning_path.values() if isinstance(category, list)
+                                for skill in category] if learning_path else None,
+            "learning_path_template": None if learning_path else self._learning_path_template(job_title)
+        }
+        if len(self._job_profiles) < self.fallback_cache_limit:
+            self._job_profiles[job_title] = profile
+        return profile
+
+    def _keyword_jobs(self, keyword: str) -> List[Dict]:
+        """Mapped (or generic) jobs for a single keyword, memoized per keyword"""
+        jobs_data = self._keyword_jobs_cache.get(keyword)
+        if jobs_data is not None:
+            return jobs_data
+        keyword_lower = keyword.lower().strip()
 
-        # Use fallback if Gemini not available
-        if not self.gemini_available:
-            logger.info(f"Using fallback recommendations for keyword: {keyword}")
-            return self._create_keyword_fallback(keyword, context_skills or [], top_k)
+        # Find direct matches first
+        jobs_data = []
+        for key, job_list in self.skill_job_mappings.items():
+            if key == keyword_lower or keyword_lower in key or key in keyword_lower:
+                jobs_data = job_list
+                break
+
+        # If no direct match, try partial matches
+        if not jobs_data:
+            for key, job_list in self.skill_job_mappings.items():
+                if any(word in keyword_lower for word in key.split()) or any(word in key for word in keyword_lower.split()):
+                    jobs_data = job_list
+                    break
 
+        # Default jobs if no match
+        if not jobs_data:
+            jobs_data = self._generate_generic_jobs(keyword)
+
+        if len(self._keyword_jobs_cache) < self.fallback_cache_limit:
+            self._keyword_jobs_cache[keyword] = jobs_data
+        return jobs_data
+
+    def get_keyword_specific_recommendations(self, keyword: str, context_skills: List[str] = None, top_k: int = 5) -> Dict[str, Any]:
+        """Get job recommendations for a specific keyword with learning paths"""
+        context_skills = self._skill_strings(context_skills)
+        offline_result = self._keyword_result_without_gemini(keyword, context_skills, top_k)
+        if offline_result is not None:
+            return offline_result
+        return self._run_coroutine(self.get_keyword_specific_recommendations_async(keyword, context_skills, top_k))
+
+    async def get_keyword_specific_recommendations_async(self, keyword: str, context_skills: List[str] = None, top_k: int = 5) -> Dict[str, Any]:
+        """Async variant of get_keyword_specific_recommendations using generate_content_async"""
+        context_skills = self._skill_strings(context_skills)
+        offline_result = self._keyword_result_without_gemini(keyword, context_skills, top_k)
+        if offline_result is not None:
+            return offline_result
+
+        cache_key = self._cache_key("keyword", keyword.lower(), tuple(context_skills or []), top_k)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        return await self._hedge(
+            self._keyword_recommendations_from_gemini(keyword, context_skills, top_k, cache_key),
+            lambda: self._create_keyword_fallback(keyword, context_skills or [], top_k, error="Gemini exceeded latency budget")
+        )
+
+    async def _keyword_recommendations_from_gemini(self, keyword: str, context_skills: List[str], top_k: int, cache_key: tuple) -> Dict[str, Any]:
+        """Run the Gemini call for one keyword, caching the result or falling back on error"""
         try:
             # Create specialized prompt for single keyword
             prompt = self._create_keyword_prompt(keyword, context_skills)
-            # Rate limiting
-            self._rate_limit()
-            # Generate recommendations
+            # Generate recommendations (rate limited inside _generate_async)
             logger.info(f"Requesting keyword-specific recommendations from Gemini for: {keyword}")
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    top_p=0.8,
-                    top_k=40,
-                    max_output_tokens=1500,
-                )
-            )
+            response = await self._generate_async(prompt, max_output_tokens=1500, response_schema=KEYWORD_JOBS_SCHEMA)
 
             if not response or not response.text:
                 raise ValueError("Empty response from Gemini")
 
             # Parse JSON response
-            cleaned_response = self._clean_json_response(response.text)
-            try:
-                recommendations = json.loads(cleaned_response)
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parse error: {e}. Response: {response.text[:200]}")
-                raise
+            recommendations = self._parse_json_response(response.text)
 
             # Format for consistent output with learning paths
             formatted = self._format_keyword_gemini_response(recommendations, keyword, context_skills or [], top_k)
             logger.info(f"Successfully generated keyword-specific recommendations for: {keyword}")
+            self._cache_put(cache_key, formatted)
             return formatted
 
         except Exception as e:
             logger.error(f"Gemini API error for keyword '{keyword}': {e}")
             return self._create_keyword_fallback(keyword, context_skills or [], top_k, error=str(e))
 
+    def get_multi_keyword_recommendations(self, keywords: List[str], context_skills: List[str] = None, top_k: int = 5) -> Dict[str, Any]:
+        """Get keyword-specific recommendations for several keywords at once"""
+        if not self.gemini_available:
+            unique_keywords = self._unique_keywords(keywords)
+            results = [self.get_keyword_specific_recommendations(kw, context_skills, top_k) for kw in unique_keywords]
+            return self._combine_keyword_results(unique_keywords, results)
+        return self._run_coroutine(self.get_multi_keyword_recommendations_async(keywords, context_skills, top_k))
+
+    async def get_multi_keyword_recommendations_async(self, keywords: List[str], context_skills: List[str] = None, top_k: int = 5) -> Dict[str, Any]:
+        """Fan out one Gemini call per keyword concurrently, sharing the rate limiter"""
+        unique_keywords = self._unique_keywords(keywords)
+        results = await asyncio.gather(*[
+            self.get_keyword_specific_recommendations_async(kw, context_skills, top_k) for kw in unique_keywords
+        ])
+        return self._combine_keyword_results(unique_keywords, list(results))
+
+    def get_batched_keyword_recommendations(self, keywords: List[str], context_skills: List[str] = None, top_k: int = 5, batch_size: int = None) -> Dict[str, Any]:
+        """Get keyword-specific recommendations with several keywords packed into each Gemini call"""
+        if not self.gemini_available:
+            return self.get_multi_keyword_recommendations(keywords, context_skills, top_k)
+        return self._run_coroutine(self.get_batched_keyword_recommendations_async(keywords, context_skills, top_k, batch_size))
+
+    async def get_batched_keyword_recommendations_async(self, keywords: List[str], context_skills: List[str] = None, top_k: int = 5, batch_size: int = None) -> Dict[str, Any]:
+        """Async variant of get_batched_keyword_recommendations; batches run concurrently"""
+        if not self.gemini_available:
+            return await self.get_multi_keyword_recommendations_async(keywords, context_skills, top_k)
+
+        unique_keywords = self._unique_keywords(keywords)
+        context_skills = self._skill_strings(context_skills)
+        # keyword_batch_size is also the most a prompt can hold without truncating the response
+        batch_size = min(max(1, batch_size or self.keyword_batch_size), self.keyword_batch_size)
+        batches = [unique_keywords[i:i + batch_size] for i in range(0, len(unique_keywords), batch_size)]
+        batch_results = await asyncio.gather(*[
+            self._request_keyword_batch_async(batch, context_skills, top_k) for batch in batches
+        ])
+
+        results = {}
+        for batch_result in batch_results:
+            results.update(batch_result)
+        return self._combine_keyword_results(unique_keywords, [results[kw] for kw in unique_keywords])
+
+    async def _request_keyword_batch_async(self, keywords: List[str], context_skills: List[str], top_k: int, retries: int = 1) -> Dict[str, Dict[str, Any]]:
+        """Request one batch of keywords, re-requesting only the keywords that failed to parse or format.
+        Results share the response cache with get_keyword_specific_recommendations."""
+        results = {}
+        cache_keys = {kw: self._cache_key("keyword", kw.lower(), tuple(context_skills), top_k) for kw in keywords}
+        for keyword in keywords:
+            cached = self._cache_get(cache_keys[keyword])
+            if cached is not None:
+                results[keyword] = cached
+        pending = [kw for kw in keywords if kw not in results]
+        error = "Keyword missing from batched Gemini response"
+
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            try:
+                prompt = self._create_batch_keyword_prompt(pending, context_skills)
+                logger.info(f"Requesting batched recommendations from Gemini for {len(pending)} keywords")
+                batch_schema = {
+                    "type": "OBJECT",
+                    "properties": {kw: KEYWORD_JOBS_SCHEMA for kw in pending},
+                    "required": pending
+                }
+                response = await self._generate_async(prompt, max_output_tokens=min(1500 * len(pending), 8192),
+                                                      response_schema=batch_schema)
+                if not response or not response.text:
+                    raise ValueError("Empty response from Gemini")
+                batch_data = self._parse_json_response(response.text)
+            except json.JSONDecodeError as e:
+                # Nothing parsed - every pending keyword is retried
+                batch_data = {}
+                error = str(e)
+            except Exception as e:
+                logger.error(f"Gemini API error for keyword batch {pending}: {e}")
+                error = str(e)
+                break
+
+            for keyword, keyword_data in self._split_batch_response(batch_data, pending).items():
+                # A malformed entry (a job that isn't an object, a non-numeric score) only costs its own keyword
+                try:
+                    results[keyword] = self._format_keyword_gemini_response(keyword_data, keyword, context_skills, top_k)
+                except Exception as e:
+                    logger.warning(f"Could not format batched recommendations for keyword '{keyword}': {e}")
+                    error = str(e)
+                    continue
+                self._cache_put(cache_keys[keyword], results[keyword])
+            pending = [kw for kw in pending if kw not in results]
+            if not pending:
+                break
+            if attempt < retries:
+                logger.warning(f"Re-requesting {len(pending)} keyword(s) that failed to parse: {', '.join(pending)}")
+
+        for keyword in pending:
+            results[keyword] = self._create_keyword_fallback(keyword, context_skills, top_k, error=error)
+        return results
+
+    def _split_batch_response(self, batch_data: Dict, keywords: List[str]) -> Dict[str, Dict]:
+        """Split a keyword-keyed batch response into per-keyword {"keyword_jobs": [...]} dicts"""
+        if not isinstance(batch_data, dict):
+            return {}
+        entries = {str(key).strip().lower(): value for key, value in batch_data.items()}
+        per_keyword = {}
+        for keyword in keywords:
+            entry = entries.get(keyword.lower())
+            if isinstance(entry, list):
+                entry = {"keyword_jobs": entry}
+            if isinstance(entry, dict) and isinstance(entry.get("keyword_jobs"), list) and entry["keyword_jobs"]:
+                per_keyword[keyword] = entry
+        return per_keyword
+
+    def _unique_keywords(self, keywords: List[str]) -> List[str]:
+        """Strip and de-duplicate keywords while keeping the caller's order"""
+        return list(dict.fromkeys(kw.strip() for kw in keywords if isinstance(kw, str) and kw.strip()))
+
+    def _combine_keyword_results(self, keywords: List[str], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-keyword results into a single multi-keyword response"""
+        if not keywords:
+            return {
+                "success": False,
+                "error": "No keywords provided",
+                "source": "Keyword Specific Recommender"
+            }
+        return {
+            "success": True,
+            "results": dict(zip(keywords, results)),
+            "keywords_processed": len(keywords),
+            "gemini_available": self.gemini_available,
+            "analysis_type": "multi_keyword"
+        }
+
+    def _keyword_result_without_gemini(self, keyword: str, context_skills: List[str], top_k: int) -> Optional[Dict[str, Any]]:
+        """Return the response for requests that never reach Gemini, or None"""
+        if not keyword:
+            return {
+                "success": False,
+                "error": "No keyword provided",
+                "source": "Keyword Specific Recommender"
+            }
+
+        # Use fallback if Gemini not available
+        if not self.gemini_available:
+            logger.info(f"Using fallback recommendations for keyword: {keyword}")
+            return self._create_keyword_fallback(keyword, context_skills or [], top_k)
+        if self.circuit_breaker.is_open():
+            return self._create_keyword_fallback(keyword, context_skills or [], top_k, error="Gemini circuit breaker open")
+        return None
+
     def _create_keyword_prompt(self, keyword: str, context_skills: List[str]) -> str:
         """Create a specialized prompt for keyword-specific job recommendations"""
         context_text = f" (context: {', '.join(context_skills[:3])})" if context_skills else ""
@@ -355,6 +815,40 @@ Requirements:
 - Include realistic learning paths with 2-3 items per level
 - Estimate time to proficiency realistically
 - Consider current job market demand for {keyword}
+- Keep explanations under 20 words"""
+
+    def _create_batch_keyword_prompt(self, keywords: List[str], context_skills: List[str]) -> str:
+        """Create one prompt covering several keywords, answered as a JSON object keyed by keyword"""
+        context_text = f" (context: {', '.join(context_skills[:3])})" if context_skills else ""
+        first_keyword = keywords[0]
+        return f"""You are an expert career counselor. Analyze EACH of these skills separately and provide targeted job recommendations with learning paths.
+PRIMARY SKILLS: {', '.join(keywords)}{context_text}
+Return ONLY a valid JSON object with one entry per skill, keyed by the exact skill name, in this exact format:
+{{
+  "{first_keyword}": {{
+    "keyword_jobs": [
+      {{
+        "job": "Job Title 1",
+        "score": 92,
+        "reason": "Why this job matches the keyword",
+        "required_skills": ["skill1", "skill2", "skill3"],
+        "learning_path": {{
+          "immediate": ["Learn this first", "Then this"],
+          "intermediate": ["Next learn this", "And this"],
+          "advanced": ["Finally master this", "Expert level skill"]
+        }},
+        "time_to_proficiency": "3-6 months",
+        "difficulty": "Beginner/Intermediate/Advanced"
+      }}
+    ]
+  }}
+}}
+Requirements:
+- Include an entry for every one of these skills: {', '.join(keywords)}
+- For each skill, focus on jobs where it is a primary skill
+- Provide 3-5 targeted job recommendations per skill
+- Include realistic learning paths with 2-3 items per level
+- Estimate time to proficiency realistically
 - Keep explanations under 20 words"""
 
     def _format_keyword_gemini_response(self, gemini_data: Dict, keyword: str, context_skills: List[str], top_k: int) -> Dict[str, Any]:
@@ -363,27 +857,25 @@ Requirements:
         keyword_jobs = gemini_data.get("keyword_jobs", [])
         for i, job_data in enumerate(keyword_jobs):
             # Enhanced job recommendation with learning path
-            job_recommendation = {
-                "title": job_data.get("job", "Unknown Job"),
-                "description": job_data.get("reason", "AI-recommended position based on keyword match"),
-                "related_skill": keyword,
-                "relevance_score": job_data.get("score", 85) / 100.0,
-                "rank": i + 1,
-                "required_skills": job_data.get("required_skills", [keyword]),
-                "skill_gaps": [],
-                "sector": self._determine_job_sector(job_data.get("job", "")),
-                "source": "Google Gemini",
-                "learning_path": job_data.get("learning_path", {}),
-                "time_to_proficiency": job_data.get("time_to_proficiency", "3-6 months"),
-                "difficulty": job_data.get("difficulty", "Intermediate"),
-                "keyword_focus": keyword
-            }
-            # Add skill gaps based on required skills vs current skills
+            # Skill gaps: required skills not among the current skills, limited to 5
             current_skills_lower = [skill.lower() for skill in context_skills]
             required_skills = job_data.get("required_skills", [])
             skill_gaps = [skill for skill in required_skills if skill.lower() not in current_skills_lower]
-            job_recommendation["skill_gaps"] = skill_gaps[:5]  # Limit to 5 gaps
-            job_recommendations.append(job_recommendation)
+            job_recommendations.append(KeywordJobRecommendation(
+                title=job_data.get("job", "Unknown Job"),
+                description=job_data.get("reason", "AI-recommended position based on keyword match"),
+                related_skill=keyword,
+                relevance_score=job_data.get("score", 85) / 100.0,
+                rank=i + 1,
+                required_skills=job_data.get("required_skills", [keyword]),
+                skill_gaps=skill_gaps[:5],
+                sector=self._job_profile(job_data.get("job", ""))["sector"],
+                source="Google Gemini",
+                learning_path=job_data.get("learning_path", {}),
+                time_to_proficiency=job_data.get("time_to_proficiency", "3-6 months"),
+                difficulty=job_data.get("difficulty", "Intermediate"),
+                keyword_focus=keyword
+            ))
 
         # Limit results
         limited_jobs = job_recommendations[:top_k]
@@ -391,7 +883,7 @@ Requirements:
         # Group by sector
         jobs_by_sector = {}
         for job in limited_jobs:
-            sector = job["sector"]
+            sector = job.sector
             if sector not in jobs_by_sector:
                 jobs_by_sector[sector] = []
             jobs_by_sector[sector].append(job)
@@ -401,7 +893,7 @@ Requirements:
             "job_recommendations": limited_jobs,
             "jobs_by_sector": jobs_by_sector,
             "total_jobs_found": len(job_recommendations),
-            "unique_jobs": len(set(job["title"] for job in job_recommendations)),
+            "unique_jobs": len(set(job.title for job in job_recommendations)),
             "sectors_found": list(jobs_by_sector.keys()),
             "source": "Google Gemini API",
             "primary_source": "Google Gemini (Keyword-Specific)",
@@ -415,60 +907,49 @@ Requirements:
         """Create fallback recommendations for a specific keyword"""
         logger.info(f"Creating keyword-specific fallback for: {keyword}")
         job_recommendations = []
-        keyword_lower = keyword.lower().strip()
-
-        # Find direct matches first
-        jobs_data = []
-        for key, job_list in self.skill_job_mappings.items():
-            if key == keyword_lower or keyword_lower in key or key in keyword_lower:
-                jobs_data = job_list
-                break
-
-        # If no direct match, try partial matches
-        if not jobs_data:
-            for key, job_list in self.skill_job_mappings.items():
-                if any(word in keyword_lower for word in key.split()) or any(word in key for word in keyword_lower.split()):
-                    jobs_data = job_list
-                    break
-
-        # Default jobs if no match
-        if not jobs_data:
-            jobs_data = self._generate_generic_jobs(keyword)
+        jobs_data = self._keyword_jobs(keyword)
+        current_skills_lower = {skill.lower() for skill in context_skills}
 
         # Create detailed job recommendations
         for i, job_data in enumerate(jobs_data[:top_k]):
             job_title = job_data['job']
-            # Get learning path from our database
-            learning_path = self.learning_paths.get(job_title, self._generate_learning_path(job_title, keyword))
+            profile = self._job_profile(job_title)
+            # Get learning path from our database, or fill in the template for this keyword
+            if profile["learning_path"] is not None:
+                learning_path = profile["learning_path"]
+                all_required = profile["required_skills"]
+            else:
+                learning_path = self._fill_learning_path(profile["learning_path_template"], keyword)
+                all_required = [skill for category in learning_path.values() for skill in category]
 
             # Calculate skill gaps
-            current_skills_lower = [skill.lower() for skill in context_skills]
-            all_required = []
-            for category in learning_path.values():
-                if isinstance(category, list):
-                    all_required.extend(category)
-            skill_gaps = [skill for skill in all_required if skill.lower() not in current_skills_lower][:5]
-
-            job_recommendations.append({
-                "title": job_title,
-                "description": job_data['reason'],
-                "related_skill": keyword,
-                "relevance_score": job_data['score'] / 100.0,
-                "rank": i + 1,
-                "required_skills": [keyword] + all_required[:4],
-                "skill_gaps": skill_gaps,
-                "sector": self._determine_job_sector(job_title),
-                "source": "Built-in Fallback",
-                "learning_path": learning_path,
-                "time_to_proficiency": self._estimate_learning_time(job_title, keyword),
-                "difficulty": self._assess_difficulty(job_title, keyword),
-                "keyword_focus": keyword
-            })
+            skill_gaps = []
+            for skill in all_required:
+                if skill.lower() not in current_skills_lower:
+                    skill_gaps.append(skill)
+                    if len(skill_gaps) == 5:
+                        break
+
+            job_recommendations.append(KeywordJobRecommendation(
+                title=job_title,
+                description=job_data['reason'],
+                related_skill=keyword,
+                relevance_score=job_data['score'] / 100.0,
+                rank=i + 1,
+                required_skills=[keyword] + all_required[:4],
+                skill_gaps=skill_gaps,
+                sector=profile["sector"],
+                source="Built-in Fallback",
+                learning_path=learning_path,
+                time_to_proficiency=profile["time_to_proficiency"],
+                difficulty=profile["difficulty"],
+                keyword_focus=keyword
+            ))
 
         # Group by sector
         jobs_by_sector = {}
         for job in job_recommendations:
-            sector = job["sector"]
+            sector = job.sector
             if sector not in jobs_by_sector:
                 jobs_by_sector[sector] = []
             jobs_by_sector[sector].append(job)
@@ -492,31 +973,27 @@ Requirements:
 
     def _generate_learning_path(self, job_title: str, keyword: str) -> Dict[str, List[str]]:
         """Generate a learning path for jobs not in our database"""
+        return self._fill_learning_path(self._learning_path_template(job_title), keyword)
+
+    def _learning_path_template(self, job_title: str) -> Dict[str, List[str]]:
+        """Pick the LEARNING_PATH_TEMPLATES entry for a job title"""
         job_lower = job_title.lower()
         if 'developer' in job_lower or 'engineer' in job_lower:
-            return {
-                'foundations': [keyword, 'Version Control (Git)', 'Problem Solving'],
-                'intermediate': ['Framework/Library', 'Database Basics', 'Testing'],
-                'advanced': ['System Design', 'Performance Optimization', 'Deployment']
-            }
+            return LEARNING_PATH_TEMPLATES['technical']
         elif 'analyst' in job_lower:
-            return {
-                'foundations': [keyword, 'Data Analysis', 'Excel/Spreadsheets'],
-                'intermediate': ['SQL', 'Data Visualization', 'Statistics'],
-                'advanced': ['Advanced Analytics', 'Reporting', 'Domain Expertise']
-            }
+            return LEARNING_PATH_TEMPLATES['analyst']
         elif 'designer' in job_lower:
-            return {
-                'foundations': [keyword, 'Design Principles', 'Color Theory'],
-                'intermediate': ['Prototyping', 'User Research', 'Design Tools'],
-                'advanced': ['Design Systems', 'Accessibility', 'Collaboration']
-            }
+            return LEARNING_PATH_TEMPLATES['designer']
         else:
-            return {
-                'foundations': [keyword, 'Industry Knowledge', 'Communication'],
-                'intermediate': ['Specialized Tools', 'Process Understanding', 'Collaboration'],
-                'advanced': ['Leadership', 'Strategic Thinking', 'Innovation']
-            }
+            return LEARNING_PATH_TEMPLATES['general']
+
+    def _fill_learning_path(self, template: Dict[str, List[str]], keyword: str) -> Dict[str, List[str]]:
+        """Copy a learning path template with the keyword as the first foundation"""
+        return {
+            'foundations': [keyword] + template['foundations'],
+            'intermediate': list(template['intermediate']),
+            'advanced': list(template['advanced'])
+        }
 
     def _estimate_learning_time(self, job_title: str, keyword: str) -> str:
         """Estimate time to become proficient in a role"""
@@ -544,17 +1021,29 @@ Requirements:
 
     # --- Original Methods (for general skill-based recommendations) ---
 
+    def _reserve_request_slot(self) -> float:
+        """Reserve the next request slot and return how long to wait before using it"""
+        with self._rate_limit_lock:
+            current_time = time.time()
+            slot_time = max(current_time, self.last_request_time + self.min_request_interval)
+            self.last_request_time = slot_time
+            return slot_time - current_time
+
     def _rate_limit(self):
         """Implement thread-safe rate limiting"""
         if not self.gemini_available:
             return
-        with self._rate_limit_lock:
-            current_time = time.time()
-            time_since_last = current_time - self.last_request_time
-            if time_since_last < self.min_request_interval:
-                sleep_time = self.min_request_interval - time_since_last
-                time.sleep(sleep_time)
-            self.last_request_time = time.time()
+        sleep_time = self._reserve_request_slot()
+        if sleep_time > 0:
+            time.sleep(sleep_time)
+
+    async def _rate_limit_async(self):
+        """Rate limiting for the async path; shares its schedule with _rate_limit"""
+        if not self.gemini_available:
+            return
+        sleep_time = self._reserve_request_slot()
+        if sleep_time > 0:
+            await asyncio.sleep(sleep_time)
 
     def _create_job_prompt(self, skills: List[str]) -> str:
         """Create a structured prompt for job recommendations"""
@@ -577,69 +1066,401 @@ Requirements:
 - Consider skill combinations
 - Focus on achievable positions"""
 
-    def get_job_recommendations(self, skills: List[str], context: str = None, top_k: int = 10) -> Dict[str, Any]:
-        """Get job recommendations for skills using Gemini API with fallback"""
-        if not skills:
-            return {
-                "success": False,
-                "error": "No skills provided",
-                "source": "Gemini-Only Recommender"
-            }
-
-        # Use fallback if Gemini not available
-        if not self.gemini_available:
-            logger.info("Using fallback recommendations - Gemini not available")
-            return self._create_comprehensive_fallback(skills, top_k)
+    def _create_rerank_prompt(self, skills: List[str], candidates: List[Dict[str, Any]], top_k: int) -> str:
+        """Short prompt asking Gemini to re-rank and explain the local ranking's top candidates"""
+        skills_text = ", ".join(skills[:12])
+        jobs_text = "; ".join(f"{candidate['job']} ({', '.join(candidate['matched_skills'][:3])})" for candidate in candidates)
+        return f"""Rank jobs for a candidate with these skills: {skills_text}
+Candidates (matching skills): {jobs_text}
+Return ONLY JSON: {{"overall_top_jobs": [{{"job": "...", "skills": ["..."], "score": 90, "reason": "..."}}]}}
+Best first, at most {top_k} jobs, taken from the candidates; add a job not listed only if it clearly fits better.
+Scores 70-95; reasons under 15 words, naming the skills that fit."""
+
+    @property
+    def job_ranker(self) -> JobRanker:
+        """Local ranking model over the skill mappings and learning paths, built on first use"""
+        if self._job_ranker is None:
+            with self._ranker_lock:
+                if self._job_ranker is None:
+                    self._job_ranker = JobRanker(self.skill_job_mappings, self.learning_paths)
+        return self._job_ranker
+
+    @staticmethod
+    def _skill_strings(skills: List[str]) -> List[str]:
+        """The skills that are strings; other items of a JSON array are skipped"""
+        return [skill for skill in skills or [] if isinstance(skill, str)]
+
+    def _rank_locally(self, skills: List[str], top_k: int) -> List[Dict[str, Any]]:
+        """Local ranking, deep enough to give Gemini its candidates"""
+        return self.job_ranker.rank(skills, max(top_k, self.rerank_candidates))
+
+    def _needs_gemini(self, skills: List[str], ranked: List[Dict[str, Any]], context: str = None) -> bool:
+        """Whether a skill-based request goes to Gemini, per rerank_policy"""
+        if self.rerank_policy == "never":
+            return False
+        if self.rerank_policy == "always" or context:
+            return True
+        return (not ranked or ranked[0]["score"] < self.rerank_below
+                or self.job_ranker.coverage(skills) < self.rerank_min_coverage)
 
+    def get_job_recommendations(self, skills: List[str], context: str = None, top_k: int = 10) -> Dict[str, Any]:
+        """Job recommendations for skills: ranked locally, re-ranked by Gemini when the ranking is unsure"""
+        skills = self._skill_strings(skills)
+        if not skills or not self.gemini_available or self.circuit_breaker.is_open():
+            return self._job_result_without_gemini(skills, top_k)
+        ranked = self._rank_locally(skills, top_k)
+        if not self._needs_gemini(skills, ranked, context):
+            return self.local_recommendations(skills, top_k, ranked)
+        return self._run_coroutine(self._gemini_job_recommendations(skills, context, top_k, ranked))
+
+    async def get_job_recommendations_async(self, skills: List[str], context: str = None, top_k: int = 10) -> Dict[str, Any]:
+        """Async variant of get_job_recommendations using generate_content_async"""
+        skills = self._skill_strings(skills)
+        if not skills or not self.gemini_available or self.circuit_breaker.is_open():
+            return self._job_result_without_gemini(skills, top_k)
+        ranked = self._rank_locally(skills, top_k)
+        if not self._needs_gemini(skills, ranked, context):
+            return self.local_recommendations(skills, top_k, ranked)
+        return await self._gemini_job_recommendations(skills, context, top_k, ranked)
+
+    async def _gemini_job_recommendations(self, skills: List[str], context: str, top_k: int, ranked: List[Dict[str, Any]]) -> Dict[str, Any]:
+        cache_key = self._cache_key("skills", tuple(skills), context, top_k)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        return await self._hedge(
+            self._job_recommendations_from_gemini(skills, context, top_k, ranked, cache_key),
+            lambda: self.local_recommendations(skills, top_k, ranked, error="Gemini exceeded latency budget")
+        )
+
+    async def _job_recommendations_from_gemini(self, skills: List[str], context: str, top_k: int,
+                                               ranked: List[Dict[str, Any]], cache_key: tuple) -> Dict[str, Any]:
+        """Run the Gemini call for a skill list, caching the result or falling back on error"""
         try:
-            # Create prompt
-            prompt = self._create_job_prompt(skills)
+            # Re-rank the local candidates; only skill lists the local model knows nothing of get the open prompt
+            candidates = ranked[:self.rerank_candidates]
+            prompt = self._create_rerank_prompt(skills, candidates, top_k) if candidates else self._create_job_prompt(skills)
             if context:
                 prompt += f"\nAdditional context: {context[:200]}"
 
-            # Rate limiting
-            self._rate_limit()
-
-            # Generate recommendations
-            logger.info(f"Requesting job recommendations from Gemini for {len(skills)} skills")
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    top_p=0.8,
-                    top_k=40,
-                    max_output_tokens=1024,
-                )
-            )
+            # Generate recommendations (rate limited inside _generate_async)
+            logger.info(f"Requesting job recommendations from Gemini for {len(skills)} skills ({len(candidates)} candidates)")
+            response = await self._generate_async(prompt, max_output_tokens=512 if candidates else 1024,
+                                                  response_schema=OVERALL_JOBS_SCHEMA)
 
             if not response or not response.text:
                 raise ValueError("Empty response from Gemini")
 
             # Parse JSON response
-            cleaned_response = self._clean_json_response(response.text)
-            try:
-                recommendations = json.loads(cleaned_response)
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON parse error: {e}. Response: {response.text[:200]}")
-                raise
+            recommendations = self._parse_json_response(response.text)
 
             # Format for consistent output
-            formatted = self._format_gemini_response(recommendations, skills, top_k)
+            if candidates:
+                formatted = self._merge_reranked(recommendations, skills, top_k, ranked)
+            else:
+                formatted = self._format_gemini_response(recommendations, skills, top_k)
             logger.info(f"Successfully generated Gemini recommendations for {len(skills)} skills")
+            self._cache_put(cache_key, formatted)
             return formatted
 
         except Exception as e:
             logger.error(f"Gemini API error: {e}")
-            return self._create_comprehensive_fallback(skills, top_k, error=str(e))
+            return self.local_recommendations(skills, top_k, ranked, error=str(e))
+
+    def _job_result_without_gemini(self, skills: List[str], top_k: int) -> Dict[str, Any]:
+        """Response for skill-based requests that never reach Gemini"""
+        if not skills:
+            return {
+                "success": False,
+                "error": "No skills provided",
+                "source": "Gemini-Only Recommender"
+            }
+        if self.gemini_available:
+            return self.local_recommendations(skills, top_k, error="Gemini circuit breaker open")
+        return self.local_recommendations(skills, top_k)
+
+    def local_recommendations(self, skills: List[str], top_k: int = 10, ranked: List[Dict[str, Any]] = None,
+                              error: str = None) -> Dict[str, Any]:
+        """Job recommendations from the local ranking model alone"""
+        skills = self._skill_strings(skills)
+        if ranked is None:
+            ranked = self.job_ranker.rank(skills, top_k)
+        job_recommendations = [self._ranked_job(candidate, rank, "Local Ranker")
+                               for rank, candidate in enumerate(ranked[:top_k], start=1)]
+        if not job_recommendations:
+            # None of the skills is in the vocabulary: generic roles for the first few
+            seen_jobs = set()
+            for skill in skills[:3]:
+                for job_data in self._generate_generic_jobs(skill):
+                    if job_data['job'] in seen_jobs or len(job_recommendations) == top_k:
+                        continue
+                    seen_jobs.add(job_data['job'])
+                    job_recommendations.append(RankedJobRecommendation(
+                        title=job_data['job'],
+                        description=job_data['reason'],
+                        related_skill=skill,
+                        relevance_score=job_data['score'] / 100.0,
+                        rank=len(job_recommendations) + 1,
+                        required_skills=[skill],
+                        sector=self._job_profile(job_data['job'])["sector"],
+                        source="Generic Fallback"
+                    ))
+        return self._skill_job_result(
+            job_recommendations, skills,
+            source="Local Ranker",
+            primary_source="Local Ranking Model",
+            skills_matched=round(self.job_ranker.coverage(skills), 3),
+            gemini_available=self.gemini_available,
+            error=error
+        )
+
+    def _ranked_job(self, candidate: Dict[str, Any], rank: int, source: str, score: float = None,
+                    reason: str = None) -> RankedJobRecommendation:
+        """RankedJobRecommendation for a candidate of the local ranking"""
+        return RankedJobRecommendation(
+            title=candidate["job"],
+            description=reason or candidate["reason"] or f"Matches your {', '.join(candidate['matched_skills'][:3])} skills",
+            related_skill=candidate["related_skill"],
+            relevance_score=score if score is not None else JobRanker.relevance(candidate["score"]),
+            rank=rank,
+            required_skills=candidate["job_skills"][:5],
+            skill_gaps=candidate["missing_skills"][:5],
+            sector=self._job_profile(candidate["job"])["sector"],
+            source=source
+        )
+
+    def _merge_reranked(self, gemini_data: Dict, skills: List[str], top_k: int, ranked: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Gemini's order and reasons over the local candidates, filled up from the local ranking"""
+        candidates = {candidate["job"].lower(): candidate for candidate in ranked}
+        job_recommendations = []
+        seen_jobs = set()
+        for job_data in gemini_data.get("overall_top_jobs", []):
+            title = str(job_data.get("job") or "").strip()
+            if not title or title.lower() in seen_jobs:
+                continue
+            seen_jobs.add(title.lower())
+            score = job_data.get("score", 85) / 100.0
+            candidate = candidates.get(title.lower())
+            if candidate is not None:
+                job_recommendations.append(self._ranked_job(candidate, len(job_recommendations) + 1, "Google Gemini",
+                                                            score=score, reason=job_data.get("reason")))
+            else:
+                job_recommendations.append(RankedJobRecommendation(
+                    title=title,
+                    description=job_data.get("reason", "AI-recommended position based on skill match"),
+                    related_skill="Multiple Skills",
+                    relevance_score=score,
+                    rank=len(job_recommendations) + 1,
+                    required_skills=job_data.get("skills", skills[:3]),
+                    sector=self._job_profile(title)["sector"],
+                    source="Google Gemini"
+                ))
+        for candidate in ranked:
+            if candidate["job"].lower() not in seen_jobs:
+                job_recommendations.append(self._ranked_job(candidate, len(job_recommendations) + 1, "Local Ranker"))
+        return self._skill_job_result(
+            job_recommendations[:top_k], skills,
+            source="Google Gemini API",
+            primary_source="Google Gemini (re-ranked)",
+            reranked=True,
+            gemini_available=True
+        )
+
+    # --- Async client plumbing ---
+
+    def _generation_config(self, max_output_tokens: int, response_schema: Dict = None):
+        """Generation settings shared by every Gemini call"""
+        config = dict(
+            temperature=0.3,
+            top_p=0.8,
+            top_k=40,
+            max_output_tokens=max_output_tokens,
+        )
+        if self.use_structured_output and response_schema is not None:
+            config.update(response_mime_type="application/json", response_schema=response_schema)
+        return genai.types.GenerationConfig(**config)
+
+    async def _generate_async(self, prompt: str, max_output_tokens: int, response_schema: Dict = None):
+        """Issue one rate-limited, concurrency-capped generate_content_async call"""
+        if not self.circuit_breaker.allow_request():
+            raise GeminiCircuitOpenError("Gemini circuit breaker open")
+        outcome_recorded = False
+        try:
+            async with self._request_semaphore():
+                await self._rate_limit_async()
+                started = time.monotonic()
+                try:
+                    response = await self.model.generate_content_async(
+                        prompt,
+                        generation_config=self._generation_config(max_output_tokens, response_schema)
+                    )
+                except Exception:
+                    outcome_recorded = True
+                    self.circuit_breaker.record_failure(time.monotonic() - started)
+                    raise
+                outcome_recorded = True
+                self.circuit_breaker.record_success(time.monotonic() - started)
+                return response
+        finally:
+            # CancelledError is a BaseException: without this a cancelled probe holds its slot forever
+            if not outcome_recorded:
+                self.circuit_breaker.release_probe()
+
+    async def _hedge(self, gemini_call, fallback):
+        """Await a Gemini call, or return fallback() if it misses the hedge_after_seconds budget.
+
+        The Gemini task keeps running after a hedge; its result lands in the response cache.
+        """
+        if not self.hedge_after_seconds:
+            return await gemini_call
+        task = asyncio.ensure_future(gemini_call)
+        done, _ = await asyncio.wait({task}, timeout=self.hedge_after_seconds)
+        if task in done:
+            return task.result()
+        logger.info(f"Gemini exceeded {self.hedge_after_seconds}s latency budget; serving local fallback")
+        self._pending_hedges.add(task)
+        task.add_done_callback(self._pending_hedges.discard)
+        return fallback()
+
+    @staticmethod
+    def _cache_key(*parts) -> Optional[tuple]:
+        """Response cache key for the request parameters; None (not cached) if one can't be hashed"""
+        try:
+            hash(parts)
+        except TypeError:
+            return None
+        return parts
+
+    def _cache_get(self, key: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached Gemini response if present and fresh"""
+        if key is None:
+            return None
+        with self._cache_lock:
+            entry = self._response_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.cache_ttl_seconds:
+                del self._response_cache[key]
+                return None
+            self._response_cache.move_to_end(key)
+        # Callers update the top-level dict in place, so hand out a copy
+        return dict(value)
+
+    def _cache_put(self, key: Optional[tuple], value: Dict[str, Any]):
+        if key is None:
+            return
+        with self._cache_lock:
+            self._response_cache[key] = (time.monotonic(), dict(value))
+            self._response_cache.move_to_end(key)
+            while len(self._response_cache) > self.cache_max_entries:
+                self._response_cache.popitem(last=False)
+
+    def _start_event_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop that owns the async Gemini client (once)"""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="gemini-async-loop", daemon=True)
+                thread.start()
+                self._loop_thread = thread
+                self._loop = loop
+            return self._loop
+
+    def _request_semaphore(self) -> asyncio.Semaphore:
+        """The running loop's semaphore capping concurrent Gemini calls, created on first use"""
+        loop = asyncio.get_running_loop()
+        with self._loop_lock:
+            semaphore = self._request_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._request_semaphores[loop] = asyncio.Semaphore(self.max_concurrent_requests)
+            return semaphore
+
+    def _run_coroutine(self, coro):
+        """Run a coroutine on the shared event loop and block until it finishes"""
+        loop = self._start_event_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def close(self):
+        """Stop the background event loop and release the async client's connections"""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            if loop is None:
+                return
+            self._loop = None
+            self._loop_thread = None
+        # Joined outside the lock: coroutines still running on the loop take it (_request_semaphore)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        if thread.is_alive():
+            logger.warning("Gemini event loop did not stop within 5s; leaving it to exit on its own")
+            return
+        loop.close()
+
+    def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
+        """Decode the JSON object in a Gemini response, salvaging complete entries if it was truncated"""
+        cleaned_response = self._clean_json_response(response_text)
+        try:
+            # raw_decode stops at the end of the first object, so trailing fences or chatter are ignored
+            recommendations, _ = json.JSONDecoder().raw_decode(cleaned_response)
+            return recommendations
+        except json.JSONDecodeError as e:
+            salvaged = self._salvage_truncated_json(cleaned_response)
+            if salvaged is None:
+                logger.warning(f"JSON parse error: {e}. Response: {response_text[:200]}")
+                raise
+            logger.warning(f"Gemini response was truncated ({e}); salvaged the complete entries")
+            return salvaged
+
+    def _salvage_truncated_json(self, text: str) -> Optional[Dict[str, Any]]:
+        """Recover a JSON object cut off mid-stream, keeping only fully received array entries.
+
+        Scans the text once, tracking open containers outside of strings. Every time a
+        container closes directly inside an array (one complete job entry) the prefix up to
+        that point, plus the closers still open, is a valid document. The latest one wins.
+        """
+        open_containers = []
+        cut_points = []
+        in_string = False
+        escaped = False
+        for i, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                open_containers.append('}')
+            elif char == '[':
+                open_containers.append(']')
+            elif char in '}]':
+                if not open_containers:
+                    break
+                open_containers.pop()
+                if not open_containers:
+                    break
+                if open_containers[-1] == ']':
+                    cut_points.append((i + 1, ''.join(reversed(open_containers))))
+
+        for end, closers in reversed(cut_points):
+            try:
+                salvaged = json.loads(text[:end] + closers)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(salvaged, dict):
+                return salvaged
+        return None
 
     def _clean_json_response(self, response_text: str) -> str:
-        """Clean and extract JSON from Gemini response"""
-        response_text = re.sub(r'```json\s*', '', response_text)
-        response_text = re.sub(r'```\s*', '', response_text)
+        """Drop code fences and any preamble before the first JSON object"""
         response_text = response_text.strip()
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            return json_match.group(0)
+        json_start = response_text.find('{')
+        if json_start != -1:
+            return response_text[json_start:]
         return response_text
 
     def _format_gemini_response(self, gemini_data: Dict, original_skills: List[str], top_k: int) -> Dict[str, Any]:
@@ -648,111 +1469,39 @@ Requirements:
         # Process overall top jobs
         overall_jobs = gemini_data.get("overall_top_jobs", [])
         for i, job_data in enumerate(overall_jobs):
-            job_recommendations.append({
-                "title": job_data.get("job", "Unknown Job"),
-                "description": job_data.get("reason", "AI-recommended position based on skill match"),
-                "related_skill": "Multiple Skills",
-                "relevance_score": job_data.get("score", 85) / 100.0,
-                "rank": i + 1,
-                "required_skills": job_data.get("skills", original_skills[:3]),
-                "skill_gaps": [],
-                "sector": self._determine_job_sector(job_data.get("job", "")),
-                "source": "Google Gemini"
-            })
-
-        # Limit results
-        limited_jobs = job_recommendations[:top_k]
-
-        # Group by sector
+            job_recommendations.append(RankedJobRecommendation(
+                title=job_data.get("job", "Unknown Job"),
+                description=job_data.get("reason", "AI-recommended position based on skill match"),
+                related_skill="Multiple Skills",
+                relevance_score=job_data.get("score", 85) / 100.0,
+                rank=i + 1,
+                required_skills=job_data.get("skills", original_skills[:3]),
+                sector=self._job_profile(job_data.get("job", ""))["sector"],
+                source="Google Gemini"
+            ))
+
+        return self._skill_job_result(
+            job_recommendations[:top_k], original_skills,
+            total_jobs_found=len(job_recommendations),
+            source="Google Gemini API",
+            primary_source="Google Gemini",
+            gemini_available=True
+        )
+
+    def _skill_job_result(self, job_recommendations: List[JobRecommendation], skills: List[str], **fields) -> Dict[str, Any]:
+        """Result dict for a skill-based request, with the jobs grouped by sector"""
         jobs_by_sector = {}
-        for job in limited_jobs:
-            sector = job["sector"]
-            if sector not in jobs_by_sector:
-                jobs_by_sector[sector] = []
-            jobs_by_sector[sector].append(job)
-
-        return {
-            "success": True,
-            "job_recommendations": limited_jobs,
-            "jobs_by_sector": jobs_by_sector,
-            "total_jobs_found": len(job_recommendations),
-            "unique_jobs": len(set(job["title"] for job in job_recommendations)),
-            "sectors_found": list(jobs_by_sector.keys()),
-            "source": "Google Gemini API",
-            "primary_source": "Google Gemini",
-            "skills_analyzed": original_skills,
-            "gemini_available": True
-        }
-
-    def _create_comprehensive_fallback(self, skills: List[str], top_k: int = 10, error: str = None) -> Dict[str, Any]:
-        """Create comprehensive fallback recommendations when Gemini is unavailable"""
-        logger.info(f"Creating comprehensive fallback recommendations for {len(skills)} skills")
-        job_recommendations = []
-
-        # Generate recommendations for each skill
-        for skill in skills[:6]:
-            skill_lower = skill.lower().strip()
-            jobs_data = []
-            # Find matching jobs from our comprehensive mapping
-            for key, job_list in self.skill_job_mappings.items():
-                if key in skill_lower or any(word in skill_lower for word in key.split()):
-                    jobs_data = job_list
-                    break
-
-            # Default jobs if no specific match
-            if not jobs_data:
-                jobs_data = self._generate_generic_jobs(skill)
-
-            # Create job recommendations for this skill
-            for job_data in jobs_data[:2]:
-                job_recommendations.append({
-                    "title": job_data['job'],
-                    "description": job_data['reason'],
-                    "related_skill": skill,
-                    "relevance_score": job_data['score'] / 100.0,
-                    "rank": jobs_data.index(job_data) + 1,
-                    "required_skills": [skill],
-                    "skill_gaps": [],
-                    "sector": self._determine_job_sector(job_data['job']),
-                    "source": "Comprehensive Fallback"
-                })
-
-        # Add combination jobs
-        combination_jobs = self._generate_combination_jobs(skills[:4])
-        job_recommendations.extend(combination_jobs)
-
-        # Remove duplicates and sort
-        seen_jobs = set()
-        unique_jobs = []
         for job in job_recommendations:
-            if job["title"] not in seen_jobs:
-                seen_jobs.add(job["title"])
-                unique_jobs.append(job)
-
-        unique_jobs.sort(key=lambda x: x["relevance_score"], reverse=True)
-        limited_jobs = unique_jobs[:top_k]
-
-        # Group by sector
-        jobs_by_sector = {}
-        for job in limited_jobs:
-            sector = job["sector"]
-            if sector not in jobs_by_sector:
-                jobs_by_sector[sector] = []
-            jobs_by_sector[sector].append(job)
-
+            jobs_by_sector.setdefault(job.sector, []).append(job)
         return {
             "success": True,
-            "job_recommendations": limited_jobs,
+            "job_recommendations": job_recommendations,
             "jobs_by_sector": jobs_by_sector,
-            "total_jobs_found": len(unique_jobs),
-            "unique_jobs": len(unique_jobs),
+            "total_jobs_found": len(job_recommendations),
+            "unique_jobs": len(set(job.title for job in job_recommendations)),
             "sectors_found": list(jobs_by_sector.keys()),
-            "source": "Comprehensive Fallback",
-            "primary_source": "Built-in Fallback Mapping",
             "skills_analyzed": skills,
-            "note": "Generated using comprehensive built-in mappings",
-            "gemini_available": self.gemini_available,
-            "error": error
+            **fields
         }
 
     def _generate_generic_jobs(self, skill: str) -> List[Dict]:
@@ -774,42 +1523,6 @@ Requirements:
                 {'job': f'{skill} Consultant', 'score': 75, 'reason': f'Consulting role in {skill} domain'}
             ]
 
-    def _generate_combination_jobs(self, skills: List[str]) -> List[Dict]:
-        """Generate jobs that combine multiple skills"""
-        combination_jobs = []
-        skill_set = set(skill.lower() for skill in skills)
-
-        # Frontend combinations
-        if any(frontend in skill_set for frontend in ['react', 'javascript', 'html', 'css']):
-            combination_jobs.append({
-                "title": "Frontend Developer",
-                "description": "Combines multiple frontend technologies",
-                "related_skill": "Multiple Skills",
-                "relevance_score": 0.88,
-                "rank": 1,
-                "required_skills": [skill for skill in skills if skill.lower() in ['react', 'javascript', 'html', 'css']][:3],
-                "skill_gaps": [],
-                "sector": "Technology",
-                "source": "Skill Combination"
-            })
-
-        # Full-stack combinations
-        if (any(frontend in skill_set for frontend in ['react', 'javascript']) and 
-            any(backend in skill_set for backend in ['python', 'node.js', 'java'])):
-            combination_jobs.append({
-                "title": "Full Stack Developer",
-                "description": "Combines frontend and backend skills",
-                "related_skill": "Multiple Skills",
-                "relevance_score": 0.92,
-                "rank": 1,
-                "required_skills": skills[:3],
-                "skill_gaps": [],
-                "sector": "Technology",
-                "source": "Skill Combination"
-            })
-
-        return combination_jobs
-
     def _determine_job_sector(self, job_title: str) -> str:
         """Determine sector based on job title"""
         job_lower = job_title.lower()
@@ -0,0 +1,51 @@
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py doc_test:app
+
+The app is loaded and warmed up once in the master, then forked, so workers share the loaded
+libraries and read-only tables copy-on-write (see warmup.py). Set WARM_UP=0 to skip the warm-up.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# OCR of a large scan can take well over gunicorn's default 30s
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+preload_app = True
+# Request threads mostly wait: extraction runs on the worker's process pool and recommendations on
+# its thread pool (stage_executors.py), and admission.py bounds how many analyses are admitted
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+
+# OCR parallelism comes from running several tesseract processes at once; stop each one from also
+# spawning its own OpenMP threads, which oversubscribes the cores and is slower overall
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+# The OCR thread budget (ocr_router.py): the cores split between the workers, then each worker's
+# share split between its extraction processes (doc_test._init_extraction_process)
+os.environ.setdefault('OCR_THREADS', str(max(1, (os.cpu_count() or 2) // workers)))
+
+# Each worker connects to Gemini itself after fork; see post_fork
+os.environ.setdefault('GEMINI_CONNECT_AFTER_FORK', '1')
+WARM_UP = os.environ.get('WARM_UP', '1') != '0'
+
+# No collections in the master until the warm-up state is frozen: a collection writes to the
+# GC header of every tracked object, which would copy those pages into each forked worker
+gc.disable()
+
+
+def on_starting(server):
+    import doc_test
+    import warmup
+    if WARM_UP:
+        warmup.warm_up(doc_test.document_processor)
+    warmup.freeze()
+    # Frozen objects are never scanned again, so collecting from here on keeps them shared
+    gc.enable()
+
+
+def post_fork(server, worker):
+    import doc_test
+    # Fork the extraction processes from this worker while it is still single-threaded
+    doc_test.document_processor.executors.start()
+    recommender = doc_test.document_processor.job_recommender.gemini_recommender
+    if recommender is not None and recommender.initializing:
+        recommender.connect(background=True)
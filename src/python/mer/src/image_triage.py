@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import re
+import time
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+from lazy_imports import lazy_module
+from mapped_document import DocumentSource, open_binary, read_image
+
+cv2 = lazy_module('cv2')
+np = lazy_module('numpy')
+Image = lazy_module('PIL.Image')
+
+logger = logging.getLogger(__name__)
+
+# EXIF tags that can carry free text
+EXIF_IMAGE_DESCRIPTION = 0x010E
+EXIF_XP_COMMENT = 0x9C9C
+EXIF_XP_SUBJECT = 0x9C9F
+EXIF_IFD = 0x8769
+EXIF_USER_COMMENT = 0x9286
+PNG_TEXT_KEYS = ('Description', 'Comment', 'Text', 'Title', 'Subject')
+XMP_TEXT_PATTERN = re.compile(r'<dc:(description|title|subject)\b[^>]*>(.*?)</dc:\1>', re.DOTALL)
+XMP_JPEG_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+
+# Fast-path actions, in increasing order of cost
+ACTION_EMBEDDED = "embedded"    # use text stored in the file's metadata, no OCR
+ACTION_SKIP = "skip"            # no OCR: nothing worth reading
+ACTION_DOWNGRADE = "downgrade"  # single whole-page pass, no layout analysis or confidence pass
+ACTION_FULL = "full"
+
+
+class ImageTriage:
+    """Cheap pre-classifier that decides how much OCR an uploaded image deserves.
+
+    Works on a reduced-resolution decode: blank pages have almost no contrast, photos are
+    dominated by mid-tones and have few glyph-sized connected components, logos and graphics
+    have a few large components, and text pages have many small ones of similar height.
+    Metadata text (EXIF, PNG text chunks, XMP) long enough to stand in for the page wins
+    outright. Thresholds are deliberately conservative: only clear non-text images skip OCR.
+    """
+
+    def __init__(self, thumbnail_size: int = 800, min_embedded_words: int = 30, min_text_components: int = 5, sparse_text_components: int = 80):
+        self.thumbnail_size = thumbnail_size
+        self.min_embedded_words = min_embedded_words
+        self.min_text_components = min_text_components
+        self.sparse_text_components = sparse_text_components
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._seconds = 0.0
+
+    def classify(self, image_path: DocumentSource) -> Dict[str, Any]:
+        """Return {"action", "reason", "stats"} plus "text" when the action is embedded"""
+        started = time.perf_counter()
+        try:
+            decision = self._classify(image_path)
+        except Exception as e:
+            logger.warning(f"Image triage failed, using full OCR: {str(e)}")
+            decision = {"action": ACTION_FULL, "reason": "triage_failed", "stats": {}}
+        elapsed = time.perf_counter() - started
+        decision["seconds"] = round(elapsed, 4)
+        with self._lock:
+            self._counts[decision["reason"]] = self._counts.get(decision["reason"], 0) + 1
+            self._seconds += elapsed
+        return decision
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                "images": total,
+                "reasons": dict(self._counts),
+                "total_seconds": round(self._seconds, 3),
+                "avg_seconds": round(self._seconds / total, 4) if total else 0.0
+            }
+
+    def reset_metrics(self):
+        self.take_metrics()
+
+    def take_metrics(self) -> Dict[str, Any]:
+        """Raw counters accumulated since the last call, resetting them (for aggregation across processes)"""
+        with self._lock:
+            taken = {"reasons": self._counts, "seconds": self._seconds}
+            self._counts = {}
+            self._seconds = 0.0
+        return taken
+
+    def merge_metrics(self, taken: Dict[str, Any]):
+        """Add counters returned by take_metrics() in another process"""
+        with self._lock:
+            for reason, count in taken["reasons"].items():
+                self._counts[reason] = self._counts.get(reason, 0) + count
+            self._seconds += taken["seconds"]
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def _classify(self, image_path: DocumentSource) -> Dict[str, Any]:
+        embedded = self.embedded_text(image_path)
+        if embedded and len(embedded.split()) >= self.min_embedded_words:
+            return {"action": ACTION_EMBEDDED, "reason": "embedded_text", "text": embedded, "stats": {"embedded_words": len(embedded.split())}}
+
+        thumbnail = self._thumbnail(image_path)
+        if thumbnail is None:
+            return {"action": ACTION_FULL, "reason": "unreadable_thumbnail", "stats": {}}
+        stats = self.text_density(thumbnail)
+
+        if stats["contrast"] < 8 or not stats["ink_components"]:
+            return {"action": ACTION_SKIP, "reason": "blank_page", "stats": stats}
+        if stats["text_components"] < self.min_text_components:
+            reason = "photo" if stats["midtone_ratio"] > 0.5 else "graphic"
+            return {"action": ACTION_SKIP, "reason": reason, "stats": stats}
+        if stats["text_components"] < self.sparse_text_components or stats["midtone_ratio"] > 0.5:
+            # Some text (a caption, a photo of a card): worth one plain pass, not the full pipeline
+            return {"action": ACTION_DOWNGRADE, "reason": "sparse_text", "stats": stats}
+        return {"action": ACTION_FULL, "reason": "text", "stats": stats}
+
+    def text_density(self, gray: np.ndarray) -> Dict[str, Any]:
+        """Contrast, edge density and glyph-like connected-component counts of a grayscale thumbnail"""
+        height, width = gray.shape[:2]
+        contrast = float(gray.std())
+        midtone_ratio = float(np.count_nonzero((gray > 40) & (gray < 215))) / gray.size
+        edges = cv2.Canny(gray, 50, 150)
+        edge_density = float(np.count_nonzero(edges)) / edges.size
+
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        if np.count_nonzero(ink) > ink.size / 2:
+            ink = cv2.bitwise_not(ink)
+        count, labels, component_stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+        # Edge pixels touching each component: printed glyphs have sharp outlines, the blobs
+        # Otsu carves out of a smooth photo mostly do not
+        edge_support = np.bincount(labels[cv2.dilate(edges, np.ones((3, 3), np.uint8)) > 0], minlength=count)[1:]
+        # Skip label 0 (background)
+        widths = component_stats[1:, cv2.CC_STAT_WIDTH]
+        heights = component_stats[1:, cv2.CC_STAT_HEIGHT]
+        areas = component_stats[1:, cv2.CC_STAT_AREA]
+        noise = areas < 4
+        fill = areas / np.maximum(widths * heights, 1)
+        # Glyph or word sized: short relative to the page, not a long rule, partly filled box
+        glyphs = (~noise & (heights >= 3) & (heights <= max(4, height * 0.06)) & (widths <= width * 0.5)
+                  & (fill > 0.1) & (fill < 0.95) & (edge_support >= areas * 0.3))
+        glyph_heights = heights[glyphs]
+        return {
+            "contrast": round(contrast, 2),
+            "midtone_ratio": round(midtone_ratio, 3),
+            "edge_density": round(edge_density, 4),
+            "ink_components": int(np.count_nonzero(~noise)),
+            "text_components": int(np.count_nonzero(glyphs)),
+            "median_glyph_height": int(np.median(glyph_heights)) if glyph_heights.size else 0
+        }
+
+    def embedded_text(self, image_path: DocumentSource) -> Optional[str]:
+        """Longest free-text field from EXIF, PNG text chunks or XMP, if any"""
+        candidates = []
+        with open_binary(image_path) as stream, Image.open(stream) as image:
+            exif = image.getexif()
+            for tag in (EXIF_IMAGE_DESCRIPTION, EXIF_XP_COMMENT, EXIF_XP_SUBJECT):
+                candidates.append(self._decode_exif_value(exif.get(tag), utf16=tag != EXIF_IMAGE_DESCRIPTION))
+            try:
+                user_comment = exif.get_ifd(EXIF_IFD).get(EXIF_USER_COMMENT)
+            except Exception:
+                user_comment = None
+            if isinstance(user_comment, bytes):
+                # 8-byte character-code prefix, e.g. b'UNICODE\0' or b'ASCII\0\0\0'
+                encoding = 'utf-16' if user_comment[:7] == b'UNICODE' else 'utf-8'
+                candidates.append(user_comment[8:].decode(encoding, errors='ignore'))
+            elif isinstance(user_comment, str):
+                candidates.append(user_comment)
+
+            for key in PNG_TEXT_KEYS:
+                if isinstance(image.info.get(key), str):
+                    candidates.append(image.info[key])
+            xmp = image.info.get('xmp') or image.info.get('XML:com.adobe.xmp')
+            if xmp is None:
+                for marker, payload in getattr(image, 'applist', []):
+                    if marker == 'APP1' and payload.startswith(XMP_JPEG_HEADER):
+                        xmp = payload[len(XMP_JPEG_HEADER):]
+                        break
+            if xmp:
+                candidates.extend(self._xmp_text(xmp))
+
+        candidates = [' '.join(text.replace('\x00', ' ').split()) for text in candidates if text]
+        return max(candidates, key=len) if candidates else None
+
+    def _thumbnail(self, image_path: DocumentSource) -> Optional[np.ndarray]:
+        # Reduced decode is much cheaper than a full decode for JPEG (DCT scaling)
+        gray = read_image(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+        if gray is None:
+            try:
+                with open_binary(image_path) as stream, Image.open(stream) as image:
+                    image.draft('L', (self.thumbnail_size, self.thumbnail_size))
+                    gray = np.array(image.convert('L'))
+            except Exception:
+                return None
+        longest = max(gray.shape[:2])
+        if longest > self.thumbnail_size:
+            scale = self.thumbnail_size / longest
+            gray = cv2.resize(gray, (max(1, int(gray.shape[1] * scale)), max(1, int(gray.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _decode_exif_value(self, value, utf16: bool) -> Optional[str]:
+        if isinstance(value, bytes):
+            return value.decode('utf-16-le' if utf16 else 'utf-8', errors='ignore')
+        if isinstance(value, tuple) and utf16:
+            return bytes(value).decode('utf-16-le', errors='ignore')
+        return value if isinstance(value, str) else None
+
+    def _xmp_text(self, xmp) -> List[str]:
+        if isinstance(xmp, bytes):
+            xmp = xmp.decode('utf-8', errors='ignore')
+        return [re.sub(r'<[^>]+>', ' ', body) for _, body in XMP_TEXT_PATTERN.findall(xmp)]
@@ -0,0 +1,173 @@
+"""Local job ranking: TF-IDF over the skills each known job asks for, scored with NumPy.
+
+Every job title in `skill_job_mappings` and `learning_paths` becomes a row of a job x skill
+matrix. A mapping entry contributes its score (0-1) for that skill; a learning path contributes
+0.9 for its core skills and 0.6 for the rest. Columns are weighted by inverse document frequency,
+so a skill most jobs share (Git, Docker) counts for less than one that singles a job out
+(Figma, PyTorch), and rows are L2-normalized. A skill list is turned into the same kind of
+vector and every job is scored in one matrix-vector product (cosine similarity), so ranking
+against the full extracted skill set costs microseconds rather than a model call.
+
+Skills are matched to the vocabulary exactly ("machine learning", "node.js" or just "node") or,
+for longer phrases, when every word of a vocabulary skill appears in them ("Python programming"
+-> python); "java" does not match "javascript".
+"""
+from __future__ import annotations
+
+import re
+import threading
+from typing import List, Dict, Any, Tuple
+
+from lazy_imports import lazy_module
+
+np = lazy_module('numpy')
+
+# Weight of a learning-path skill for its job, by category
+CORE_SKILL_WEIGHT = 0.9
+PATH_SKILL_WEIGHT = 0.6
+SKILL_SEPARATORS = re.compile(r'[/(),]')
+
+
+def skill_terms(name: str) -> List[Tuple[str, str]]:
+    """(term, spelling) for each skill a name lists: 'React/Vue/Angular' -> react, vue, angular;
+    'Testing (pytest)' -> testing, pytest"""
+    terms = []
+    for part in SKILL_SEPARATORS.split(name):
+        spelling = ' '.join(part.split())
+        if spelling:
+            terms.append((spelling.lower(), spelling))
+    return terms
+
+
+class JobRanker:
+    """Ranks known job titles against a skill list by TF-IDF cosine similarity"""
+
+    def __init__(self, skill_job_mappings: Dict[str, List[Dict]], learning_paths: Dict[str, Dict[str, List[str]]],
+                 cache_limit: int = 4096):
+        weights = {}
+        # Reason given by the mapping for a (job, term) pair, used to explain a match
+        self.reasons = {}
+        # How each term is shown in required skills and gaps: mapping keys are lowercase,
+        # learning paths spell skills properly ('PostgreSQL') and win
+        self.display_names = {}
+
+        def add(job: str, term: str, weight: float):
+            key = (job, term)
+            weights[key] = max(weights.get(key, 0.0), weight)
+
+        for key, job_list in skill_job_mappings.items():
+            for term, spelling in skill_terms(key):
+                self.display_names.setdefault(term, ' '.join(word[0].upper() + word[1:] for word in spelling.split()))
+                for job_data in job_list:
+                    add(job_data['job'], term, job_data['score'] / 100.0)
+                    self.reasons.setdefault((job_data['job'], term), job_data['reason'])
+        for job, path in learning_paths.items():
+            for category, skills in path.items():
+                weight = CORE_SKILL_WEIGHT if category == 'core_skills' else PATH_SKILL_WEIGHT
+                for skill in skills:
+                    for term, spelling in skill_terms(skill):
+                        self.display_names[term] = spelling
+                        add(job, term, weight)
+
+        self.jobs = list(dict.fromkeys(job for job, _ in weights))
+        self.terms = list(dict.fromkeys(term for _, term in weights))
+        self.job_index = {job: i for i, job in enumerate(self.jobs)}
+        self.term_index = {term: i for i, term in enumerate(self.terms)}
+        self.term_words = {term: tuple(term.split()) for term in self.terms}
+        # 'vue' and 'node' stand for vue.js and node.js
+        self.aliases = {term[:-3]: self.term_index[term] for term in self.terms
+                        if term.endswith('.js') and term[:-3] not in self.term_index}
+
+        matrix = np.zeros((len(self.jobs), len(self.terms)), dtype=np.float32)
+        for (job, term), weight in weights.items():
+            matrix[self.job_index[job], self.term_index[term]] = weight
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        self.idf = (np.log((1.0 + len(self.jobs)) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        weighted = matrix * self.idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        self.matrix = weighted / np.where(norms > 0, norms, 1.0)
+        # Each job's skills, strongest first, for required_skills and skill_gaps
+        self.job_terms = [[self.terms[t] for t in np.argsort(-matrix[j], kind='stable') if matrix[j, t] > 0]
+                          for j in range(len(self.jobs))]
+
+        self.cache_limit = cache_limit
+        self._skill_cache = {}
+        self._cache_lock = threading.Lock()
+
+    def match_skill(self, skill: str) -> Tuple[int, ...]:
+        """Vocabulary term indices a skill stands for (memoized)"""
+        cached = self._skill_cache.get(skill)
+        if cached is not None:
+            return cached
+        indices = []
+        for term, _ in skill_terms(skill):
+            index = self.term_index.get(term, self.aliases.get(term))
+            if index is not None:
+                indices.append(index)
+                continue
+            words = set(term.split())
+            if len(words) > 1:
+                indices.extend(self.term_index[candidate] for candidate, candidate_words in self.term_words.items()
+                               if words.issuperset(candidate_words))
+        matched = tuple(dict.fromkeys(indices))
+        with self._cache_lock:
+            if len(self._skill_cache) < self.cache_limit:
+                self._skill_cache[skill] = matched
+        return matched
+
+    def coverage(self, skills: List[str]) -> float:
+        """Share of the skills the vocabulary knows"""
+        if not skills:
+            return 0.0
+        return sum(1 for skill in skills if self.match_skill(skill)) / len(skills)
+
+    def rank(self, skills: List[str], top_k: int = 10) -> List[Dict[str, Any]]:
+        """Best-matching jobs for the skill list, best first: job, score (cosine similarity),
+        the user skills that matched, the one contributing most, and the job's other skills"""
+        skill_for_term = {}
+        for skill in skills:
+            for index in self.match_skill(skill):
+                skill_for_term.setdefault(index, skill)
+        if not skill_for_term:
+            return []
+
+        query = np.zeros(len(self.terms), dtype=np.float32)
+        matched = np.fromiter(skill_for_term, dtype=np.intp, count=len(skill_for_term))
+        query[matched] = self.idf[matched]
+        query /= np.linalg.norm(query)
+        scores = self.matrix @ query
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        # Ties keep table order, so results are stable across calls
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+
+        ranked = []
+        for job_index in candidates:
+            job = self.jobs[job_index]
+            contributions = self.matrix[job_index, matched] * query[matched]
+            order = np.argsort(-contributions, kind='stable')
+            matched_terms = [self.terms[matched[i]] for i in order if contributions[i] > 0]
+            best_term = matched_terms[0]
+            matched_set = set(matched_terms)
+            ranked.append({
+                "job": job,
+                "score": float(scores[job_index]),
+                "matched_skills": list(dict.fromkeys(skill_for_term[self.term_index[term]] for term in matched_terms)),
+                "related_skill": skill_for_term[self.term_index[best_term]],
+                "reason": self.reasons.get((job, best_term)),
+                "job_skills": [self.display_names[term] for term in self.job_terms[job_index]],
+                "missing_skills": [self.display_names[term] for term in self.job_terms[job_index]
+                                   if term not in matched_set]
+            })
+        return ranked
+
+    @staticmethod
+    def relevance(score: float) -> float:
+        """Cosine similarity as a relevance score, rounded for responses"""
+        return round(min(1.0, max(0.0, score)), 3)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"jobs": len(self.jobs), "skills": len(self.terms),
+                "density": round(float(np.count_nonzero(self.matrix)) / max(1, self.matrix.size), 3)}
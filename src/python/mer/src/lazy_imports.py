@@ -0,0 +1,115 @@
+"""Deferred imports for heavy native libraries (OpenCV, NumPy, Tesseract, PDF/DOCX backends, Gemini).
+
+`cv2 = lazy_module('cv2')` binds a stand-in that imports the real module on first attribute
+access, so a process only pays for the backends it actually uses, when it first uses them.
+Every caller asking for the same name shares one stand-in, so an `on_load` hook (e.g. setting
+the Tesseract binary path) runs exactly once, whichever module touches the library first.
+
+Set LAZY_IMPORTS=0 to import everything eagerly (e.g. in a preforking master), or call
+preload() to load the registered modules on demand.
+"""
+import os
+import time
+import types
+import logging
+import importlib
+import importlib.util
+import threading
+from typing import List, Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+LAZY_IMPORTS_ENABLED = os.getenv('LAZY_IMPORTS', '1').lower() not in ('0', 'false', 'no')
+
+_registry: Dict[str, 'LazyModule'] = {}
+_registry_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the named module the first time one of its attributes is read"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_hooks = []
+        self._lazy_lock = threading.RLock()
+        self._lazy_load_seconds = None
+
+    def _load(self) -> types.ModuleType:
+        module = self._lazy_module
+        if module is not None:
+            return module
+        with self._lazy_lock:
+            if self._lazy_module is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self._lazy_name)
+                for hook in self._lazy_hooks:
+                    hook(module)
+                self._lazy_load_seconds = time.perf_counter() - started
+                self._lazy_module = module
+                logger.debug(f"Imported {self._lazy_name} on first use in {self._lazy_load_seconds:.3f}s")
+            return self._lazy_module
+
+    def _add_hook(self, hook: Callable[[types.ModuleType], None]):
+        with self._lazy_lock:
+            if self._lazy_module is not None:
+                hook(self._lazy_module)
+            else:
+                self._lazy_hooks.append(hook)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self._lazy_name}' ({state})>"
+
+
+def lazy_module(name: str, on_load: Optional[Callable[[types.ModuleType], None]] = None) -> LazyModule:
+    """Shared stand-in for `name`; `on_load(module)` runs once the real module is imported"""
+    with _registry_lock:
+        proxy = _registry.get(name)
+        if proxy is None:
+            proxy = LazyModule(name)
+            _registry[name] = proxy
+    if on_load is not None:
+        proxy._add_hook(on_load)
+    if not LAZY_IMPORTS_ENABLED:
+        proxy._load()
+    return proxy
+
+
+def module_available(name: str) -> bool:
+    """Whether `name` is installed, without importing it (parent packages are imported)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def preload(names: List[str] = None) -> Dict[str, Any]:
+    """Import registered lazy modules now; returns per-module import time or error"""
+    report = {}
+    for name in names or list(_registry):
+        proxy = _registry.get(name) or lazy_module(name)
+        started = time.perf_counter()
+        try:
+            proxy._load()
+            report[name] = round(time.perf_counter() - started, 4)
+        except Exception as e:
+            report[name] = f"error: {str(e)}"
+    return report
+
+
+def load_status() -> Dict[str, Any]:
+    """Which lazy modules have been imported so far, and how long each import took"""
+    with _registry_lock:
+        proxies = dict(_registry)
+    return {
+        name: {"loaded": proxy._lazy_module is not None, "load_seconds": round(proxy._lazy_load_seconds, 4) if proxy._lazy_load_seconds else None}
+        for name, proxy in proxies.items()
+    }
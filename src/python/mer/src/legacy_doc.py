@@ -0,0 +1,228 @@
+"""Text extraction from legacy binary Word (.doc, Word 97-2003) files, with no extra dependency.
+
+A .doc is an OLE compound file (a FAT file system in a file) whose WordDocument stream holds
+the text and whose 0Table/1Table stream holds the piece table saying where each run of text
+lives and whether it is stored as cp1252 bytes or UTF-16. Only the main document text is read;
+headers, footnotes and comments follow it in the same pieces and are left out. Word 6/95 files
+are read when their text is stored in one contiguous run. Encrypted files are refused.
+
+Everything works on a buffer (the mapped file), so nothing is read from disk twice.
+"""
+import re
+import struct
+from typing import Dict, List
+
+OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+FREE_SECTOR = 0xFFFFFFFF
+END_OF_CHAIN = 0xFFFFFFFE
+STREAM_ENTRY = 2
+ROOT_ENTRY = 5
+WORD_IDENT = 0xA5EC
+# Word 6 and 95 write nFib 101-105; Word 97 and later 0xC0 and up
+WORD95_MAX_NFIB = 0x69
+# FIB flags (FibBase.fWhichTblStm and friends)
+FIB_COMPLEX = 0x0004
+FIB_ENCRYPTED = 0x0100
+FIB_TABLE_1 = 0x0200
+
+# Field instructions (between 0x13 and 0x14) are dropped; field results are kept
+FIELD_INSTRUCTION = re.compile('\x13[^\x13\x14\x15]*\x14?')
+CONTROL_CHARACTERS = str.maketrans({
+    '\r': '\n',      # paragraph end
+    '\x0b': '\n',    # line break
+    '\x0c': '\n',    # page / section break
+    '\x07': '\t',    # table cell / row end
+    '\x1e': '-',     # non-breaking hyphen
+    '\x1f': None,    # optional hyphen
+    '\xa0': ' ',
+    '\x15': None,
+    '\x01': None,    # picture / object anchors
+    '\x08': None,
+    '\x05': None,    # annotation reference
+    '\x02': None,    # footnote reference
+})
+
+
+class LegacyDocError(Exception):
+    """Raised when a file is not a readable binary Word document"""
+
+
+class CompoundFile:
+    """Read-only view of the streams of an OLE compound file held in a buffer"""
+
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        if len(self.buffer) < 512 or self.buffer[:8].tobytes() != OLE_SIGNATURE:
+            raise LegacyDocError("Not an OLE compound file")
+        header = self.buffer[:512].tobytes()
+        self.sector_size = 1 << struct.unpack_from('<H', header, 0x1E)[0]
+        self.mini_sector_size = 1 << struct.unpack_from('<H', header, 0x20)[0]
+        fat_sectors, first_directory, _, self.mini_cutoff, first_mini_fat, mini_fat_sectors, first_difat, difat_sectors = \
+            struct.unpack_from('<8I', header, 0x2C)
+        if self.sector_size not in (512, 4096):
+            raise LegacyDocError(f"Unsupported OLE sector size {self.sector_size}")
+        # A short last sector still counts; reads from it are just short
+        self.sector_count = max(0, -(-(len(self.buffer) - self.sector_size) // self.sector_size))
+
+        # The FAT's own sectors are listed in the header, then in a chain of DIFAT sectors
+        fat_sector_ids = list(struct.unpack_from('<109I', header, 0x4C))
+        difat = first_difat
+        per_difat = self.sector_size // 4 - 1
+        # The count comes from the header; the chain can't be longer than the file or revisit a sector
+        visited = set()
+        for _ in range(min(difat_sectors, self.sector_count)):
+            if difat >= self.sector_count:
+                break
+            visited.add(difat)
+            entries = struct.unpack_from(f'<{per_difat + 1}I', self._sector(difat))
+            fat_sector_ids.extend(entries[:per_difat])
+            difat = entries[per_difat]
+            if difat in visited:
+                raise LegacyDocError("The DIFAT chain loops")
+        fat = bytearray()
+        for sector_id in fat_sector_ids[:fat_sectors]:
+            if sector_id < self.sector_count:
+                fat += self._sector(sector_id)
+        self.fat = struct.unpack(f'<{len(fat) // 4}I', fat)
+
+        self.entries = self._read_directory(self._read_chain(first_directory))
+        root = next((entry for entry in self.entries if entry["type"] == ROOT_ENTRY), None)
+        self.mini_stream = self._read_chain(root["start"], root["size"]) if root else b''
+        mini_fat = self._read_chain(first_mini_fat) if mini_fat_sectors else b''
+        self.mini_fat = struct.unpack(f'<{len(mini_fat) // 4}I', mini_fat)
+
+    def streams(self) -> List[str]:
+        return [entry["name"] for entry in self.entries if entry["type"] == STREAM_ENTRY]
+
+    def has_stream(self, name: str) -> bool:
+        return any(entry["type"] == STREAM_ENTRY and entry["name"] == name for entry in self.entries)
+
+    def read_stream(self, name: str) -> bytes:
+        entry = next((entry for entry in self.entries if entry["type"] == STREAM_ENTRY and entry["name"] == name), None)
+        if entry is None:
+            raise LegacyDocError(f"No {name} stream in the compound file")
+        if entry["size"] < self.mini_cutoff:
+            return self._read_mini_chain(entry["start"], entry["size"])
+        return self._read_chain(entry["start"], entry["size"])
+
+    def _sector(self, sector_id: int) -> memoryview:
+        offset = (sector_id + 1) * self.sector_size
+        return self.buffer[offset:offset + self.sector_size]
+
+    def _read_chain(self, sector_id: int, size: int = None) -> bytes:
+        data = bytearray()
+        # A chain can't be longer than the file; a longer one is a loop in a corrupt FAT
+        for _ in range(self.sector_count + 1):
+            if sector_id in (END_OF_CHAIN, FREE_SECTOR) or sector_id >= min(self.sector_count, len(self.fat)):
+                break
+            data += self._sector(sector_id)
+            sector_id = self.fat[sector_id]
+        return bytes(data if size is None else self._sized(data, size))
+
+    def _read_mini_chain(self, sector_id: int, size: int) -> bytes:
+        data = bytearray()
+        for _ in range(len(self.mini_fat) + 1):
+            if sector_id in (END_OF_CHAIN, FREE_SECTOR) or sector_id >= len(self.mini_fat):
+                break
+            offset = sector_id * self.mini_sector_size
+            data += self.mini_stream[offset:offset + self.mini_sector_size]
+            sector_id = self.mini_fat[sector_id]
+        return bytes(self._sized(data, size))
+
+    @staticmethod
+    def _sized(data: bytearray, size: int) -> bytearray:
+        if len(data) < size:
+            raise LegacyDocError("The document is truncated")
+        return data[:size]
+
+    @staticmethod
+    def _read_directory(data: bytes) -> List[Dict]:
+        entries = []
+        for offset in range(0, len(data) - 127, 128):
+            name_length, entry_type = struct.unpack_from('<HB', data, offset + 64)
+            if not entry_type or name_length < 2 or name_length > 64:
+                continue
+            start, size = struct.unpack_from('<II', data, offset + 116)
+            entries.append({
+                "name": data[offset:offset + name_length - 2].decode('utf-16-le', errors='replace'),
+                "type": entry_type,
+                "start": start,
+                "size": size
+            })
+        return entries
+
+
+def is_word_document(buffer) -> bool:
+    """True for an OLE compound file with a WordDocument stream"""
+    try:
+        return CompoundFile(buffer).has_stream("WordDocument")
+    except (LegacyDocError, struct.error):
+        return False
+
+
+def extract_text(buffer) -> str:
+    """Main document text of a binary Word file; LegacyDocError if it can't be read"""
+    try:
+        compound = CompoundFile(buffer)
+        word_document = compound.read_stream("WordDocument")
+        if len(word_document) < 0x20:
+            raise LegacyDocError("WordDocument stream is truncated")
+        ident, nfib, _, _, _, flags = struct.unpack_from('<HHHHHH', word_document, 0)
+        if ident != WORD_IDENT:
+            raise LegacyDocError("Not a Word document")
+        if flags & FIB_ENCRYPTED:
+            raise LegacyDocError("The document is password-protected")
+        if nfib <= WORD95_MAX_NFIB:
+            return _clean(_word95_text(word_document, flags))
+        table = compound.read_stream("1Table" if flags & FIB_TABLE_1 else "0Table")
+        return _clean(_word97_text(word_document, table))
+    except struct.error:
+        raise LegacyDocError("The document structure is corrupt")
+
+
+def _word97_text(word_document: bytes, table: bytes) -> str:
+    # FibBase (32 bytes), then counted arrays of 16-bit, 32-bit and (fc, lcb) pair fields
+    csw = struct.unpack_from('<H', word_document, 32)[0]
+    long_fields = 32 + 2 + csw * 2
+    cslw = struct.unpack_from('<H', word_document, long_fields)[0]
+    ccp_text = struct.unpack_from('<i', word_document, long_fields + 2 + 3 * 4)[0]
+    pairs = long_fields + 2 + cslw * 4 + 2
+    fc_clx, lcb_clx = struct.unpack_from('<II', word_document, pairs + 33 * 8)
+    clx = table[fc_clx:fc_clx + lcb_clx]
+
+    # Clx: optional property runs (0x01) before the piece table (0x02)
+    position = 0
+    while position < len(clx) and clx[position] == 0x01:
+        position += 3 + struct.unpack_from('<H', clx, position + 1)[0]
+    if position >= len(clx) or clx[position] != 0x02:
+        raise LegacyDocError("No piece table in the document")
+    lcb = struct.unpack_from('<I', clx, position + 1)[0]
+    plc = clx[position + 5:position + 5 + lcb]
+    pieces = (len(plc) - 4) // 12
+    cps = struct.unpack_from(f'<{pieces + 1}I', plc)
+
+    parts = []
+    remaining = ccp_text
+    for i in range(pieces):
+        if remaining <= 0:
+            break
+        fc = struct.unpack_from('<I', plc, (pieces + 1) * 4 + i * 8 + 2)[0]
+        count = min(cps[i + 1] - cps[i], remaining)
+        if fc & 0x40000000:
+            start = (fc & 0x3FFFFFFF) // 2
+            parts.append(word_document[start:start + count].decode('cp1252', errors='replace'))
+        else:
+            parts.append(word_document[fc:fc + 2 * count].decode('utf-16-le', errors='replace'))
+        remaining -= count
+    return ''.join(parts)
+
+
+def _word95_text(word_document: bytes, flags: int) -> str:
+    if flags & FIB_COMPLEX:
+        raise LegacyDocError("Fast-saved Word 6/95 documents are not supported; re-save as DOCX")
+    fc_min, fc_mac = struct.unpack_from('<II', word_document, 0x18)
+    return word_document[fc_min:fc_mac].decode('cp1252', errors='replace')
+
+
+def _clean(text: str) -> str:
+    return FIELD_INSTRUCTION.sub('', text).translate(CONTROL_CHARACTERS)
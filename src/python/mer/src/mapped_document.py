@@ -0,0 +1,207 @@
+"""Read-only memory maps of documents, shared by every extractor that tries them.
+
+Each extractor used to open and read the file itself: PyMuPDF, then pdfplumber, then PyPDF2
+on fallback, or the triage thumbnail, the metadata scan and the OCR decode of one image. A
+MappedDocument maps the file once; `buffer` is a zero-copy view of the mapping (PyMuPDF and
+OpenCV decode straight from it) and open() returns an independent seekable stream over the
+same pages for libraries that want a file object. Reads come from the page cache, so every
+fallback sees the same bytes without another pass over the disk or a copy on the Python heap.
+
+sniff_format() names the content from the first bytes of the mapping, so the extractor can be
+chosen by what the file is rather than what its name says (see DocumentProcessor.detect_format).
+"""
+from __future__ import annotations
+
+import io
+import os
+import mmap
+import logging
+import functools
+from contextlib import contextmanager
+from typing import Optional, Union
+
+from lazy_imports import lazy_module
+
+cv2 = lazy_module('cv2')
+np = lazy_module('numpy')
+fitz = lazy_module('fitz')
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIZE = 4096
+# Leading bytes of each format we can tell apart; PDF headers may follow up to 1KB of junk
+MAGIC_NUMBERS = (
+    (b'%PDF-', "pdf"),
+    (b'PK\x03\x04', "zip"),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', "ole"),
+    (b'\x89PNG\r\n\x1a\n', "png"),
+    (b'\xff\xd8\xff', "jpeg"),
+    (b'GIF87a', "gif"),
+    (b'GIF89a', "gif"),
+    (b'II*\x00', "tiff"),
+    (b'MM\x00*', "tiff"),
+    (b'BM', "bmp"),
+)
+IMAGE_FORMATS = ("png", "jpeg", "gif", "tiff", "bmp")
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """'pdf', 'zip', 'ole' or an image format from a file's first bytes; None when unknown"""
+    for magic, kind in MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return kind
+    if b'%PDF-' in header[:1024]:
+        return "pdf"
+    return None
+
+
+class MappedStream(io.RawIOBase):
+    """Seekable read-only file object over a buffer; reads copy only the bytes asked for"""
+
+    def __init__(self, buffer: memoryview):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        start = self._position
+        end = len(self._buffer) if size is None or size < 0 else min(len(self._buffer), start + size)
+        self._position = max(start, end)
+        return self._buffer[start:end].tobytes()
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, target) -> int:
+        data = self._buffer[self._position:self._position + len(target)]
+        target[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        # The buffer belongs to the MappedDocument; only let go of the reference
+        self._buffer = memoryview(b'')
+        super().close()
+
+
+class MappedDocument:
+    """A document file mapped read-only for the duration of one analysis"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.size = os.fstat(file.fileno()).st_size
+            # Empty files cannot be mapped; the mapping stays valid after the file is closed
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._buffer = memoryview(self._map) if self._map is not None else memoryview(b'')
+        self._format = False
+
+    @property
+    def buffer(self) -> memoryview:
+        return self._buffer
+
+    @property
+    def header(self) -> bytes:
+        return self._buffer[:HEADER_SIZE].tobytes()
+
+    @property
+    def format(self) -> Optional[str]:
+        if self._format is False:
+            self._format = sniff_format(self.header)
+        return self._format
+
+    def open(self) -> MappedStream:
+        """A new file object over the mapping, positioned at the start"""
+        return MappedStream(self._buffer)
+
+    def close(self):
+        buffer, self._buffer = self._buffer, memoryview(b'')
+        if self._map is None:
+            return
+        try:
+            buffer.release()
+            self._map.close()
+        except BufferError:
+            # A library still holds a view (e.g. an unclosed PDF); the map closes when it is collected
+            logger.debug(f"Mapping of {self.path} still in use; leaving it to the garbage collector")
+        self._map = None
+
+    def __enter__(self) -> 'MappedDocument':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+DocumentSource = Union[str, MappedDocument]
+
+
+@contextmanager
+def mapped(source: DocumentSource):
+    """The MappedDocument for a path (mapped for the duration), or the already mapped document"""
+    if isinstance(source, MappedDocument):
+        yield source
+    else:
+        with MappedDocument(source) as document:
+            yield document
+
+
+def source_path(source: DocumentSource) -> str:
+    return source.path if isinstance(source, MappedDocument) else source
+
+
+def open_binary(source: DocumentSource):
+    """A binary file object for the source: a stream over the mapping, or the file opened for reading"""
+    return source.open() if isinstance(source, MappedDocument) else open(source, 'rb')
+
+
+def open_pdf(source: DocumentSource):
+    """PyMuPDF document for the source, opened from the mapping itself when there is one"""
+    if isinstance(source, MappedDocument):
+        return fitz.open(stream=source.buffer, filetype="pdf")
+    return fitz.open(source)
+
+
+def read_image(source: DocumentSource, flags: int):
+    """cv2.imread for a path; for a mapped document, decode from the mapping without reading the file again"""
+    if isinstance(source, MappedDocument):
+        if not source.size:
+            return None
+        return cv2.imdecode(np.frombuffer(source.buffer, np.uint8), flags)
+    return cv2.imread(source, flags)
+
+
+def with_mapped_source(method):
+    """Map a path passed as the first argument for the duration of the call, so everything the
+    method tries reads the same mapping; mapped documents and unmappable paths pass through"""
+    @functools.wraps(method)
+    def wrapper(self, source, *args, **kwargs):
+        if isinstance(source, MappedDocument) or not os.path.isfile(source):
+            return method(self, source, *args, **kwargs)
+        try:
+            document = MappedDocument(source)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not map {source}, reading it directly: {str(e)}")
+            return method(self, source, *args, **kwargs)
+        with document:
+            return method(self, document, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+from typing import List, Dict, Any, Tuple
+
+from lazy_imports import lazy_module
+
+cv2 = lazy_module('cv2')
+np = lazy_module('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Tesseract page segmentation modes used per block
+PSM_BLOCK = 6        # uniform block of text
+PSM_SINGLE_LINE = 7  # one text line (headings, contact rows)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) index pairs of consecutive True values in a 1-D boolean array"""
+    if not mask.any():
+        return []
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+def _interior_gaps(ink_profile: np.ndarray, min_gap: int) -> List[Tuple[int, int]]:
+    """Blank runs of at least min_gap that have ink on both sides"""
+    return [(start, end) for start, end in _runs(ink_profile == 0)
+            if end - start >= min_gap and start > 0 and end < len(ink_profile)]
+
+
+class LayoutAnalyzer:
+    """Segments a thresholded page into text blocks in reading order (recursive XY-cut).
+
+    A region is split at column gutters first, so each column of a two-column CV is read
+    top to bottom before the next, and otherwise at blank row gaps. Consecutive row bands
+    that share a gutter are regrouped before recursing, so sections aligned across columns
+    do not interleave them. Gap thresholds scale with the page's median text-line height.
+    """
+
+    def __init__(self, max_depth: int = 8, min_block_ink: int = 30, padding: int = 10):
+        self.max_depth = max_depth
+        self.min_block_ink = min_block_ink
+        self.padding = padding
+
+    def segment(self, image: np.ndarray) -> Dict[str, Any]:
+        ink = self._ink_mask(image)
+        line_runs = _runs(ink.any(axis=1))
+        line_height = int(np.median([end - start for start, end in line_runs])) if line_runs else 0
+        if not line_height:
+            return {"blocks": [], "line_height": 0}
+        # Paragraph spacing rather than line spacing, so a heading stays with its section
+        self._min_row_gap = max(4, int(1.5 * line_height))
+        self._min_col_gap = max(2 * line_height, image.shape[1] // 50)
+
+        boxes = []
+        self._cut(ink, 0, 0, ink.shape[1], ink.shape[0], 0, boxes)
+        blocks = []
+        for x0, y0, x1, y1 in boxes:
+            region = ink[y0:y1, x0:x1]
+            if int(region.sum()) < self.min_block_ink:
+                continue
+            lines = len(_runs(region.any(axis=1)))
+            blocks.append({
+                "box": (x0, y0, x1, y1),
+                "lines": lines,
+                "psm": PSM_SINGLE_LINE if lines == 1 else PSM_BLOCK
+            })
+        return {"blocks": blocks, "line_height": line_height}
+
+    def crop(self, image: np.ndarray, block: Dict[str, Any]) -> np.ndarray:
+        """Block crop with a white margin (Tesseract misreads glyphs touching the border)"""
+        x0, y0, x1, y1 = block["box"]
+        white = 255 if image.ndim == 2 else (255, 255, 255)
+        return cv2.copyMakeBorder(image[y0:y1, x0:x1], self.padding, self.padding, self.padding, self.padding,
+                                  cv2.BORDER_CONSTANT, value=white)
+
+    def _ink_mask(self, image: np.ndarray) -> np.ndarray:
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if len(np.unique(gray[::8, ::8])) > 2:
+            _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        ink = gray < 128
+        # Light text on a dark background
+        if ink.mean() > 0.5:
+            ink = ~ink
+        return ink.astype(np.uint8)
+
+    def _cut(self, ink, x0, y0, x1, y1, depth, boxes):
+        region = ink[y0:y1, x0:x1]
+        rows = _runs(region.any(axis=1))
+        cols = _runs(region.any(axis=0))
+        if not rows:
+            return
+        # Trim to the ink bounding box
+        x0, x1 = x0 + cols[0][0], x0 + cols[-1][1]
+        y0, y1 = y0 + rows[0][0], y0 + rows[-1][1]
+        region = ink[y0:y1, x0:x1]
+        if depth >= self.max_depth:
+            boxes.append((x0, y0, x1, y1))
+            return
+
+        gutters = _interior_gaps(region.sum(axis=0), self._min_col_gap)
+        if gutters:
+            edges = [0] + [edge for gap in gutters for edge in gap] + [x1 - x0]
+            for start, end in zip(edges[0::2], edges[1::2]):
+                self._cut(ink, x0 + start, y0, x0 + end, y1, depth + 1, boxes)
+            return
+
+        row_gaps = _interior_gaps(region.sum(axis=1), self._min_row_gap)
+        if not row_gaps:
+            boxes.append((x0, y0, x1, y1))
+            return
+        edges = [0] + [edge for gap in row_gaps for edge in gap] + [y1 - y0]
+        bands = list(zip(edges[0::2], edges[1::2]))
+
+        # Regroup consecutive bands that share a column gutter into one region
+        groups = []
+        for start, end in bands:
+            band_gutters = _interior_gaps(region[start:end].sum(axis=0), self._min_col_gap)
+            if groups and groups[-1][2] and band_gutters and self._share_gutter(groups[-1][2], band_gutters):
+                group_start, _, group_gutters = groups[-1]
+                groups[-1] = (group_start, end, self._common_gutters(group_gutters, band_gutters))
+            else:
+                groups.append((start, end, band_gutters))
+        if len(groups) == 1 and groups[0][:2] == (0, y1 - y0):
+            boxes.append((x0, y0, x1, y1))
+            return
+        for start, end, _ in groups:
+            self._cut(ink, x0, y0 + start, x1, y0 + end, depth + 1, boxes)
+
+    def _common_gutters(self, first, second):
+        common = []
+        for a_start, a_end in first:
+            for b_start, b_end in second:
+                start, end = max(a_start, b_start), min(a_end, b_end)
+                if end - start >= self._min_col_gap:
+                    common.append((start, end))
+        return common
+
+    def _share_gutter(self, first, second) -> bool:
+        return bool(self._common_gutters(first, second))
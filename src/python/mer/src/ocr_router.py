@@ -0,0 +1,301 @@
+import os
+import re
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from ocr_layout import LayoutAnalyzer
+from lazy_imports import lazy_module
+
+cv2 = lazy_module('cv2')
+pytesseract = lazy_module('pytesseract')
+
+logger = logging.getLogger(__name__)
+
+# Detected script -> Tesseract language string. CVs in Indic scripts still carry English
+# section headings, tool names and e-mail addresses, so those routes keep 'eng' alongside.
+SCRIPT_LANGUAGES = {
+    "Latin": "eng",
+    "Devanagari": "hin+eng",
+    "Malayalam": "mal+eng",
+}
+DEFAULT_LANGUAGE = "eng"
+
+# Unicode blocks used to classify the probe OCR text when OSD is unavailable
+SCRIPT_RANGES = {
+    "Devanagari": (0x0900, 0x097F),
+    "Malayalam": (0x0D00, 0x0D7F),
+}
+
+
+def detect_script_from_text(text: str) -> Dict[str, Any]:
+    """Classify text by the share of letters falling in each supported script's Unicode block"""
+    counts = {script: 0 for script in SCRIPT_RANGES}
+    letters = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        letters += 1
+        code = ord(char)
+        for script, (low, high) in SCRIPT_RANGES.items():
+            if low <= code <= high:
+                counts[script] += 1
+                break
+    if not letters:
+        return {"script": None, "confidence": 0.0}
+    script, count = max(counts.items(), key=lambda item: item[1])
+    # A handful of Indic letters in an English CV (a name, an address) should not reroute it
+    if count / letters >= 0.2:
+        return {"script": script, "confidence": round(count / letters, 3)}
+    return {"script": "Latin", "confidence": round(1 - sum(counts.values()) / letters, 3)}
+
+
+class OCRLanguageRouter:
+    """Detects the script of an image cheaply and runs OCR on a worker pool for that language.
+
+    Detection runs Tesseract OSD (script detection only, no recognition) on a downsampled copy
+    of the top of the page; if OSD is missing or unsure, a quick multi-language OCR of the same
+    strip is classified by Unicode block. Full-page OCR then runs once, with only the languages
+    the page needs, on a bounded per-language pool so slow scripts cannot starve fast ones.
+    All the pools share one budget of concurrent tesseract runs (ocr_threads, OCR_THREADS).
+    """
+
+    def __init__(self, workers_per_language: int = None, ocr_threads: int = None, probe_max_width: int = 1000, probe_height_ratio: float = 0.35, min_osd_confidence: float = 1.0):
+        self._language_limit = workers_per_language or int(os.getenv('OCR_WORKERS_PER_LANGUAGE', '0'))
+        self.set_thread_budget(ocr_threads or int(os.getenv('OCR_THREADS', str(os.cpu_count() or 2))))
+        self.probe_max_width = probe_max_width
+        self.probe_height_ratio = probe_height_ratio
+        self.min_osd_confidence = min_osd_confidence
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {}
+        self._detection_metrics = {"count": 0, "seconds": 0.0, "osd": 0, "probe_ocr": 0, "failed": 0}
+        self._installed_languages = None
+        self.layout_analyzer = LayoutAnalyzer()
+
+    def installed_languages(self) -> List[str]:
+        if self._installed_languages is None:
+            try:
+                self._installed_languages = list(pytesseract.get_languages(config=''))
+            except Exception as e:
+                logger.warning(f"Could not list Tesseract languages: {str(e)}")
+                self._installed_languages = [DEFAULT_LANGUAGE]
+        return self._installed_languages
+
+    def is_supported_language(self, lang) -> bool:
+        """'auto', an installed language pack, or one of the script routes; anything else would get
+        a pool and metrics entry of its own"""
+        if lang is None or lang in ('', 'auto'):
+            return True
+        return isinstance(lang, str) and (lang in SCRIPT_LANGUAGES.values() or lang in self.installed_languages())
+
+    def language_for_script(self, script: Optional[str]) -> str:
+        """Tesseract language string for a script, limited to installed language packs"""
+        wanted = SCRIPT_LANGUAGES.get(script, DEFAULT_LANGUAGE)
+        installed = set(self.installed_languages())
+        available = [lang for lang in wanted.split('+') if lang in installed]
+        if len(available) < len(wanted.split('+')):
+            logger.warning(f"Tesseract language pack missing for {script} ({wanted}); using {'+'.join(available) or DEFAULT_LANGUAGE}")
+        return '+'.join(available) or DEFAULT_LANGUAGE
+
+    def detect(self, image) -> Dict[str, Any]:
+        """Detect the dominant script of a (preprocessed) image"""
+        started = time.perf_counter()
+        probe = self._probe_image(image)
+        detection = self._detect_with_osd(probe)
+        if detection is None:
+            detection = self._detect_with_probe_ocr(probe)
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self._detection_metrics["count"] += 1
+            self._detection_metrics["seconds"] += elapsed
+            self._detection_metrics[detection["method"]] += 1
+        detection["seconds"] = round(elapsed, 4)
+        return detection
+
+    def run(self, image, lang: str = 'auto', config: str = None, with_confidence: bool = True, layout: bool = False) -> Dict[str, Any]:
+        """OCR an image, detecting its language first when lang is 'auto'.
+
+        With layout=True the page is segmented into text blocks which are recognized in
+        parallel, each with its own PSM, and joined in reading order; pages that segment
+        into a single block take the whole-page path.
+        """
+        detection = None
+        if not self.is_supported_language(lang):
+            raise ValueError(f"Unsupported OCR language: {lang}")
+        if not lang or lang == 'auto':
+            detection = self.detect(image)
+            lang = self.language_for_script(detection["script"])
+        result = self._recognize_layout(image, lang, config, with_confidence) if layout else None
+        if result is None:
+            result = self._pool(lang).submit(self._recognize, image, lang, config, with_confidence).result()
+        result["language"] = lang
+        if detection is not None:
+            result["language_detection"] = detection
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            languages = {}
+            for lang, stats in self._metrics.items():
+                seconds = stats["seconds"]
+                languages[lang] = {
+                    "images": stats["images"],
+                    "characters": stats["characters"],
+                    "errors": stats["errors"],
+                    "total_seconds": round(seconds, 3),
+                    "avg_seconds": round(seconds / stats["images"], 3) if stats["images"] else 0.0,
+                    "images_per_second": round(stats["images"] / seconds, 3) if seconds else 0.0,
+                    "workers": self.workers_per_language
+                }
+            detection = dict(self._detection_metrics)
+        detection["avg_seconds"] = round(detection["seconds"] / detection["count"], 4) if detection["count"] else 0.0
+        detection["seconds"] = round(detection["seconds"], 3)
+        return {"languages": languages, "detection": detection}
+
+    def reset_metrics(self):
+        self.take_metrics()
+
+    def take_metrics(self) -> Dict[str, Any]:
+        """Raw counters accumulated since the last call, resetting them (for aggregation across processes)"""
+        with self._metrics_lock:
+            taken = {"languages": self._metrics, "detection": self._detection_metrics}
+            self._metrics = {}
+            self._detection_metrics = {"count": 0, "seconds": 0.0, "osd": 0, "probe_ocr": 0, "failed": 0}
+        return taken
+
+    def merge_metrics(self, taken: Dict[str, Any]):
+        """Add counters returned by take_metrics() in another process"""
+        with self._metrics_lock:
+            for lang, counts in taken["languages"].items():
+                stats = self._metrics.setdefault(lang, {"images": 0, "characters": 0, "errors": 0, "seconds": 0.0})
+                for key, value in counts.items():
+                    stats[key] += value
+            for key, value in taken["detection"].items():
+                self._detection_metrics[key] += value
+
+    def set_thread_budget(self, threads: int):
+        """Concurrent tesseract runs allowed across all languages. One language's pool gets half of
+        them (or OCR_WORKERS_PER_LANGUAGE, up to the budget); pools created earlier keep their size"""
+        self.ocr_threads = max(1, threads)
+        self.workers_per_language = min(self._language_limit or -(-self.ocr_threads // 2), self.ocr_threads)
+        self._ocr_slots = threading.BoundedSemaphore(self.ocr_threads)
+
+    def reset_after_fork(self):
+        """Drop the pools and locks inherited by a forked child; the pool threads do not exist there"""
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._ocr_slots = threading.BoundedSemaphore(self.ocr_threads)
+
+    def close(self, wait: bool = False):
+        """Shut down the worker pools; they are recreated on the next run()"""
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+    def _pool(self, lang: str) -> ThreadPoolExecutor:
+        pool = self._pools.get(lang)
+        if pool is None:
+            with self._pools_lock:
+                pool = self._pools.get(lang)
+                if pool is None:
+                    pool = ThreadPoolExecutor(max_workers=self.workers_per_language, thread_name_prefix=f"ocr-{lang.replace('+', '-')}")
+                    self._pools[lang] = pool
+        return pool
+
+    def _recognize(self, image, lang: str, config: str, with_confidence: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            result = self._ocr(image, lang, config, with_confidence)
+        except Exception:
+            self._record(lang, time.perf_counter() - started, 0, error=True)
+            raise
+        self._record(lang, time.perf_counter() - started, len(result["text"]))
+        return result
+
+    def _recognize_layout(self, image, lang: str, config: str, with_confidence: bool) -> Optional[Dict[str, Any]]:
+        started = time.perf_counter()
+        layout = self.layout_analyzer.segment(image)
+        blocks = layout["blocks"]
+        if len(blocks) < 2:
+            return None
+        base_config = re.sub(r'--psm\s+\d+', '', config or '').strip()
+        pool = self._pool(lang)
+        futures = [
+            pool.submit(self._ocr, self.layout_analyzer.crop(image, block), lang, f"{base_config} --psm {block['psm']}".strip(), with_confidence)
+            for block in blocks
+        ]
+        try:
+            block_results = [future.result() for future in futures]
+        except Exception:
+            self._record(lang, time.perf_counter() - started, 0, error=True)
+            raise
+        text = "\n\n".join(result["text"].strip() for result in block_results if result["text"].strip())
+        words = sum(result["words"] for result in block_results)
+        confidence = sum(result["confidence"] * result["words"] for result in block_results) / words if words else 0
+        self._record(lang, time.perf_counter() - started, len(text))
+        return {
+            "text": text,
+            "confidence": confidence,
+            "words": words,
+            "layout": {"blocks": len(blocks), "line_height": layout["line_height"], "boxes": [block["box"] for block in blocks]}
+        }
+
+    def _ocr(self, image, lang: str, config: str, with_confidence: bool) -> Dict[str, Any]:
+        with self._ocr_slots:
+            text = pytesseract.image_to_string(image, lang=lang, config=config)
+            confidences = []
+            if with_confidence:
+                try:
+                    data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+                    confidences = [int(float(conf)) for conf in data['conf'] if int(float(conf)) > 0]
+                except Exception as e:
+                    logger.warning(f"Could not get confidence scores: {str(e)}")
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+        return {"text": text, "confidence": avg_confidence, "words": len(confidences)}
+
+    def _record(self, lang: str, seconds: float, characters: int, error: bool = False):
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(lang, {"images": 0, "characters": 0, "errors": 0, "seconds": 0.0})
+            stats["images"] += 1
+            stats["characters"] += characters
+            stats["errors"] += 1 if error else 0
+            stats["seconds"] += seconds
+
+    def _probe_image(self, image):
+        """Top strip of the page (where names and headings sit), downscaled for speed"""
+        height, width = image.shape[:2]
+        strip = image[:max(1, int(height * self.probe_height_ratio))]
+        if width > self.probe_max_width:
+            scale = self.probe_max_width / width
+            strip = cv2.resize(strip, (self.probe_max_width, max(1, int(strip.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+        return strip
+
+    def _detect_with_osd(self, probe) -> Optional[Dict[str, Any]]:
+        try:
+            osd = pytesseract.image_to_osd(probe, config='--psm 0', output_type=pytesseract.Output.DICT)
+        except Exception as e:
+            logger.debug(f"OSD script detection unavailable: {str(e)}")
+            return None
+        script = osd.get('script')
+        confidence = float(osd.get('script_conf', 0) or 0)
+        if confidence < self.min_osd_confidence:
+            return None
+        # OSD reports scripts Tesseract knows; anything without a route is treated as Latin
+        return {"script": script if script in SCRIPT_LANGUAGES else "Latin", "osd_script": script, "confidence": confidence, "method": "osd"}
+
+    def _detect_with_probe_ocr(self, probe) -> Dict[str, Any]:
+        probe_langs = '+'.join(sorted({lang for route in SCRIPT_LANGUAGES.values() for lang in route.split('+')} & set(self.installed_languages())))
+        try:
+            text = pytesseract.image_to_string(probe, lang=probe_langs or DEFAULT_LANGUAGE, config='--oem 3 --psm 6')
+        except Exception as e:
+            logger.warning(f"Probe OCR for language detection failed: {str(e)}")
+            return {"script": None, "confidence": 0.0, "method": "failed"}
+        detection = detect_script_from_text(text)
+        detection["method"] = "probe_ocr"
+        return detection
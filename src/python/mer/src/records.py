@@ -0,0 +1,132 @@
+"""Slot-based records passed between pipeline stages.
+
+Keyword matches, top keywords, categorized skills and job recommendations are created in
+large numbers per request; as slotted dataclasses they take a fraction of the memory of the
+equivalent dicts and are faster to build. They stay records inside the pipeline and become
+JSON only when the response is serialized: orjson encodes dataclasses natively, and the
+stdlib fallback encoder uses to_dict().
+"""
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+
+@dataclass(slots=True)
+class KeywordMatch:
+    keyword: str
+    category: str
+    context: str
+    position: int
+    confidence: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'keyword': self.keyword,
+            'category': self.category,
+            'context': self.context,
+            'position': self.position,
+            'confidence': self.confidence
+        }
+
+
+@dataclass(slots=True)
+class TopKeyword:
+    keyword: str
+    category: str
+    frequency: int
+    confidence: float
+    score: float
+    first_position: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'keyword': self.keyword,
+            'category': self.category,
+            'frequency': self.frequency,
+            'confidence': self.confidence,
+            'score': self.score,
+            'first_position': self.first_position
+        }
+
+
+@dataclass(slots=True)
+class CategorizedSkill:
+    skill_name: str
+    skill_id: str = ''
+    normalized_name: str = ''
+    category: str = 'General'
+    subcategory: str = ''
+    sector: str = 'Other'
+    skill_type: str = ''
+    confidence: float = 0.8
+    source: str = 'Local'
+    related_jobs: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'skill_name': self.skill_name,
+            'skill_id': self.skill_id,
+            'normalized_name': self.normalized_name,
+            'category': self.category,
+            'subcategory': self.subcategory,
+            'sector': self.sector,
+            'skill_type': self.skill_type,
+            'confidence': self.confidence,
+            'source': self.source,
+            'related_jobs': self.related_jobs
+        }
+
+
+@dataclass(slots=True, kw_only=True)
+class JobRecommendation:
+    """One recommended job, as the basic fallback gives it. Each kind of source has its own record
+    type, so a response only carries the fields that kind sets"""
+    title: str
+    description: str
+    relevance_score: float
+    required_skills: List[str]
+    skill_gaps: List[str] = field(default_factory=list)
+    sector: str
+    source: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'title': self.title,
+            'description': self.description,
+            'relevance_score': self.relevance_score,
+            'required_skills': self.required_skills,
+            'skill_gaps': self.skill_gaps,
+            'sector': self.sector,
+            'source': self.source
+        }
+
+
+@dataclass(slots=True, kw_only=True)
+class RankedJobRecommendation(JobRecommendation):
+    """A job from a skill-based ranking: the skill it came from and its place in the list"""
+    related_skill: str
+    rank: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = JobRecommendation.to_dict(self)
+        result['related_skill'] = self.related_skill
+        result['rank'] = self.rank
+        return result
+
+
+@dataclass(slots=True, kw_only=True)
+class KeywordJobRecommendation(RankedJobRecommendation):
+    """A job recommended for one keyword, with the learning path towards it"""
+    learning_path: Dict[str, Any] = field(default_factory=dict)
+    time_to_proficiency: str
+    difficulty: str
+    keyword_focus: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = RankedJobRecommendation.to_dict(self)
+        result.update({
+            'learning_path': self.learning_path,
+            'time_to_proficiency': self.time_to_proficiency,
+            'difficulty': self.difficulty,
+            'keyword_focus': self.keyword_focus
+        })
+        return result
@@ -0,0 +1,194 @@
+import gzip
+import json
+import logging
+from typing import List, Dict, Any, Optional
+
+from flask.json.provider import JSONProvider
+
+# Optional fast encoder and compressor; the stdlib json and gzip are used when missing
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Responses smaller than this are sent uncompressed; the headers would eat the saving
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+# Always kept in compact mode, whatever fields were selected
+ALWAYS_KEPT_FIELDS = ('success', 'error', 'is_partial', 'continuation_token')
+
+
+def _default(obj):
+    if hasattr(obj, 'to_dict'):
+        # Pipeline records (records.py); orjson encodes these natively
+        return obj.to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        # numpy scalars and arrays
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON with orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, so every jsonify() call uses the fast encoder.
+
+    Keys keep insertion order instead of being sorted, and output is compact.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if ORJSON_AVAILABLE:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype='application/json')
+
+
+def compress_response(response, accept_encoding: str):
+    """Compress a JSON response in place with brotli or gzip, if the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+    accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    if BROTLI_AVAILABLE and 'br' in accepted:
+        encoding = 'br'
+    elif 'gzip' in accepted:
+        encoding = 'gzip'
+    else:
+        return response
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=GZIP_LEVEL)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def parse_fields(fields) -> Optional[List[str]]:
+    """Field selection from a list or a comma-separated string; None means all fields"""
+    if fields is None or fields == '':
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise ValueError("fields must be a list or comma-separated string of field names")
+    return [field.strip() for field in fields if field.strip()]
+
+
+def compact_result(result: Dict[str, Any], fields: List[str] = None, include_text: bool = False) -> Dict[str, Any]:
+    """Compact form of an analysis result.
+
+    - `text` is dropped unless include_text or it is selected in `fields`
+    - keyword matches keep only keyword, position and confidence (no `context`, and no
+      `category`, which is already their key)
+    - `jobs_by_sector` lists indices into `job_recommendations` instead of repeating the jobs
+    - `fields` keeps only the named top-level fields, or dotted sub-fields such as
+      "keywords.top_keywords"
+    """
+    if not isinstance(result, dict):
+        return result
+    compact = dict(result)
+    if fields is not None:
+        compact = _select_fields(compact, fields)
+        include_text = include_text or 'text' in fields
+    if not include_text:
+        compact.pop('text', None)
+
+    keywords = compact.get('keywords')
+    if isinstance(keywords, dict) and isinstance(keywords.get('keywords_by_category'), dict):
+        keywords = dict(keywords)
+        keywords['keywords_by_category'] = {
+            category: [_compact_match(match) for match in matches]
+            for category, matches in keywords['keywords_by_category'].items()
+        }
+        compact['keywords'] = keywords
+
+    jobs = compact.get('job_recommendations')
+    if isinstance(jobs, dict):
+        compact['job_recommendations'] = index_jobs_by_sector(jobs)
+    elif 'jobs_by_sector' in compact:
+        compact = index_jobs_by_sector(compact)
+    return compact
+
+
+def _compact_match(match) -> Dict[str, Any]:
+    if isinstance(match, dict):
+        # Responses captured as JSON (benchmarks) rather than KeywordMatch records
+        return {'keyword': match.get('keyword'), 'position': match.get('position'), 'confidence': match.get('confidence')}
+    return {'keyword': match.keyword, 'position': match.position, 'confidence': match.confidence}
+
+
+def index_jobs_by_sector(recommendations: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the job dicts in jobs_by_sector with their indices in job_recommendations.
+
+    Jobs that were filtered out of job_recommendations (by target sector) are not listed.
+    """
+    by_sector = recommendations.get('jobs_by_sector')
+    jobs = recommendations.get('job_recommendations')
+    if not isinstance(by_sector, dict) or not isinstance(jobs, list):
+        return recommendations
+    index_by_id = {id(job): i for i, job in enumerate(jobs)}
+    indexed = {}
+    for sector, sector_jobs in by_sector.items():
+        indices = []
+        for job in sector_jobs:
+            i = index_by_id.get(id(job))
+            if i is None and job in jobs:
+                i = jobs.index(job)
+            if i is not None:
+                indices.append(i)
+        indexed[sector] = indices
+    recommendations = dict(recommendations)
+    recommendations['jobs_by_sector'] = indexed
+    recommendations['jobs_by_sector_format'] = 'indices'
+    return recommendations
+
+
+def _select_fields(result: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    selected = {key: result[key] for key in ALWAYS_KEPT_FIELDS if key in result}
+    for field in fields:
+        top, _, sub = field.partition('.')
+        if top not in result:
+            continue
+        if not sub:
+            selected[top] = result[top]
+        elif isinstance(result[top], dict) and sub in result[top]:
+            parent = selected.get(top)
+            if not isinstance(parent, dict) or parent is result[top]:
+                parent = {} if parent is None else dict(parent)
+                selected[top] = parent
+            parent[sub] = result[top][sub]
+    return selected
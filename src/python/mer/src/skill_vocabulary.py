@@ -0,0 +1,151 @@
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_vocabulary.json')
+
+
+def build_trie_regex(terms: List[str]) -> str:
+    """Build one regex for a list of literal terms, factored as a prefix trie.
+
+    'Python|PyTorch|Pandas' becomes 'p(?:andas|y(?:thon|torch))', so matching at a position
+    walks the trie instead of trying every alternative: the cost grows with term length,
+    not with the number of terms. Longer continuations are tried before a shorter term ends.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term.lower():
+            node = node.setdefault(char, {})
+        node[''] = True
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node: Dict) -> str:
+    ends_here = '' in node
+    branches = [re.escape(char) + _trie_node_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not ends_here:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if ends_here else group
+
+
+class CompiledVocabulary:
+    """Immutable, compiled form of a skill vocabulary; swapped as a whole on reload"""
+
+    def __init__(self, categories: Dict[str, List[str]], term_counts: Dict[str, int], version: Any, source_hash: str, path: str):
+        self.sources = categories
+        self.patterns = {
+            category: [re.compile(source, re.IGNORECASE | re.MULTILINE) for source in sources]
+            for category, sources in categories.items()
+        }
+        self.term_counts = term_counts
+        self.version = version
+        self.source_hash = source_hash
+        self.path = path
+        self.loaded_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": os.path.basename(self.path),
+            "source_hash": self.source_hash[:12],
+            "loaded_at": self.loaded_at,
+            "categories": {
+                category: {"patterns": len(patterns), "terms": self.term_counts.get(category, 0)}
+                for category, patterns in self.patterns.items()
+            }
+        }
+
+
+class SkillVocabulary:
+    """Loads the skill vocabulary data file, compiles it, and hot-reloads it when it changes.
+
+    Each category is a list of groups: {"terms": [...]} for literal skill names (compiled into
+    one trie regex per group) or {"pattern": "..."} for a raw regex. The sources are generated
+    and compiled once per load of the data file, in memory.
+    `current` is replaced atomically; readers take one reference per extraction.
+    """
+
+    def __init__(self, path: str = None, check_interval: float = 5.0):
+        self.path = path or os.getenv('SKILL_VOCABULARY_PATH') or DEFAULT_VOCABULARY_PATH
+        self.check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._loaded_mtime = None
+        self.current = None
+        self.reload()
+
+    def reload(self) -> Dict[str, Any]:
+        """Load and compile the data file; on error the previous vocabulary stays in use"""
+        with self._reload_lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+                with open(self.path, 'rb') as vocabulary_file:
+                    raw = vocabulary_file.read()
+                source_hash = hashlib.sha256(raw).hexdigest()
+                if self.current is not None and source_hash == self.current.source_hash:
+                    self._loaded_mtime = mtime
+                    return {"success": True, "reloaded": False, "vocabulary": self.current.describe()}
+
+                compiled_sources = self._compile_sources(json.loads(raw.decode('utf-8')))
+                vocabulary = CompiledVocabulary(
+                    compiled_sources["categories"], compiled_sources["term_counts"],
+                    compiled_sources["version"], source_hash, self.path
+                )
+            except Exception as e:
+                logger.error(f"Failed to load skill vocabulary from {self.path}: {str(e)}")
+                if self.current is None:
+                    raise
+                return {"success": False, "error": str(e), "vocabulary": self.current.describe()}
+
+            self.current = vocabulary
+            self._loaded_mtime = mtime
+            logger.info(f"Loaded skill vocabulary {vocabulary.version} ({sum(vocabulary.term_counts.values())} terms)")
+            return {"success": True, "reloaded": True, "vocabulary": vocabulary.describe()}
+
+    def get(self) -> CompiledVocabulary:
+        """Current vocabulary, reloading first if the data file changed (checked every check_interval)"""
+        now = time.monotonic()
+        if self.check_interval and now - self._last_check >= self.check_interval:
+            self._last_check = now
+            try:
+                changed = os.path.getmtime(self.path) != self._loaded_mtime
+            except OSError:
+                changed = False
+            if changed:
+                self.reload()
+        return self.current
+
+    def _compile_sources(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        categories = {}
+        term_counts = {}
+        for category, groups in data["categories"].items():
+            sources = []
+            term_count = 0
+            for group in groups:
+                if "terms" in group:
+                    terms = [term.strip() for term in group["terms"] if isinstance(term, str) and term.strip()]
+                    if not terms:
+                        continue
+                    term_count += len(terms)
+                    # Lookarounds rather than \b so terms ending in symbols (C++, C#, B.E.) still match
+                    sources.append(r'(?<!\w)(?:' + build_trie_regex(terms) + r')(?!\w)')
+                elif "pattern" in group:
+                    re.compile(group["pattern"])
+                    term_count += 1
+                    sources.append(group["pattern"])
+                else:
+                    raise ValueError(f"Vocabulary group in '{category}' needs 'terms' or 'pattern'")
+            categories[category] = sources
+            term_counts[category] = term_count
+        return {"version": data.get("version"), "categories": categories, "term_counts": term_counts}
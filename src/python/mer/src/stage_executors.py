@@ -0,0 +1,232 @@
+"""Separate, bounded executors for the CPU-bound and I/O-bound stages of document analysis.
+
+Extraction (OCR, PDF/DOCX parsing, keyword regex scanning, skill categorization) holds the GIL
+for most of its run; recommendation mostly waits on Gemini. Run on the request threads, a few
+large scans stall every other request, and slow model calls pin threads that could be serving
+new ones. Each stage gets its own executor instead:
+
+- extraction: a process pool sized to the cores (`thread` or `inline` where fork is unavailable)
+- recommendation: a thread pool
+
+Each stage admits at most `workers + max_queue` tasks. run() waits up to `queue_timeout`
+seconds for a slot and then raises ExecutorSaturatedError, so overload turns into fast refusals
+(or, for recommendations, the local fallback) rather than an unbounded backlog.
+
+Settings come from the environment: <STAGE>_EXECUTOR (process / thread / inline),
+<STAGE>_WORKERS, <STAGE>_QUEUE and <STAGE>_QUEUE_TIMEOUT, with STAGE = EXTRACTION or LLM.
+"""
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("process", "thread", "inline")
+# Forked workers inherit the loaded backends and tables; spawned ones would re-import the app
+FORK_AVAILABLE = "fork" in multiprocessing.get_all_start_methods()
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a stage has no free worker or queue slot within its queue timeout"""
+
+    def __init__(self, stage: str, limit: int):
+        super().__init__(f"The {stage} stage is at capacity ({limit} requests running or queued); try again shortly")
+        self.stage = stage
+        self.limit = limit
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    # Wall-clock start time, comparable across processes, so queue wait can be measured
+    return time.time(), fn(*args, **kwargs)
+
+
+class StageExecutor:
+    """Bounded executor for one analysis stage; run() submits a call and waits for its result"""
+
+    def __init__(self, stage: str, kind: str, workers: int, max_queue: int, queue_timeout: float = 0.0,
+                 process_initializer: Callable = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"{stage} executor must be one of {', '.join(EXECUTOR_KINDS)}, not {kind!r}")
+        if kind == "process" and not FORK_AVAILABLE:
+            logger.warning(f"fork is not available; running the {stage} stage on threads")
+            kind = "thread"
+        self.stage = stage
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.process_initializer = process_initializer
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._inline = False
+        self._metrics_lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._queue_seconds = 0.0
+        self._run_seconds = 0.0
+
+    @property
+    def in_process(self) -> bool:
+        """True while calls run in another process (their side effects stay there)"""
+        return self.kind == "process" and not self._inline
+
+    def run(self, fn: Callable, *args, **kwargs):
+        if self.queue_timeout > 0:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        else:
+            acquired = self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._metrics_lock:
+                self._counts["rejected"] += 1
+            raise ExecutorSaturatedError(self.stage, self.workers + self.max_queue)
+
+        with self._metrics_lock:
+            self._counts["submitted"] += 1
+            self._in_flight += 1
+        submitted_at = time.time()
+        succeeded = False
+        try:
+            if self.kind == "inline" or self._inline:
+                started_at, result = _timed_call(fn, args, kwargs)
+            else:
+                try:
+                    started_at, result = self._get_executor().submit(_timed_call, fn, args, kwargs).result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); start a fresh pool for later calls
+                    self._discard_executor()
+                    raise
+            succeeded = True
+            return result
+        finally:
+            finished_at = time.time()
+            with self._metrics_lock:
+                self._in_flight -= 1
+                self._counts["completed" if succeeded else "failed"] += 1
+                if succeeded:
+                    self._queue_seconds += max(0.0, started_at - submitted_at)
+                    self._run_seconds += max(0.0, finished_at - started_at)
+            self._slots.release()
+
+    def load(self) -> float:
+        """Calls in flight per worker; above 1.0 calls are queueing"""
+        with self._metrics_lock:
+            return self._in_flight / self.workers
+
+    def start(self):
+        """Create the pool now; for processes, fork the workers before any threads are started"""
+        if self.kind == "inline":
+            return
+        executor = self._get_executor()
+        if self.kind == "process":
+            executor.submit(int).result()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            completed = self._counts["completed"]
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.workers),
+                **self._counts,
+                "avg_queue_seconds": round(self._queue_seconds / completed, 4) if completed else 0.0,
+                "avg_run_seconds": round(self._run_seconds / completed, 4) if completed else 0.0
+            }
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._counts = {key: 0 for key in self._counts}
+            self._queue_seconds = 0.0
+            self._run_seconds = 0.0
+
+    def close(self, wait: bool = False):
+        """Shut the pool down; it is recreated on the next run()"""
+        executor = self._discard_executor()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self):
+        executor = self._executor
+        if executor is None:
+            with self._executor_lock:
+                executor = self._executor
+                if executor is None:
+                    if self.kind == "process":
+                        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("fork"),
+                                                       initializer=self.process_initializer)
+                    else:
+                        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.stage}-stage")
+                    self._executor = executor
+        return executor
+
+    def _discard_executor(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        return executor
+
+
+class StageExecutors:
+    """The extraction (CPU) and recommendation (I/O) executors of a DocumentProcessor"""
+
+    def __init__(self, extraction: StageExecutor, recommendation: StageExecutor):
+        self.extraction = extraction
+        self.recommendation = recommendation
+
+    @classmethod
+    def from_env(cls, extraction_initializer: Callable = None) -> 'StageExecutors':
+        cores = os.cpu_count() or 2
+        extraction_workers = int(os.getenv('EXTRACTION_WORKERS', str(cores)))
+        llm_workers = int(os.getenv('LLM_WORKERS', '8'))
+        llm_kind = os.getenv('LLM_EXECUTOR', 'thread')
+        if llm_kind == "process":
+            # Recommendations share the Gemini client, its event loop and its caches
+            raise ValueError("LLM_EXECUTOR must be thread or inline")
+        extraction = StageExecutor(
+            "extraction",
+            os.getenv('EXTRACTION_EXECUTOR', 'process' if FORK_AVAILABLE else 'thread'),
+            extraction_workers,
+            int(os.getenv('EXTRACTION_QUEUE', str(2 * extraction_workers))),
+            float(os.getenv('EXTRACTION_QUEUE_TIMEOUT', '10')),
+            process_initializer=extraction_initializer
+        )
+        recommendation = StageExecutor(
+            "recommendation",
+            llm_kind,
+            llm_workers,
+            int(os.getenv('LLM_QUEUE', str(2 * llm_workers))),
+            float(os.getenv('LLM_QUEUE_TIMEOUT', '0'))
+        )
+        return cls(extraction, recommendation)
+
+    @contextmanager
+    def inline(self):
+        """Run both stages in the calling thread for the duration (e.g. warm-up before fork)"""
+        self.extraction._inline = self.recommendation._inline = True
+        try:
+            yield self
+        finally:
+            self.extraction._inline = self.recommendation._inline = False
+
+    def start(self):
+        self.extraction.start()
+        self.recommendation.start()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"extraction": self.extraction.metrics(), "recommendation": self.recommendation.metrics()}
+
+    def reset_metrics(self):
+        self.extraction.reset_metrics()
+        self.recommendation.reset_metrics()
+
+    def close(self, wait: bool = False):
+        self.extraction.close(wait=wait)
+        self.recommendation.close(wait=wait)
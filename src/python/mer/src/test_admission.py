@@ -0,0 +1,160 @@
+"""Tests for admission control, per-tenant fair queuing and quotas. Run: python -m unittest test_admission"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def acquire_in_thread(controller, tenant, outcomes, size_bytes=0):
+    """Start a thread that acquires a slot for `tenant` and appends (tenant, ticket or error) once it is decided"""
+    def run():
+        try:
+            outcomes.append((tenant, controller.acquire(tenant, size_bytes)))
+        except AdmissionRejected as e:
+            outcomes.append((tenant, e))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+class AdmissionTest(unittest.TestCase):
+
+    def test_full_queue_is_refused_with_503(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.05, tenant_max_concurrent=1, tenant_max_queue=1)
+        ticket = controller.acquire("a")
+        with self.assertRaises(AdmissionRejected) as refused:
+            controller.acquire("b")
+        self.assertEqual(refused.exception.status, 503)
+        self.assertGreaterEqual(refused.exception.retry_after, 1)
+        controller.release(ticket)
+        controller.release(controller.acquire("b"))
+        self.assertEqual(controller.metrics()["rejected_busy"], 1)
+
+    def test_queued_request_is_admitted_when_a_slot_frees(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=2.0, tenant_max_concurrent=1)
+        ticket = controller.acquire("a")
+        outcomes = []
+        thread = acquire_in_thread(controller, "b", outcomes)
+        wait_for(lambda: controller.metrics()["waiting"] == 1)
+        controller.release(ticket)
+        thread.join()
+        self.assertEqual(outcomes[0][0], "b")
+        controller.release(outcomes[0][1])
+
+    def test_rate_limit_is_a_429(self):
+        controller = AdmissionController(max_concurrent=4, max_queue=4, rate=0.01, burst=1)
+        controller.release(controller.acquire())
+        with self.assertRaises(AdmissionRejected) as refused:
+            controller.acquire()
+        self.assertEqual(refused.exception.status, 429)
+
+    def test_degraded_under_load_or_on_request(self):
+        controller = AdmissionController(max_concurrent=2, max_queue=2, degrade_at=0.5, tenant_max_concurrent=2)
+        first = controller.acquire("a")
+        self.assertFalse(first.degraded)
+        second = controller.acquire("a")
+        self.assertTrue(second.degraded)
+        controller.release(first)
+        controller.release(second)
+        backed_up = AdmissionController(max_concurrent=2, max_queue=2, degrade_when=lambda: True)
+        self.assertTrue(backed_up.acquire("a").degraded)
+
+
+class TenantTest(unittest.TestCase):
+
+    def test_tenants_take_turns_instead_of_queue_order(self):
+        controller = AdmissionController(max_concurrent=1, max_queue=8, queue_timeout=2.0, tenant_max_concurrent=1)
+        running = controller.acquire("bulk")
+        outcomes, threads = [], []
+        for queued in range(1, 4):
+            threads.append(acquire_in_thread(controller, "bulk", outcomes))
+            wait_for(lambda: controller.metrics()["waiting"] == queued)
+        threads.append(acquire_in_thread(controller, "light", outcomes))
+        wait_for(lambda: controller.metrics()["waiting"] == 4)
+        controller.release(running)
+        for admitted in range(1, 5):
+            wait_for(lambda: len(outcomes) == admitted)
+            controller.release(outcomes[-1][1])
+        for thread in threads:
+            thread.join()
+        # The light tenant's one request does not wait behind the bulk tenant's whole queue
+        self.assertEqual([tenant for tenant, _ in outcomes], ["bulk", "light", "bulk", "bulk"])
+
+    def test_tenant_concurrency_and_queue_quotas(self):
+        controller = AdmissionController(max_concurrent=4, max_queue=4, queue_timeout=0.05, tenant_max_concurrent=1, tenant_max_queue=0)
+        ticket = controller.acquire("a")
+        with self.assertRaises(AdmissionRejected) as refused:
+            controller.acquire("a")
+        self.assertEqual(refused.exception.status, 429)
+        # Another tenant is not held back by a's quota
+        controller.release(controller.acquire("b"))
+        controller.release(ticket)
+        self.assertEqual(controller.metrics(include_tenants=True)["tenants"]["a"]["rejected_quota"], 1)
+
+    def test_byte_quota_is_per_tenant(self):
+        controller = AdmissionController(max_concurrent=4, max_queue=4, tenant_bytes_per_second=1, tenant_byte_burst=1000)
+        controller.release(controller.acquire("a", 900))
+        with self.assertRaises(AdmissionRejected) as refused:
+            controller.acquire("a", 500)
+        self.assertEqual(refused.exception.status, 429)
+        controller.release(controller.acquire("b", 900))
+        tenants = controller.metrics(include_tenants=True)["tenants"]
+        self.assertEqual((tenants["a"]["bytes_admitted"], tenants["a"]["rejected_bytes"]), (900, 1))
+
+    def test_charge_bytes_after_admission(self):
+        controller = AdmissionController(max_concurrent=4, max_queue=4, tenant_bytes_per_second=1, tenant_byte_burst=1000)
+        ticket = controller.acquire("a", 100)
+        controller.charge_bytes(ticket, 800)
+        with self.assertRaises(AdmissionRejected):
+            controller.charge_bytes(ticket, 500)
+        controller.release(ticket)
+        self.assertEqual(controller.metrics(include_tenants=True)["tenants"]["a"]["bytes_admitted"], 900)
+
+
+class AnalyzeFromPathQuotaTest(unittest.TestCase):
+
+    def setUp(self):
+        import doc_test
+        self.doc_test = doc_test
+        self.original = doc_test.admission
+        doc_test.admission = AdmissionController(max_concurrent=2, max_queue=2, tenant_bytes_per_second=1, tenant_byte_burst=10 ** 6)
+        self.addCleanup(setattr, doc_test, "admission", self.original)
+        self.client = doc_test.app.test_client()
+
+    def bytes_admitted(self):
+        return sum(tenant["bytes_admitted"] for tenant in self.doc_test.admission.metrics(include_tenants=True)["tenants"].values())
+
+    def test_unvalidated_path_is_not_charged(self):
+        response = self.client.post('/document/analyze_from_path', json={"file_path": "/nonexistent/cv.pdf"})
+        self.assertEqual(response.get_json()["error"], "File not found")
+        self.assertEqual(self.bytes_admitted(), response.request.content_length)
+
+    def test_file_over_the_size_limit_is_not_charged(self):
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as document:
+            document.truncate(20 * 1024 * 1024)
+        self.addCleanup(os.unlink, document.name)
+        response = self.client.post('/document/analyze_from_path', json={"file_path": document.name})
+        self.assertFalse(response.get_json()["success"])
+        self.assertEqual(self.bytes_admitted(), response.request.content_length)
+
+    def test_validated_file_is_charged_its_size(self):
+        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as document:
+            document.write(b'x' * 5000)
+        self.addCleanup(os.unlink, document.name)
+        response = self.client.post('/document/analyze_from_path', json={"file_path": document.name})
+        self.assertEqual(self.bytes_admitted(), response.request.content_length + 5000)
+
+
+if __name__ == '__main__':
+    unittest.main()
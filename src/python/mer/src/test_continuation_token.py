@@ -0,0 +1,80 @@
+"""Tests for budgeted PDF analysis resumed from a continuation token. Run: python -m unittest test_continuation_token"""
+import base64
+import json
+import os
+import tempfile
+import unittest
+
+import doc_test
+from doc_test import AnalysisBudget, DocumentProcessor
+
+WORDS = "Python Java Docker AWS React SQL Kubernetes Git experience years project built lorem ipsum dolor".split()
+
+
+def fake_pages(count: int):
+    return [' '.join(WORDS[(page * 7 + i) % len(WORDS)] for i in range(60 + page * 11)) for page in range(count)]
+
+
+def encode(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class ContinuationTokenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = fake_pages(12)
+        self.processor = DocumentProcessor.__new__(DocumentProcessor)
+        self.processor.keyword_extractor = doc_test.document_processor.keyword_extractor
+        self.processor.validate_file = lambda path, file_type=None: {"success": True}
+        self.processor.iter_pdf_pages = self.iter_pages
+        self.processor._add_keyword_analysis = lambda result, keywords, categorize, recommend: dict(result, keywords=keywords)
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as document:
+            document.write(b'%PDF-1.4 test document')
+        self.path = document.name
+        self.addCleanup(os.unlink, self.path)
+
+    def iter_pages(self, path, stats, start_page=0):
+        stats.update(extraction_method="test", page_count=len(self.pages))
+        yield from self.pages[start_page:]
+
+    def test_resumed_analysis_matches_a_full_pass(self):
+        full = self.processor.extract_keywords_from_pdf_stream(self.path)
+        start_page, carry, calls = 0, None, 0
+        while True:
+            result = self.processor.extract_keywords_from_pdf_stream(self.path, budget=AnalysisBudget(max_pages=3), start_page=start_page, carry=carry)
+            calls += 1
+            if "continuation_token" not in result:
+                break
+            start_page, carry = self.processor.parse_continuation_token(self.path, result["continuation_token"])
+        self.assertEqual(calls, 4)
+        self.assertEqual(result["page_range"], [9, 12])
+        self.assertEqual(result["keywords"]["top_keywords"], full["keywords"]["top_keywords"])
+        self.assertEqual(result["keywords"]["total_keywords_found"], full["keywords"]["total_keywords_found"])
+        self.assertEqual((result["word_count"], result["char_count"]), (full["word_count"], full["char_count"]))
+
+    def test_invalid_tokens_are_rejected(self):
+        carry = {"stats": {}, "offset": 0, "word_count": 0, "char_count": 0}
+        valid = json.loads(base64.urlsafe_b64decode(self.processor.make_continuation_token(self.path, 3, carry) + '=='))
+        tokens = [
+            "garbage",
+            encode(dict(valid, page=-1)),
+            encode(dict(valid, page=True)),
+            encode(dict(valid, kw=[["Python", "Tech", -1, 0.9, 0]])),
+            encode(dict(valid, kw=[[1, 2, 3, 4, 5]])),
+            encode({key: value for key, value in valid.items() if key != "kw"}),
+        ]
+        for token in tokens:
+            with self.subTest(token=token), self.assertRaisesRegex(ValueError, "Invalid continuation_token"):
+                self.processor.parse_continuation_token(self.path, token)
+        with self.assertRaisesRegex(ValueError, "does not match this document"):
+            self.processor.parse_continuation_token(self.path, encode(dict(valid, doc="0-0")))
+
+    def test_bad_token_is_a_400(self):
+        client = doc_test.app.test_client()
+        response = client.post('/document/analyze_from_path', json={"file_path": self.path, "continuation_token": "garbage"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()["success"])
+
+
+if __name__ == '__main__':
+    unittest.main()
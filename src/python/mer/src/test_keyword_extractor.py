@@ -0,0 +1,91 @@
+"""Tests for KeywordExtractor's streaming scan and top-k selection. Run: python -m unittest test_keyword_extractor"""
+import unittest
+
+from doc_test import KeywordExtractor
+
+WORDS = "Python developer with years of experience in SQL Docker AWS React and Kubernetes built projects in Java and Git".split()
+
+
+def text_of_length(length: int) -> str:
+    words = []
+    while len(' '.join(words)) < length:
+        words.append(WORDS[len(words) % len(WORDS)])
+    return ' '.join(words)[:length].rstrip()
+
+
+class StreamingScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = KeywordExtractor()
+
+    def one_shot(self, text):
+        """Every match scanned in a single buffer holding the whole cleaned text"""
+        cleaned = self.extractor.clean_text_for_extraction(text)
+        found, stats = {}, {}
+        self.extractor._scan_buffer(self.extractor.vocabulary.get().patterns, cleaned, 0, len(cleaned), 0, 0.7, found, stats)
+        return found, stats
+
+    def assert_same_as_one_shot(self, chunks, text):
+        found, stats = self.one_shot(text)
+        result = self.extractor.extract_keywords_stream(chunks, limit=len(stats) or 1)
+        self.assertEqual(result["unique_keywords"], len(stats))
+        self.assertEqual(result["total_keywords_found"], sum(entry[2] for entry in stats.values()))
+        # Within a category, matches come in pattern order per scanned buffer, so compare them as sets
+        self.assertEqual(
+            {category: sorted((match.keyword, match.position, match.confidence) for match in matches) for category, matches in result["keywords_by_category"].items()},
+            {category: sorted((match.keyword, match.position, match.confidence) for match in matches) for category, matches in found.items()}
+        )
+        top = {keyword.keyword.lower(): (keyword.frequency, keyword.first_position) for keyword in result["top_keywords"]}
+        self.assertEqual(top, {key: (entry[2], entry[4]) for key, entry in stats.items()})
+
+    def test_single_chunk_around_the_overlap(self):
+        overlap, context = self.extractor.stream_overlap, self.extractor.context_window
+        for length in range(overlap - 10, overlap + context + 40, 3):
+            text = text_of_length(length)
+            with self.subTest(length=len(text)):
+                self.assert_same_as_one_shot([text], text)
+
+    def test_pages_around_the_overlap(self):
+        overlap, context = self.extractor.stream_overlap, self.extractor.context_window
+        for length in (overlap - 1, overlap + 1, overlap + context - 1, overlap + context + 1, 3 * overlap):
+            pages = [text_of_length(length) for _ in range(4)]
+            with self.subTest(length=length):
+                self.assert_same_as_one_shot(pages, ' '.join(pages))
+
+    def test_continuation_matches_a_full_pass(self):
+        pages = [text_of_length(230 + 37 * i) for i in range(6)]
+        full = self.extractor.extract_keywords_stream(pages, limit=50)
+        carry = {"stats": {}, "offset": 0}
+        self.extractor.extract_keywords_stream(pages[:2], limit=50, carry=carry)
+        resumed = self.extractor.extract_keywords_stream(pages[2:], limit=50, carry=carry)
+        self.assertEqual(resumed["top_keywords"], full["top_keywords"])
+        self.assertEqual(resumed["total_keywords_found"], full["total_keywords_found"])
+
+
+class TopKeywordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = KeywordExtractor()
+
+    def test_heap_selection_matches_a_full_sort(self):
+        stats = {}
+        for i in range(40):
+            for _ in range(i % 7 + 1):
+                self.extractor._record_keyword(stats, f"Skill{i}", "Tech", 0.7 + (i % 5) * 0.05, 1000 - i)
+        score = lambda entry: entry[2] * 0.6 + entry[3] * 0.4
+        expected = sorted(stats.values(), key=score, reverse=True)[:10]
+        top = self.extractor._select_top_keywords(stats, limit=10)
+        self.assertEqual([keyword.keyword for keyword in top], [entry[0] for entry in expected])
+        self.assertEqual([keyword.score for keyword in top], sorted((keyword.score for keyword in top), reverse=True))
+
+    def test_earliest_position_and_best_spelling_win(self):
+        stats = {}
+        self.extractor._record_keyword(stats, "python", "Tech", 0.7, 500)
+        self.extractor._record_keyword(stats, "Python", "Languages", 0.9, 900)
+        self.extractor._record_keyword(stats, "PYTHON", "Tech", 0.8, 100)
+        top, = self.extractor._select_top_keywords(stats)
+        self.assertEqual((top.keyword, top.category, top.frequency, top.confidence, top.first_position), ("Python", "Languages", 3, 0.9, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for legacy_doc on crafted compound files. Run: python -m unittest test_legacy_doc"""
+import struct
+import unittest
+
+import legacy_doc
+from legacy_doc import CompoundFile, LegacyDocError, OLE_SIGNATURE, END_OF_CHAIN
+
+
+def compound_header(fat_sectors=0, first_directory=END_OF_CHAIN, first_difat=END_OF_CHAIN, difat_sectors=0) -> bytearray:
+    header = bytearray(512)
+    header[:8] = OLE_SIGNATURE
+    struct.pack_into('<HHHHH', header, 0x18, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into('<8I', header, 0x2C, fat_sectors, first_directory, 0, 4096, END_OF_CHAIN, 0, first_difat, difat_sectors)
+    struct.pack_into('<109I', header, 0x4C, *([0xFFFFFFFF] * 109))
+    return header
+
+
+class CompoundFileTest(unittest.TestCase):
+
+    def test_self_referencing_difat_is_rejected(self):
+        # One sector, a DIFAT chain that points back to itself and claims 2^32 - 1 sectors
+        data = compound_header(fat_sectors=1, first_difat=0, difat_sectors=0xFFFFFFFF)
+        sector = bytearray(512)
+        struct.pack_into('<I', sector, 508, 0)
+        data += sector
+        with self.assertRaises(LegacyDocError):
+            CompoundFile(bytes(data))
+        self.assertFalse(legacy_doc.is_word_document(bytes(data)))
+
+    def test_difat_count_is_bounded_by_the_file(self):
+        # A DIFAT chain ending early stops at the end of the file, whatever count the header gives
+        data = compound_header(fat_sectors=1, first_difat=0, difat_sectors=0xFFFFFFFF)
+        sector = bytearray(b'\xff' * 512)
+        struct.pack_into('<I', sector, 508, 7)
+        data += sector
+        self.assertEqual(CompoundFile(bytes(data)).streams(), [])
+
+    def test_not_a_compound_file(self):
+        with self.assertRaises(LegacyDocError):
+            CompoundFile(b'PK\x03\x04' + bytes(1020))
+        with self.assertRaises(LegacyDocError):
+            legacy_doc.extract_text(b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
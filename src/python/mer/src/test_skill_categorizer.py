@@ -0,0 +1,34 @@
+"""Tests for LocalSkillCategorizer's row and columnar formats. Run: python -m unittest test_skill_categorizer"""
+import unittest
+
+from doc_test import LocalSkillCategorizer
+
+SKILLS = ["Python", " python", "Statistics", {"name": "SQL"}, "Figma", "Basket Weaving"]
+
+
+class CategorizeSkillsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.categorizer = LocalSkillCategorizer()
+
+    def test_columnar_and_row_formats_agree(self):
+        rows = self.categorizer.categorize_skills(SKILLS)
+        columns = self.categorizer.categorize_skills(SKILLS, columnar=True)
+        self.assertEqual(
+            [(record.skill_name, record.sector, record.category, record.confidence) for record in rows["categorized_skills"]],
+            list(zip(columns["skills"], columns["sectors"], columns["categories"], columns["confidence"]))
+        )
+        for key in ('total_skills_processed', 'unique_skills', 'skills_categorized'):
+            self.assertEqual(rows[key], columns[key])
+        self.assertEqual(sorted(rows['sectors_found']), sorted(columns['sectors_found']))
+
+    def test_non_strings_skipped_and_spellings_merged(self):
+        result = self.categorizer.categorize_skills(SKILLS)
+        self.assertEqual((result['total_skills_processed'], result['unique_skills']), (5, 4))
+        first, second = result["categorized_skills"][:2]
+        self.assertIs(first, second)
+        self.assertEqual(first.skill_name, "Python")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for the bounded stage executors. Run: python -m unittest test_stage_executors"""
+import os
+import time
+import threading
+import unittest
+
+from stage_executors import StageExecutor, StageExecutors, ExecutorSaturatedError, FORK_AVAILABLE
+
+
+class StageExecutorTest(unittest.TestCase):
+
+    def executor(self, kind="thread", workers=1, max_queue=0, queue_timeout=0.0):
+        executor = StageExecutor("test", kind, workers, max_queue, queue_timeout)
+        self.addCleanup(executor.close, True)
+        return executor
+
+    def test_refuses_beyond_workers_plus_queue(self):
+        executor = self.executor(workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Semaphore(0)
+
+        def blocked():
+            started.release()
+            release.wait(5)
+
+        threads = [threading.Thread(target=executor.run, args=(blocked,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        started.acquire(timeout=5)
+        while executor.metrics()["in_flight"] < 2:
+            time.sleep(0.005)
+        with self.assertRaises(ExecutorSaturatedError) as refused:
+            executor.run(int)
+        self.assertEqual(refused.exception.limit, 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        metrics = executor.metrics()
+        self.assertEqual((metrics["completed"], metrics["rejected"], metrics["in_flight"]), (2, 1, 0))
+        self.assertEqual(executor.run(len, "abc"), 3)
+
+    def test_failures_are_counted_and_raised(self):
+        executor = self.executor()
+        with self.assertRaises(ZeroDivisionError):
+            executor.run(divmod, 1, 0)
+        self.assertEqual(executor.metrics()["failed"], 1)
+        self.assertEqual(executor.load(), 0.0)
+
+    def test_inline_runs_in_the_calling_thread(self):
+        executor = self.executor(kind="inline")
+        self.assertEqual(executor.run(threading.get_ident), threading.get_ident())
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StageExecutor("test", "fiber", 1, 0)
+
+    @unittest.skipUnless(FORK_AVAILABLE, "needs fork")
+    def test_process_stage_runs_in_another_process(self):
+        executor = self.executor(kind="process")
+        self.assertTrue(executor.in_process)
+        self.assertNotEqual(executor.run(os.getpid), os.getpid())
+        stages = StageExecutors(executor, self.executor())
+        with stages.inline():
+            self.assertFalse(executor.in_process)
+            self.assertEqual(executor.run(os.getpid), os.getpid())
+        self.assertTrue(executor.in_process)
+
+
+if __name__ == '__main__':
+    unittest.main()